@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from experiment.runner import simulate_bully
+from statistic.statistics import SimStats
+
+# Benchmark of the ACK bookkeeping of the unreliable Bully algorithm. The
+# retransmission of the COORDINATOR message by the new coordinator (waiting
+# for the acks of all the other nodes) is replayed with the missing acks kept
+# in a list (membership test and remove) and in a set (discard, the rounds send
+# to a sorted snapshot): every round sends to the missing nodes and each of
+# them acks if both the message and its ack are not lost; the acks arrive in
+# random order (best time of REPEAT runs). Then whole elections are performed
+# on the event kernel with the set bookkeeping
+
+REPEAT = 3
+N_NODES = (100, 300, 1000)
+LOSSES = (0.2, 0.5, 0.75)
+DELAY = 1
+DELAY_Q = 0.8
+SEED = 3
+
+# This function replays the retransmission of the COORDINATOR message with a
+# bookkeeping and returns the elapsed time and the ids sent by every round
+#   params:
+#       n_nodes - number of nodes
+#       loss - loss rate
+#       use_set - if true the missing acks are a set, otherwise a list
+def coordinator_phase(n_nodes, loss, use_set):
+    rng = random.Random(SEED)
+    rounds = []
+    start = time.perf_counter()
+    if use_set:
+        missing_ack = set(range(0, n_nodes - 1))
+        missing_ack.discard(n_nodes - 2)
+    else:
+        missing_ack = list(range(0, n_nodes - 1))
+        missing_ack.remove(n_nodes - 2)
+    while len(missing_ack) != 0:
+        sent = sorted(missing_ack) if use_set else list(missing_ack)
+        acks = [
+            n_id for n_id in sent
+            if rng.random() > loss and rng.random() > loss
+        ]
+        rng.shuffle(acks)
+        for sender in acks:
+            if use_set:
+                missing_ack.discard(sender)
+            elif sender in missing_ack:
+                missing_ack.remove(sender)
+        rounds.append(sent)
+
+    return time.perf_counter() - start, rounds
+
+# This function returns the best time of REPEAT replays of a bookkeeping, the
+# number of rounds and the ids sent by the rounds
+#   params:
+#       n_nodes - number of nodes
+#       loss - loss rate
+#       use_set - if true the missing acks are a set, otherwise a list
+def best(n_nodes, loss, use_set):
+    runs = [coordinator_phase(n_nodes, loss, use_set) for i in range(REPEAT)]
+
+    return min(r[0] for r in runs), runs[-1][1]
+
+# This function performs an unreliable election on the event kernel and
+# returns the elapsed time and the number of messages
+#   params:
+#       n_nodes - number of nodes
+#       loss - loss rate
+def election(n_nodes, loss):
+    stats = SimStats(1, DELAY, n_nodes, "Bully", True, DELAY_Q, loss, SEED)
+    start = time.perf_counter()
+    simulate_bully(stats, 1, n_nodes, DELAY, 1, unreliable=True, loss=loss,
+                   delay_q=DELAY_Q, engine="kernel")
+
+    return time.perf_counter() - start, stats.msg_counter[0]
+
+if __name__ == "__main__":
+    print("COORDINATOR retransmission\n")
+    print(f"{'nodes':>6}{'loss':>6}{'rounds':>8}{'list [ms]':>11}" +
+          f"{'set [ms]':>10}{'speedup':>9}  same")
+    for n_nodes in N_NODES:
+        for loss in LOSSES:
+            list_time, list_rounds = best(n_nodes, loss, False)
+            set_time, set_rounds = best(n_nodes, loss, True)
+            print(f"{n_nodes:>6}{loss:>6}{len(set_rounds):>8}" +
+                  f"{list_time * 1e3:>11.2f}{set_time * 1e3:>10.2f}" +
+                  f"{list_time / set_time:>9.1f}  {list_rounds == set_rounds}")
+
+    print("\nElections on the event kernel\n")
+    print(f"{'nodes':>6}{'loss':>6}{'messages':>10}{'time [s]':>10}")
+    for n_nodes in N_NODES:
+        for loss in LOSSES:
+            elapsed, msgs = election(n_nodes, loss)
+            print(f"{n_nodes:>6}{loss:>6}{msgs:>10}{elapsed:>10.2f}")
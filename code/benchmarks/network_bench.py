@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import simpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from election.bully import BullySimulation
+from election.ring import RingSimulation
+from engine.bully import KernelBullySimulation
+from engine.ring import KernelRingSimulation
+from experiment.streams import replication_rng
+from statistic.statistics import SimStats
+
+# Benchmark of the memory taken by the nodes of very large networks. The
+# Ring and Bully networks are built with the SimPy nodes, the kernel nodes
+# (views of the network state arrays kept in a list) and the compact kernel
+# nodes (views created on access), and the memory allocated by each network
+# is divided by its number of nodes. Then reliable Ring replications are
+# performed on the kernel and on the compact kernel (best time of REPEAT
+# runs, same statistics expected)
+
+REPEAT = 3
+N_NODES = (1000, 10000, 100000)
+SIMPY_MAX_NODES = 10000
+DELAY = 1
+DELAY_Q = 0.9
+SEED = 3
+
+# This function returns the bytes per node allocated building a network
+#   params:
+#       build - function returning the network
+#       n_nodes - number of nodes
+def bytes_per_node(build, n_nodes):
+    tracemalloc.start()
+    network = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del network
+
+    return size / n_nodes
+
+# This function returns the builders of the networks of an algorithm
+#   params:
+#       name - "Ring" or "Bully"
+#       n_nodes - number of nodes
+def builders(name, n_nodes):
+    stats = SimStats(1, DELAY, n_nodes, name, False, DELAY_Q, 0.0, SEED)
+    if name == "Ring":
+        return {
+            "simpy": lambda: RingSimulation(
+                simpy.Environment(), n_nodes, DELAY, stats
+            ),
+            "kernel": lambda: KernelRingSimulation(n_nodes, DELAY, stats),
+            "compact": lambda: KernelRingSimulation(
+                n_nodes, DELAY, stats, compact=True
+            )
+        }
+    return {
+        "simpy": lambda: BullySimulation(
+            simpy.Environment(), n_nodes, DELAY, DELAY_Q, stats
+        ),
+        "kernel": lambda: KernelBullySimulation(n_nodes, DELAY, DELAY_Q, stats),
+        "compact": lambda: KernelBullySimulation(
+            n_nodes, DELAY, DELAY_Q, stats, compact=True
+        )
+    }
+
+# This function performs REPEAT reliable Ring replications and returns the
+# best time and the statistics
+#   params:
+#       n_nodes - number of nodes
+#       compact - if true, the network is compact
+def ring_runs(n_nodes, compact):
+    stats = SimStats(1, DELAY, n_nodes, "Ring", False, DELAY_Q, 0.0, SEED)
+    ring = KernelRingSimulation(n_nodes, DELAY, stats, compact=compact)
+    times = []
+    for k in range(REPEAT):
+        ring.set_rng(replication_rng(SEED, k))
+        start = time.perf_counter()
+        ring.run()
+        times.append(time.perf_counter() - start)
+
+    return min(times), (stats.runtimes, stats.msg_counter)
+
+if __name__ == "__main__":
+    print("Memory of the networks [B/node]\n")
+    print(f"{'algorithm':10}{'nodes':>8}{'simpy':>9}{'kernel':>9}" +
+          f"{'compact':>9}{'arrays':>8}")
+    for name in ("Ring", "Bully"):
+        for n_nodes in N_NODES:
+            build = builders(name, n_nodes)
+            simpy_size = "-"
+            if n_nodes <= SIMPY_MAX_NODES:
+                simpy_size = f"{bytes_per_node(build['simpy'], n_nodes):.0f}"
+            kernel = bytes_per_node(build["kernel"], n_nodes)
+            compact = bytes_per_node(build["compact"], n_nodes)
+            arrays = build["compact"]().state.nbytes() / n_nodes
+            print(f"{name:10}{n_nodes:>8}{simpy_size:>9}{kernel:>9.0f}" +
+                  f"{compact:>9.0f}{arrays:>8.0f}")
+
+    print("\nReliable Ring replications\n")
+    print(f"{'nodes':>8}{'kernel [ms]':>13}{'compact [ms]':>14}  same")
+    for n_nodes in N_NODES:
+        kernel, kernel_stats = ring_runs(n_nodes, False)
+        compact, compact_stats = ring_runs(n_nodes, True)
+        print(f"{n_nodes:>8}{kernel * 1e3:>13.1f}{compact * 1e3:>14.1f}" +
+              f"  {kernel_stats == compact_stats}")
@@ -0,0 +1,69 @@
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from experiment.runner import simulate_bully, simulate_ring
+from statistic.statistics import SimStats
+
+# Benchmark of the reuse of the SimPy objects across replications: every
+# configuration is simulated with new environment/nodes per replication and
+# with the objects reset in place (best time of REPEAT runs). The replications
+# are seeded, so the results must be identical; garbage collections count the
+# allocation churn
+
+REPEAT = 3
+N_NODES = 25
+DELAY = 110
+SEED = 3
+
+# (algorithm, unreliable links, replications, factors)
+CONFIGS = [
+    ("Ring", False, 1000, {"initiators": 1}),
+    ("Ring", True, 50, {"initiators": 1, "loss": 0.2, "timeout": 0.8}),
+    ("Bully", False, 300, {"initiators": 1, "delay_q_r": 0.99}),
+    ("Bully", True, 300, {"initiators": 1, "loss": 0.2, "delay_q": 0.8}),
+]
+
+# This function performs the replications of a configuration
+#   params:
+#       name - algorithm name
+#       unreliable - unreliable links
+#       n_sim - number of replications
+#       factors - other factors of the configuration
+#       reuse - if true, the SimPy objects are reused
+def run(name, unreliable, n_sim, factors, reuse):
+    stats = SimStats(factors["initiators"], DELAY, N_NODES, name, unreliable,
+                     seed=SEED)
+    simulate = simulate_bully if name == "Bully" else simulate_ring
+    gc.collect()
+    collections = sum(gen["collections"] for gen in gc.get_stats())
+    start = time.perf_counter()
+    simulate(stats, n_sim, N_NODES, DELAY, unreliable=unreliable,
+             reuse=reuse, **factors)
+    elapsed = time.perf_counter() - start
+    collections = sum(g["collections"] for g in gc.get_stats()) - collections
+
+    return elapsed, collections, (stats.runtimes, stats.msg_counter)
+
+# This function returns the best time of REPEAT runs of a configuration, the
+# garbage collections and the results of the last one
+#   params:
+#       config - configuration of CONFIGS
+#       reuse - if true, the SimPy objects are reused
+def best(config, reuse):
+    runs = [run(*config, reuse) for i in range(REPEAT)]
+
+    return min(r[0] for r in runs), runs[-1][1], runs[-1][2]
+
+print(f"{'config':<20}{'new [s]':>9}{'reuse [s]':>11}{'speedup':>9}" +
+      f"{'gc new':>8}{'gc reuse':>10}{'same':>6}")
+for config in CONFIGS:
+    label = f"{config[0]} {'unrel.' if config[1] else 'rel.'}"
+    t_new, gc_new, res_new = best(config, False)
+    t_reuse, gc_reuse, res_reuse = best(config, True)
+    print(f"{label:<20}{t_new:>9.2f}{t_reuse:>11.2f}" +
+          f"{t_new / t_reuse:>9.2f}{gc_new:>8}{gc_reuse:>10}" +
+          f"{str(res_new == res_reuse):>6}")
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+# Benchmark of the startup of a (worker) process: every import of MODULES is
+# timed in a fresh interpreter (best of REPEAT), together with the maximum RSS
+# of the process and the heavy modules loaded
+
+REPEAT = 5
+MODULES = [
+    "utils",
+    "statistic.statistics",
+    "experiment.runner",
+    "experiment.sweep",
+]
+HEAVY = ["matplotlib", "scipy"]
+
+CODE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+heavy = [m for m in {heavy} if m in sys.modules]
+print(elapsed, rss, ",".join(heavy) or "-")
+"""
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+print(f"{'module':<24}{'import [ms]':>12}{'RSS [MB]':>10}  heavy modules")
+for module in MODULES:
+    runs = []
+    for i in range(REPEAT):
+        out = subprocess.run(
+            [sys.executable, "-c", CODE.format(module=module, heavy=HEAVY)],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.split()
+        runs.append((float(out[0]), float(out[1]), out[2]))
+    elapsed, rss, heavy = min(runs)
+    print(f"{module:<24}{elapsed * 1000:>12.1f}{rss:>10.1f}  {heavy}")
@@ -0,0 +1,144 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from node.successors import SuccessorIndex
+
+# Benchmark of the next active neighbor lookups of the ring with many crashed
+# nodes: a message goes around the ring CYCLES times (an ELECTION and a
+# COORDINATOR cycle) from node 0, looking up the next active node at every
+# hop, with the linear scan of the peers and with the SuccessorIndex (best
+# time of REPEAT runs). The crashed nodes are either random or a single block
+# (the highest ids, as the crashed coordinators); with RETRIES lookups per hop
+# (retransmissions with unreliable links) the scan of a block is repeated.
+# Every layout is then checked against the linear scan while nodes crash and
+# recover between the hops
+
+REPEAT = 3
+N_NODES = 10000
+CYCLES = 2
+RETRIES = (1, 4)
+DENSITIES = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+SEED = 3
+
+# this class represents a peer of the linear scan (only its state)
+#   attributes:
+#       id - id of the node
+#       crashed - if true, the node crashed
+class Peer:
+
+    __slots__ = ("id", "crashed")
+
+    def __init__(self, id):
+        self.id = id
+        self.crashed = False
+
+# This function returns the next active neighbor of a node scanning the peers
+# (the lookup replaced by the SuccessorIndex)
+#   params:
+#       peers - list of Peer
+#       id - id of the node
+def scan_next(peers, id):
+    for i in range(1, len(peers)):
+        next = peers[(i + id) % len(peers)]
+        if next.crashed == False:
+            return next.id
+
+# This function returns the ids of the crashed nodes of a layout (node 0,
+# where the cycles start, is always active)
+#   params:
+#       layout - "random" or "block"
+#       density - fraction of crashed nodes
+#       rng - random number generator
+def crashed_ids(layout, density, rng):
+    n_crashed = min(int(density * N_NODES), N_NODES - 1)
+    if layout == "block":
+        return range(N_NODES - n_crashed, N_NODES)
+    return rng.sample(range(1, N_NODES), n_crashed)
+
+# This function performs the cycles with a lookup function and returns the
+# elapsed time and the number of hops
+#   params:
+#       lookup - function returning the next active node of an id
+#       retries - lookups per hop
+def cycles(lookup, retries):
+    hops = 0
+    start = time.perf_counter()
+    for c in range(CYCLES):
+        id = 0
+        while True:
+            for r in range(retries):
+                next = lookup(id)
+            hops += 1
+            id = next
+            if id == 0:
+                break
+
+    return time.perf_counter() - start, hops
+
+# This function returns the best time of REPEAT runs of the cycles with the
+# linear scan and with the index (a new index every run, so the compression of
+# the paths is paid by each run)
+#   params:
+#       crashed - ids of the crashed nodes
+#       retries - lookups per hop
+def best(crashed, retries):
+    peers = [Peer(i) for i in range(N_NODES)]
+    for id in crashed:
+        peers[id].crashed = True
+
+    scan, index = [], []
+    for i in range(REPEAT):
+        scan.append(cycles(lambda id: scan_next(peers, id), retries))
+        successors = SuccessorIndex(N_NODES)
+        for id in crashed:
+            successors.crash(id)
+        index.append(cycles(successors.next, retries))
+
+    return min(s[0] for s in scan), min(s[0] for s in index), scan[0][1]
+
+# This function checks the index against the linear scan while random nodes
+# crash and recover between the hops (as during an election)
+#   params:
+#       crashed - ids of the crashed nodes
+#       rng - random number generator
+def check(crashed, rng):
+    peers = [Peer(i) for i in range(N_NODES)]
+    successors = SuccessorIndex(N_NODES)
+    for id in crashed:
+        peers[id].crashed = True
+        successors.crash(id)
+
+    id = 0
+    for hop in range(2 * N_NODES):
+        changed = rng.randrange(1, N_NODES)
+        if peers[changed].crashed:
+            peers[changed].crashed = False
+            successors.recover(changed)
+        else:
+            peers[changed].crashed = True
+            successors.crash(changed)
+        next = scan_next(peers, id)
+        if successors.next(id) != next:
+            return False
+        id = next if next is not None else 0
+
+    return True
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    print(f"{N_NODES} nodes, {CYCLES} cycles\n")
+    print(f"{'layout':8}{'crashed':>8}{'retries':>8}{'hops':>7}" +
+          f"{'scan [ms]':>11}{'index [ms]':>12}{'speedup':>9}  same")
+    for layout in ("random", "block"):
+        for density in DENSITIES:
+            crashed = crashed_ids(layout, density, rng)
+            same = check(crashed, rng)
+            for retries in RETRIES:
+                scan, index, hops = best(crashed, retries)
+                print(f"{layout:8}{density:>8.0%}{retries:>8}{hops:>7}" +
+                      f"{scan * 1e3:>11.1f}{index * 1e3:>12.1f}" +
+                      f"{scan / index:>9.1f}  {same}")
@@ -0,0 +1,85 @@
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from experiment.runner import run_replications
+from statistic.statistics import SimStats
+
+# Statistical check of the vector engine against the SimPy one: for every
+# configuration both engines perform N_SIM replications (independent streams)
+# and the differences of the means of turnaround time, number of messages and
+# rate of wrong elections are compared with their standard error (|z| > 3
+# points to a modelling error)
+
+N_SIM = 4000
+SEED = 11
+DELAY = 110
+
+# (algorithm, number of nodes, initiators, quantile of the timeouts)
+CONFIGS = [
+    ("Ring", 5, 1, 0.99),
+    ("Ring", 8, 3, 0.99),
+    ("Bully", 5, 1, 0.99),
+    ("Bully", 8, 2, 0.8),
+    ("Bully", 10, 1, 0.9),
+    ("Bully", 10, 3, 0.95),
+]
+
+# This function performs the replications of a configuration with an engine
+#   params:
+#       name - algorithm name
+#       n_nodes - number of nodes
+#       initiators - number of initiators
+#       quantile - quantile of the timeouts
+#       engine - simulation engine
+#       seed - seed of the configuration
+def run(name, n_nodes, initiators, quantile, engine, seed):
+    stats = SimStats(initiators, DELAY, n_nodes, name, seed=seed)
+    factors = {
+        "n_nodes": n_nodes,
+        "delay": DELAY,
+        "initiators": initiators,
+        "engine": engine
+    }
+    if name == "Bully":
+        factors["delay_q_r"] = quantile
+    start = time.perf_counter()
+    run_replications(stats, factors, N_SIM, 1)
+    elapsed = time.perf_counter() - start
+
+    wrong = [0.0] * N_SIM
+    for w_s in stats.wrong_sims:
+        wrong[w_s] = 1.0
+
+    return elapsed, [stats.runtimes, stats.msg_counter, wrong]
+
+# This function returns mean and variance of a list
+#   params:
+#       samples - list of samples
+def mean_var(samples):
+    mean = sum(samples) / len(samples)
+    var = sum((x - mean) ** 2 for x in samples) / (len(samples) - 1)
+
+    return mean, var
+
+print(f"{'config':<24}{'engine':>8}{'time [s]':>10}" +
+      f"{'rtt':>10}{'msg':>9}{'wrong':>8}")
+for name, n_nodes, initiators, quantile in CONFIGS:
+    config = f"{name} N={n_nodes} init={initiators} q={quantile}"
+    results = {}
+    for engine, seed in (("simpy", SEED), ("vector", SEED + 1)):
+        elapsed, samples = run(name, n_nodes, initiators, quantile, engine,
+                               seed)
+        results[engine] = [mean_var(s) for s in samples]
+        means = [m for m, v in results[engine]]
+        print(f"{config:<24}{engine:>8}{elapsed:>10.2f}{means[0]:>10.1f}" +
+              f"{means[1]:>9.2f}{means[2]:>8.4f}")
+
+    z = []
+    for (m1, v1), (m2, v2) in zip(results["simpy"], results["vector"]):
+        err = math.sqrt((v1 + v2) / N_SIM)
+        z.append((m2 - m1) / err if err > 0 else 0.0)
+    print(f"{'':<24}{'z':>8}{'':>10}{z[0]:>10.2f}{z[1]:>9.2f}{z[2]:>8.2f}")
@@ -1,8 +1,10 @@
-from numpy import random
+import simpy
 
-from msg.bully_msg import BullyMsg
+from msg.bully_msg import BullyKind, BullyMsg
+from node.agreement import AgreementTracker
 from node.bully_node import BullyNode
 from election.simulation import Simulation
+from utils import randint
 
 # this class represents a bully algorithm simulation
 #   attributes:
@@ -11,6 +13,7 @@ from election.simulation import Simulation
 #       t_time - simulation turnaround time
 #       sim_stats - reference to the statistics class (records stats)
 #       env - simulation environment
+#       agreement - AgreementTracker of the election
 class BullySimulation(Simulation):
     
     # method to initialize BullySimulation
@@ -24,10 +27,13 @@ class BullySimulation(Simulation):
 
         super().__init__(env, n_nodes, delay_mean)
         self.sim_stats = sim_stats
+        self.agreement = AgreementTracker(n_nodes)
 
         for i in range(n_nodes):
             self.nodes.append(
-                BullyNode(env, i, sim_stats, -1, delay_mean, delay_q)
+                BullyNode(
+                    env, i, sim_stats, -1, delay_mean, delay_q, self.agreement
+                )
             )
 
         for i in range(n_nodes):    # pass the peers to the nodes
@@ -53,6 +59,7 @@ class BullySimulation(Simulation):
         
         # restore all nodes default status
         self.sim_stats.clear_delays(len(self.sim_stats.msg_counter)-1)      
+        self.agreement.reset()
         for i in range(len(self.nodes)):
             self.nodes[i].reset(self.env)
             self.nodes[i].set_behaviour(loss_rate, debug_mode)
@@ -68,22 +75,23 @@ class BullySimulation(Simulation):
         
         initiators = [] # select random initiators
         for i in range(n_initiators):
-            init = self.nodes[random.randint(len(self.nodes))]
+            init = self.nodes[randint(len(self.nodes), self.rng)]
             # if generated initiator is the crashed coordinator, generate a new
             # one
             while init.crashed or init in initiators:
-                init = self.nodes[random.randint(len(self.nodes))]
+                init = self.nodes[randint(len(self.nodes), self.rng)]
 
             initiators.append(init)
 
-        # all initiators start election
-        election_msg = BullyMsg("ELECTION", -1)
+        # all initiators start election (the message is handled by their
+        # receive processes): the processes just created start waiting for
+        # messages first, then the messages are all put before waiting, so
+        # the initiators handle them in order before any timer of the election
+        # expires (as on the event kernel)
+        yield self.env.timeout(0)
+        election_msg = BullyMsg(BullyKind.ELECTION, -1)
         for i in range(n_initiators):
-            yield initiators[i].queue.put(election_msg) 
-            if loss_rate == 0:  # reliable links
-                self.env.process(initiators[i].reliable_receive())
-            else:
-                self.env.process(initiators[i].unreliable_receive())
+            initiators[i].queue.put(election_msg)
 
         # wait for finish_event to be triggered (means that election ended)
         result = yield self.finish_event
@@ -94,4 +102,7 @@ class BullySimulation(Simulation):
         
         if debug_mode:
             print("\n\033[1;94mBully election algorithm terminated")
-            print("\n------------------------------------------------\033[0m\n")
\ No newline at end of file
+            print("\n------------------------------------------------\033[0m\n")
+
+        # stop all processes
+        raise simpy.core.StopSimulation("Election finished")
\ No newline at end of file
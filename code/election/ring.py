@@ -1,10 +1,10 @@
-from numpy import random
 import simpy
 
-from msg.ring_msg import ElectionRingMsg
+from msg.ring_msg import ElectionRingMsg, RingIds
 from node.ring_node import RingNode
+from node.successors import SuccessorIndex
 from election.simulation import Simulation
-from utils import max_delay
+from utils import max_delay, randint
 
 # this class represents a ring algorithm simulation
 #   attributes:
@@ -19,6 +19,7 @@ from utils import max_delay
 #       timeout - quantile of the exponential distribution for delays
 #       debug_mode - if true the nodes and this class will print debug messages
 #       rng - random number generator
+#       successors - SuccessorIndex of the active nodes
 class RingSimulation(Simulation):
     
     def __init__(self,
@@ -47,7 +48,8 @@ class RingSimulation(Simulation):
         self.timeout = max_delay(timeout, delay_mean)   # set max timeout
         self.stats_id = 0
         self.debug_mode = debug_mode
-        self.rng = rng          # debug
+        self.rng = rng
+        self.successors = SuccessorIndex(n_nodes)
 
         for i in range(n_nodes):    # create nodes with IDs i = 0, 1, 2, ...
             self.nodes.append(
@@ -61,7 +63,8 @@ class RingSimulation(Simulation):
                     self.timeout,
                     self.rng,
                     self.stats_id,
-                    sim_stats
+                    sim_stats,
+                    self.successors
                 )
             )
 
@@ -94,7 +97,7 @@ class RingSimulation(Simulation):
         initiators = []
         i=0
         while i<self.n_initiators:  # select n random initiators
-            id=random.randint(len(self.nodes)-1)
+            id=randint(len(self.nodes)-1, self.rng)
             if id not in initiators:
                 initiators.append(id)
                 i+=1
@@ -103,7 +106,11 @@ class RingSimulation(Simulation):
             initiator = self.nodes[id]
             initiator.initiate()
             # send election to the initiator
-            election_msg = ElectionRingMsg(initiator.id,-1,[])      
+            election_msg = ElectionRingMsg(
+                initiator.id,
+                -1,
+                RingIds(len(self.nodes), initiator.id)
+            )
             yield initiator.queue.put(election_msg)
          
         # wait for finish_event to be triggered (election completed)
@@ -114,6 +121,19 @@ class RingSimulation(Simulation):
         # stop all processes
         raise simpy.core.StopSimulation("Election finished")    
 
+    # method to prepare the next replication reusing the nodes, their queues and
+    # processes; the environment must have been reset
+    def reset(self):
+        self.finish_event = self.env.event()
+        self.sim_stats.clear_delays(self.stats_id)
+        self.stats_id += 1
+        self.successors.reset()
+
+        for node in self.nodes:
+            node.reset(self.stats_id)
+
+        self.add_triggers()
+
     # method to clean and update the simulation environment
     #    params:
     #        env - new simpy environment 
@@ -122,6 +142,7 @@ class RingSimulation(Simulation):
         self.finish_event = self.env.event()
         self.sim_stats.clear_delays(self.stats_id)
         self.stats_id += 1
+        self.successors.reset()
         
         for i in range(self.n_nodes):
             self.nodes.append(
@@ -135,7 +156,8 @@ class RingSimulation(Simulation):
                     self.timeout,
                     self.rng,
                     self.stats_id,
-                    self.sim_stats
+                    self.sim_stats,
+                    self.successors
                 )
             )
             
@@ -1,8 +1,28 @@
+import itertools
+import simpy
+
+# this class represents a simpy environment that can be reset in place and
+# reused by the next replication (the nodes keep their queues and processes
+# bound to it)
+class ReusableEnvironment(simpy.Environment):
+
+    # method to reset the environment: time 0 and no scheduled events (the
+    # processes still waiting for them are discarded). It writes private
+    # attributes of simpy.Environment, so it depends on the SimPy release: it
+    # is written for SimPy 4.1 (see the README), which is why the reuse is
+    # off by default (REUSE in experiment/runner.py)
+    def reset(self):
+        self._now = 0
+        self._queue.clear()
+        self._eid = itertools.count()
+        self._active_proc = None
+
 # this class represents a simulation of an election
 #   attributes:
 #       env - simpy environment
 #       n_nodes - network nodes
 #       delay_mean - exponential mean for delays
+#       rng - random number generator (if None, the global ones are used)
 class Simulation:
 
     def __init__(self, env, n_nodes, delay_mean):
@@ -11,6 +31,7 @@ class Simulation:
         self.finish_event = self.env.event()
         self.n_nodes = n_nodes
         self.delay_mean = delay_mean
+        self.rng = None
 
     # method to add event trigger to the nodes
     def add_triggers(self):
@@ -18,6 +39,15 @@ class Simulation:
             # add reference to 'finish_event' so that nodes can trigger it
             self.nodes[i].finish = self.finish_event
 
+    # method to set the random number generator used by the simulation and by
+    # its nodes (e.g. the stream of a replication)
+    #   params:
+    #       rng - random number generator
+    def set_rng(self, rng):
+        self.rng = rng
+        for i in range(len(self.nodes)):
+            self.nodes[i].rng = rng
+
     # method to clean the class and to set a new environment with a specified 
     # number of nodes
     #    params:
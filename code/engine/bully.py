@@ -0,0 +1,358 @@
+import numpy as np
+
+from engine.kernel import EventLoop
+from engine.network import NetworkState, NodeViews
+from node.agreement import AgreementTracker
+from utils import delay, max_delay, randint, uniform
+
+# message kinds; messages are pairs (kind, sender)
+ELECTION = 0
+OK = 1
+COORDINATOR = 2
+ACK = 3
+
+# fields of the state of the nodes: dtype and initial value
+BULLY_FIELDS = {
+    "crashed": (np.bool_, False),
+    "elected": (np.int64, -1),
+    "el_in_progress": (np.bool_, False),
+    "blocked": (np.bool_, False),
+    "max_active_id": (np.int64, -1),
+    "phase": (np.int8, ELECTION),
+    "waiting": (np.bool_, False),
+    "round": (np.int64, 0)
+}
+
+# this class represents a node of the bully algorithm for the event kernel; it
+# performs the same logic of BullyNode with callbacks: the waits of the
+# election are explicit timers and the retransmission loop is a sequence of
+# rounds. The node is a view of its state in the NetworkState of the
+# simulation (the missing acks are kept by the simulation)
+#   attributes:
+#       sim - KernelBullySimulation of the node
+#       id - id of the node
+#       state - NetworkState of the simulation
+#       crashed - if true, the node crashed
+#       elected - id of the new coordinator
+#       el_in_progress - true if the node is already participating in the
+#                        election
+#       blocked - true if the node received at least an OK message
+#       max_active_id - id of greatest node that gave OK
+#       phase - kind of the message retransmitted (unreliable)
+#       waiting - true if the node is waiting for the acks of a round
+#       round - counter of the retransmission rounds
+#       missing_ack - set of nodes ids for which the node is waiting an ack
+class KernelBullyNode:
+
+    __slots__ = ("sim", "id", "state")
+
+    def __init__(self, sim, id):
+        self.sim = sim
+        self.id = id
+        self.state = sim.state
+
+    @property
+    def crashed(self):
+        return self.state.crashed[self.id]
+
+    @property
+    def elected(self):
+        return self.state.elected[self.id]
+
+    @property
+    def el_in_progress(self):
+        return self.state.el_in_progress[self.id]
+
+    @property
+    def blocked(self):
+        return self.state.blocked[self.id]
+
+    @property
+    def max_active_id(self):
+        return self.state.max_active_id[self.id]
+
+    @property
+    def phase(self):
+        return self.state.phase[self.id]
+
+    @property
+    def waiting(self):
+        return self.state.waiting[self.id]
+
+    @property
+    def round(self):
+        return self.state.round[self.id]
+
+    @property
+    def missing_ack(self):
+        return self.sim.missing_ack.get(self.id, set())
+
+    # method to make the node crash
+    def crash(self):
+        state = self.state
+        if not state.crashed[self.id]:
+            self.sim.agreement.remove(state.elected[self.id])
+        state.crashed[self.id] = True
+
+    # method to make a crashed node active again
+    def recover(self):
+        state = self.state
+        if state.crashed[self.id]:
+            self.sim.agreement.add(state.elected[self.id])
+        state.crashed[self.id] = False
+
+    # method to set the coordinator elected by the node
+    #   params:
+    #       elected - id of the coordinator
+    def set_elected(self, elected):
+        state = self.state
+        if not state.crashed[self.id]:
+            self.sim.agreement.change(state.elected[self.id], elected)
+        state.elected[self.id] = elected
+
+    # method to send a message; with unreliable links it can be lost
+    #   params:
+    #       kind - message kind
+    #       dest_id - destination node id
+    def send(self, kind, dest_id):
+        sim = self.sim
+        if self.state.crashed[dest_id]:
+            return
+        dest = sim.nodes[dest_id]
+        msg_delay = sim.msg_delay(kind, self.id, dest_id)
+        sim.sim_stats.add_msg(sim.stats_id, msg_delay)
+        if not sim.unreliable:
+            sim.loop.schedule(msg_delay, dest.reliable_receive, kind, self.id)
+        elif uniform(sim.rng) > sim.loss_rate:  # is packet lost?
+            sim.loop.schedule(msg_delay, dest.unreliable_receive, kind, self.id)
+
+    # method to receive messages with reliable links
+    #   params:
+    #       kind - message kind
+    #       sender - message sender
+    def reliable_receive(self, kind, sender):
+        state = self.state
+        id = self.id
+        if kind == ELECTION:
+            if id > sender:
+                if sender != -1:
+                    self.send(OK, sender)
+                if not state.el_in_progress[id]:
+                    state.el_in_progress[id] = True
+                    for i in range(id + 1, len(self.sim.nodes)):
+                        self.send(ELECTION, i)
+                    self.sim.loop.schedule(
+                        2 * self.sim.max_wait, self.election_timeout
+                    )
+
+        elif kind == OK:
+            state.blocked[id] = True
+
+        elif kind == COORDINATOR:
+            self.set_elected(sender)
+            state.el_in_progress[id] = False
+            is_finished, electee = self.sim.finished()
+            if is_finished:
+                self.sim.finish(electee)
+
+    # method called when the wait of an election ends (reliable links): if
+    # no OK was received the node is the new coordinator
+    def election_timeout(self):
+        if not self.state.blocked[self.id]:
+            for i in range(len(self.sim.nodes)):
+                self.send(COORDINATOR, i)
+        self.state.el_in_progress[self.id] = False
+
+    # method to receive messages with unreliable links
+    #   params:
+    #       kind - message kind
+    #       sender - message sender
+    def unreliable_receive(self, kind, sender):
+        state = self.state
+        id = self.id
+        max_active_id = max(state.max_active_id[id], sender)
+        state.max_active_id[id] = max_active_id
+        if kind == ELECTION:
+            if id > sender:
+                if sender != -1:
+                    self.send(OK, sender)
+                if (not state.el_in_progress[id]) and max_active_id <= id:
+                    state.el_in_progress[id] = True
+                    self.sim.missing_ack[id] = set(
+                        range(id + 1, len(self.sim.nodes) - 1)
+                    )
+                    state.phase[id] = ELECTION
+                    self.retransmit()
+            else:
+                self.send(ACK, sender)
+
+        elif kind == OK:
+            self.update_ack_list(sender)
+            state.blocked[id] = True
+
+        elif kind == ACK:
+            self.update_ack_list(sender)
+
+        elif kind == COORDINATOR:
+            self.send(ACK, sender)
+            self.set_elected(sender)
+            state.el_in_progress[id] = False
+
+    # method to udpate ack list and end the round when all answers arrived (at
+    # the same time, but after the handling of the current message)
+    #   params:
+    #       sender - message sender
+    def update_ack_list(self, sender):
+        missing_ack = self.sim.missing_ack.get(self.id)
+        if missing_ack is None:     # the node did not send messages
+            return
+        missing_ack.discard(sender)
+        if len(missing_ack) == 0 and self.state.waiting[self.id]:
+            self.state.waiting[self.id] = False
+            self.sim.loop.schedule(0.0, self.retransmit)
+
+    # method called when the timeout of a retransmission round expires
+    #   params:
+    #       round - round of the timeout
+    def round_timeout(self, round):
+        state = self.state
+        if state.waiting[self.id] and round == state.round[self.id]:
+            state.waiting[self.id] = False
+            self.retransmit()
+
+    # method to perform a retransmission round: the message is sent to the
+    # nodes that did not answer yet (a snapshot, in order of id); when there
+    # are no missing answers (or an OK was received) the phase ends
+    def retransmit(self):
+        state = self.state
+        id = self.id
+        missing_ack = self.sim.missing_ack[id]
+        if len(missing_ack) != 0 and not state.blocked[id]:
+            for n_id in sorted(missing_ack):
+                self.send(state.phase[id], n_id)
+            state.round[id] += 1
+            state.waiting[id] = True
+            self.sim.loop.schedule(
+                2 * self.sim.max_wait, self.round_timeout, state.round[id]
+            )
+
+        elif state.phase[id] == ELECTION:
+            if not state.blocked[id]:
+                # no OK received: this node is the one with highest id
+                missing_ack = set(range(0, len(self.sim.nodes) - 1))
+                missing_ack.discard(id)
+                self.sim.missing_ack[id] = missing_ack
+                state.phase[id] = COORDINATOR
+                self.retransmit()
+
+        else:   # all the nodes acknowledged the new coordinator
+            self.set_elected(id)
+            self.sim.finish(id)
+
+# this class represents a bully algorithm simulation on the event kernel; it
+# produces the same statistics of BullySimulation
+#   attributes:
+#       loop - EventLoop
+#       nodes - nodes in the network (NodeViews if compact, otherwise a list
+#       of the same views)
+#       n_nodes - number of nodes in the net
+#       delay_mean - exponential mean for setting propagation delays
+#       max_wait - max delay considered by the nodes
+#       sim_stats - SimStats class representing the simulation
+#       n_initiators - number of initiators
+#       loss_rate - packets loss rate
+#       unreliable - true if loss_rate is not 0
+#       rng - random number generator
+#       stats_id - id of the current execution in the SimStats
+#       agreement - AgreementTracker of the election
+#       state - NetworkState of the nodes
+#       missing_ack - dictionary, set of nodes ids for which a node is waiting
+#       an ack (only the nodes that sent messages to be acked)
+class KernelBullySimulation:
+
+    def __init__(
+        self,
+        n_nodes,
+        delay_mean,
+        delay_q,
+        sim_stats,
+        n_initiators = 1,
+        loss_rate = 0,
+        compact = False
+    ):
+        self.loop = EventLoop()
+        self.n_nodes = n_nodes
+        self.delay_mean = delay_mean
+        self.max_wait = max_delay(delay_q, delay_mean)
+        self.sim_stats = sim_stats
+        self.n_initiators = n_initiators
+        self.loss_rate = loss_rate
+        self.unreliable = loss_rate != 0
+        self.rng = None
+        self.stats_id = 0
+        self.agreement = AgreementTracker(n_nodes)
+        self.state = NetworkState(n_nodes, BULLY_FIELDS)
+        self.missing_ack = {}
+        if compact:
+            self.nodes = NodeViews(self, KernelBullyNode, n_nodes)
+        else:
+            self.nodes = [KernelBullyNode(self, i) for i in range(n_nodes)]
+
+    # method to set the random number generator of the simulation
+    #   params:
+    #       rng - random number generator
+    def set_rng(self, rng):
+        self.rng = rng
+
+    # method to perform an election; starting conditions: coordinator crashed
+    # and n initiators
+    def run(self):
+        self.loop.reset()
+        self.agreement.reset()
+        self.state.reset()
+        self.missing_ack.clear()
+
+        self.nodes[-1].crash()  # coordinator (crashed)
+
+        for init in self.choose_initiators():   # all initiators start election
+            if self.unreliable:
+                self.loop.schedule(0.0, init.unreliable_receive, ELECTION, -1)
+            else:
+                self.loop.schedule(0.0, init.reliable_receive, ELECTION, -1)
+        self.loop.run()
+
+        self.sim_stats.clear_delays(self.stats_id)
+        self.stats_id += 1
+
+    # method to select the initiators among the active nodes
+    def choose_initiators(self):
+        initiators = []
+        for i in range(self.n_initiators):
+            id = randint(self.n_nodes, self.rng)
+            while self.state.crashed[id] or id in initiators:
+                id = randint(self.n_nodes, self.rng)
+            initiators.append(id)
+
+        return [self.nodes[id] for id in initiators]
+
+    # method to draw the delay of a message
+    #   params:
+    #       kind - message kind
+    #       sender - id of the sender
+    #       dest_id - id of the destination
+    def msg_delay(self, kind, sender, dest_id):
+        return delay(self.delay_mean, self.rng)
+
+    # method that returns [True, electee] if all the active nodes elected a
+    # coordinator (electee is -1 if they disagree), [False, -1] otherwise
+    def finished(self):
+        return self.agreement.finished()
+
+    # method called when the election is completed
+    #   params:
+    #       result - elected node (-1 if the nodes disagree)
+    def finish(self, result):
+        if result < 0:
+            self.sim_stats.add_wrong_sim()
+        self.sim_stats.add_runtime(self.loop.now)
+        self.loop.stop()
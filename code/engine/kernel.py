@@ -0,0 +1,58 @@
+import heapq
+import itertools
+
+# this class represents a minimal discrete-event kernel: events are entries
+# [time, sequence number, callback, args] of a binary heap, executed in time
+# order (ties in scheduling order) by calling callback(*args). Unlike SimPy
+# there are no processes or generators: nodes react to events with callbacks
+# and use explicit timers, which can be cancelled
+#   attributes:
+#       now - current simulation time
+#       queue - heap of the scheduled events
+#       counter - sequence numbers of the events
+#       running - false when the simulation has to stop
+class EventLoop:
+
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []
+        self.counter = itertools.count()
+        self.running = False
+
+    # method to schedule a callback
+    #   params:
+    #       delay - time from now of the event
+    #       callback - function to call
+    #       args - arguments of the callback
+    def schedule(self, delay, callback, *args):
+        event = [self.now + delay, next(self.counter), callback, args]
+        heapq.heappush(self.queue, event)
+        return event
+
+    # method to cancel a scheduled event (e.g. a timer)
+    #   params:
+    #       event - event returned by schedule
+    def cancel(self, event):
+        event[2] = None
+
+    # method to stop the simulation after the current event
+    def stop(self):
+        self.running = False
+
+    # method to execute the events until the queue is empty or stop is called
+    def run(self):
+        queue = self.queue
+        pop = heapq.heappop
+        self.running = True
+        while self.running and queue:
+            time, _, callback, args = pop(queue)
+            if callback is None:    # cancelled
+                continue
+            self.now = time
+            callback(*args)
+
+    # method to reset the kernel for a new replication
+    def reset(self):
+        self.now = 0.0
+        self.queue.clear()
+        self.running = False
@@ -0,0 +1,60 @@
+import numpy as np
+
+# this class represents the state of the nodes of a network as a structure of
+# arrays: every field of the nodes is a NumPy array indexed by node id, so the
+# state of a network takes a few bytes per node and it is reset by filling the
+# arrays. The single nodes are read and written through a memoryview of each
+# array (an attribute named as the field), whose items are Python values
+#   attributes:
+#       n_nodes - number of nodes
+#       fields - dictionary, dtype and initial value of each field
+#       arrays - dictionary, NumPy array of each field
+class NetworkState:
+
+    def __init__(self, n_nodes, fields):
+        self.n_nodes = n_nodes
+        self.fields = fields
+        self.arrays = {}
+        for name, (dtype, value) in fields.items():
+            self.arrays[name] = np.full(n_nodes, value, dtype=dtype)
+            setattr(self, name, memoryview(self.arrays[name]))
+
+    # method to set every field of every node to its initial value
+    def reset(self):
+        for name, (dtype, value) in self.fields.items():
+            self.arrays[name].fill(value)
+
+    # method to return the bytes taken by the arrays
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+# this class represents the nodes of a network whose state is a NetworkState:
+# the nodes are views (node id and simulation) created when accessed, so the
+# network takes no memory per node besides its state
+#   attributes:
+#       sim - simulation of the nodes
+#       node_class - class of the views, created as node_class(sim, id)
+#       n_nodes - number of nodes
+class NodeViews:
+
+    __slots__ = ("sim", "node_class", "n_nodes")
+
+    def __init__(self, sim, node_class, n_nodes):
+        self.sim = sim
+        self.node_class = node_class
+        self.n_nodes = n_nodes
+
+    def __len__(self):
+        return self.n_nodes
+
+    def __getitem__(self, id):
+        if id < 0:
+            id += self.n_nodes
+        if not 0 <= id < self.n_nodes:
+            raise IndexError("node id out of range")
+        return self.node_class(self.sim, id)
+
+    def __iter__(self):
+        for id in range(self.n_nodes):
+            yield self.node_class(self.sim, id)
@@ -0,0 +1,239 @@
+import numpy as np
+
+from engine.kernel import EventLoop
+from engine.network import NetworkState, NodeViews
+from msg.ring_msg import RingIds
+from node.successors import SuccessorIndex
+from utils import delay, max_delay, randint, uniform
+
+# message kinds; messages are tuples (kind, transaction_id, sender, a, b, tx):
+# ELECTION has a = ids (RingIds), COORDINATOR a = initiator and b = elected,
+# ACKs have tx = transmission acknowledged. tx is the transmission record
+# [timer] of the message: its timer is the retransmission timeout (unreliable
+# links)
+ELECTION = 0
+COORDINATOR = 1
+ACK_ELECTION = 2
+ACK_COORDINATOR = 3
+
+# fields of the state of the nodes: dtype and initial value
+RING_FIELDS = {
+    "crashed": (np.bool_, False),
+    "elected": (np.int64, -1),
+    "initiator": (np.bool_, False)
+}
+
+# this class represents a node of the ring algorithm for the event kernel; it
+# performs the same logic of RingNode with callbacks. The node is a view of
+# its state in the NetworkState of the simulation
+#   attributes:
+#       sim - KernelRingSimulation of the node
+#       id - id of the node
+#       state - NetworkState of the simulation
+#       crashed - if true, the node crashed
+#       elected - id of the new coordinator
+#       initiator - if true, the node initiated an election
+class KernelRingNode:
+
+    __slots__ = ("sim", "id", "state")
+
+    def __init__(self, sim, id):
+        self.sim = sim
+        self.id = id
+        self.state = sim.state
+
+    @property
+    def crashed(self):
+        return self.state.crashed[self.id]
+
+    @property
+    def elected(self):
+        return self.state.elected[self.id]
+
+    @property
+    def initiator(self):
+        return self.state.initiator[self.id]
+
+    # method to send an election or coordinator message to the next active
+    # neighbor, it will be retransmitted until acked with unreliable links
+    #   params:
+    #       kind - message kind
+    #       tid - transaction id
+    #       a, b - message payload
+    def send(self, kind, tid, a, b):
+        sim = self.sim
+        msg = (kind, tid, self.id, a, b, [None])
+        msg_delay = delay(sim.delay_mean, sim.rng)
+        sim.sim_stats.add_msg(sim.stats_id, msg_delay)
+        sim.loop.schedule(msg_delay, self.deliver, msg)
+
+    # method to deliver a message to the next active neighbor
+    #   params:
+    #       msg - message
+    def deliver(self, msg):
+        sim = self.sim
+        if sim.unreliable:  # wait for the ACK or the timeout
+            msg[5][0] = sim.loop.schedule(sim.timeout, self.expire, msg)
+        sim.nodes[self.find_next()].receive(msg)
+
+    # method called when the timeout of a message expires: the message is sent
+    # again
+    #   params:
+    #       msg - message
+    def expire(self, msg):
+        msg[5][0] = None
+        self.send(msg[0], msg[1], msg[3], msg[4])
+
+    # method to send an ack
+    #   params:
+    #       kind - ack kind
+    #       tid - transaction id
+    #       tx - transmission acknowledged
+    #       receiver - id of the node that needs to receive the ack
+    def send_ack(self, kind, tid, tx, receiver):
+        sim = self.sim
+        msg_delay = delay(sim.delay_mean, sim.rng)
+        sim.sim_stats.add_msg(sim.stats_id, msg_delay)
+        sim.loop.schedule(
+            msg_delay,
+            sim.nodes[receiver].receive,
+            (kind, tid, self.id, None, None, tx)
+        )
+
+    # method to manage an incoming message
+    #   params:
+    #       msg - message
+    def receive(self, msg):
+        sim = self.sim
+        if self.state.crashed[self.id]:
+            return
+        kind, tid, sender, a, b, tx = msg
+
+        # unreliable links packet losses
+        if sim.unreliable and uniform(sim.rng) < sim.loss and sender != -1:
+            return
+
+        if kind == ELECTION:
+            if self.id in a:    # the election message performed a cycle
+                leader = a.max_id
+                self.state.elected[self.id] = leader
+                self.send(COORDINATOR, tid, self.id, leader)
+            else:
+                a.add(self.id)
+                self.send(ELECTION, tid, a, None)
+
+            if sim.unreliable and sender != -1:
+                self.send_ack(ACK_ELECTION, tid, tx, sender)
+
+        elif kind == COORDINATOR:
+            if self.id != a:
+                if sim.unreliable:
+                    self.send_ack(ACK_COORDINATOR, tid, tx, sender)
+                self.state.elected[self.id] = b
+                self.send(COORDINATOR, tid, a, b)
+            else:   # a coordinator cycle is completed
+                sim.finish()
+
+        elif tx[0] is not None:     # ACK, stop the retransmission timer
+            sim.loop.cancel(tx[0])
+            tx[0] = None
+
+    # method to make the node crash
+    def crash(self):
+        self.state.crashed[self.id] = True
+        self.sim.successors.crash(self.id)
+
+    # method to make a crashed node active again
+    def recover(self):
+        self.state.crashed[self.id] = False
+        self.sim.successors.recover(self.id)
+
+    # find the next active neighbor
+    def find_next(self):
+        return self.sim.successors.next(self.id)
+
+# this class represents a ring algorithm simulation on the event kernel; it
+# produces the same statistics of RingSimulation
+#   attributes:
+#       loop - EventLoop
+#       nodes - nodes in the network (NodeViews if compact, otherwise a list
+#       of the same views)
+#       n_nodes - number of nodes in the net
+#       delay_mean - exponential mean for setting propagation delays
+#       sim_stats - SimStats class representing the simulation
+#       n_initiators - number of initiators
+#       unreliable - if true, the algorithm assumes unreliable links
+#       loss - loss rate of packets (unreliable)
+#       timeout - max timeout to wait (unreliable)
+#       rng - random number generator
+#       stats_id - id of the current execution in the SimStats
+#       successors - SuccessorIndex of the active nodes
+#       state - NetworkState of the nodes
+class KernelRingSimulation:
+
+    def __init__(
+        self,
+        n_nodes,
+        delay_mean,
+        sim_stats,
+        n_initiators = 1,
+        unreliable = False,
+        loss = 0.0,
+        timeout = 0.0,
+        compact = False
+    ):
+        self.loop = EventLoop()
+        self.n_nodes = n_nodes
+        self.delay_mean = delay_mean
+        self.sim_stats = sim_stats
+        self.n_initiators = n_initiators
+        self.unreliable = unreliable
+        self.loss = loss
+        self.timeout = max_delay(timeout, delay_mean)
+        self.rng = None
+        self.stats_id = 0
+        self.successors = SuccessorIndex(n_nodes)
+        self.state = NetworkState(n_nodes, RING_FIELDS)
+        if compact:
+            self.nodes = NodeViews(self, KernelRingNode, n_nodes)
+        else:
+            self.nodes = [KernelRingNode(self, i) for i in range(n_nodes)]
+
+    # method to set the random number generator of the simulation
+    #   params:
+    #       rng - random number generator
+    def set_rng(self, rng):
+        self.rng = rng
+
+    # method to perform an election; starting conditions: coordinator crashed
+    # and n initiators
+    def run(self):
+        self.loop.reset()
+        self.successors.reset()
+        self.state.reset()
+
+        # the coordinator crashes (the one with the higher ID)
+        self.nodes[-1].crash()
+
+        initiators = []
+        while len(initiators) < self.n_initiators:
+            id = randint(self.n_nodes - 1, self.rng)
+            if id not in initiators:
+                initiators.append(id)
+
+        for id in initiators:   # start election
+            self.state.initiator[id] = True
+            self.loop.schedule(
+                0.0,
+                self.nodes[id].receive,
+                (ELECTION, id, -1, RingIds(self.n_nodes, id), None, [None])
+            )
+        self.loop.run()
+
+        self.sim_stats.clear_delays(self.stats_id)
+        self.stats_id += 1
+
+    # method called when the election is completed
+    def finish(self):
+        self.sim_stats.add_runtime(self.loop.now)
+        self.loop.stop()
@@ -0,0 +1,313 @@
+import numpy as np
+
+from engine.bully import COORDINATOR, ELECTION, OK, KernelBullySimulation
+from utils import max_delay
+
+# number of replications generated together; the random numbers of the block b
+# come from the stream spawned from the seed with key (VECTOR_KEY, b), so the
+# replications do not depend on how they are split in chunks
+BLOCK_SIZE = 1000
+# tag of the spawn keys of the vector engine (the streams of the event
+# engines are the children of the seed itself)
+VECTOR_KEY = 2**32 - 1
+# maximum number of random numbers per replication times replications computed
+# together: the replications of a block are computed in chunks of rows, so the
+# memory does not grow with the block (with large networks a chunk can be a
+# single replication)
+MAX_VARIATES = 2**20
+
+# This function generates the uniform random numbers of the replications
+# [lo, hi) of a block: the first axis is the replication; with antithetic pairs
+# the odd replications use 1 - u of the previous one. The numbers of the other
+# replications of the block are skipped (the generator is advanced past the
+# whole block), so a replication gets the same numbers whatever rows are
+# generated together
+#   params:
+#       rng - random number generator of the block
+#       shape - shape of the numbers of a single replication
+#       antithetic - if true, the replications are antithetic pairs
+#       lo - first replication
+#       hi - end of the replications (excluded)
+def block_uniforms(rng, shape, antithetic = False, lo = 0, hi = BLOCK_SIZE):
+    size = int(np.prod(shape))
+    if not antithetic:
+        rng.bit_generator.advance(lo * size)
+        u = rng.random((hi - lo,) + shape)
+        rng.bit_generator.advance((BLOCK_SIZE - hi) * size)
+        return u
+    first, last = lo // 2, -(-hi // 2)     # pairs of the replications
+    rng.bit_generator.advance(first * size)
+    u = rng.random((last - first,) + shape)
+    rng.bit_generator.advance((BLOCK_SIZE // 2 - last) * size)
+    u = np.stack((u, 1.0 - u), axis=1).reshape((2 * (last - first),) + shape)
+    return u[lo - 2 * first:hi - 2 * first]
+
+# This function returns the chunks of rows [lo, hi) of the replications of a
+# block in [first, last), each with at most MAX_VARIATES random numbers
+#   params:
+#       block - index of the block
+#       first - index of the first replication
+#       last - end of the replications (excluded)
+#       variates - random numbers of a replication
+def block_chunks(block, first, last, variates):
+    start = block * BLOCK_SIZE
+    lo = max(first, start) - start
+    hi = min(last, start + BLOCK_SIZE) - start
+    rows = max(1, MAX_VARIATES // variates)
+    return [(r, min(r + rows, hi)) for r in range(lo, hi, rows)]
+
+# This function returns the random number generator of a block (or of one of
+# its replications)
+#   params:
+#       seed - seed of the configuration (if None, a random generator)
+#       key - index of the block (and of the replication)
+def block_rng(seed, *key):
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(VECTOR_KEY,) + key)
+    )
+
+# This function computes a block of reliable Ring replications. Every
+# initiator starts an independent cycle of n - 1 ELECTION and n - 1
+# COORDINATOR hops (the crashed coordinator is skipped), so the turnaround time
+# is the minimum over the initiators of the sum of their 2(n - 1) exponential
+# delays; the messages are the ones sent before it, since the simulation
+# stops when the first cycle is completed
+#   params:
+#       rng - random number generator of the block
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       antithetic - if true, the replications are antithetic pairs
+#       lo - first replication of the block
+#       hi - end of the replications (excluded)
+def ring_block(
+    rng,
+    n_nodes,
+    delay,
+    initiators,
+    antithetic = False,
+    lo = 0,
+    hi = BLOCK_SIZE
+):
+    hops = 2 * (n_nodes - 1)
+    u = block_uniforms(rng, (initiators, hops), antithetic, lo, hi)
+    arrivals = np.cumsum(-delay * np.log1p(-u), axis=2)
+    runtimes = arrivals[:, :, -1].min(axis=1)
+
+    # the hop k of a cycle is sent when the hop k - 1 arrives
+    sends = arrivals[:, :, :-1] <= runtimes[:, None, None]
+    msgs = initiators + np.count_nonzero(sends, axis=(1, 2))
+
+    return runtimes, msgs
+
+# This function performs n_sim replications of the reliable Ring algorithm as
+# NumPy arrays and records them in the given SimStats (the delays of the
+# single replications are not stored)
+#   params:
+#       stats - SimStats of the Ring algorithm simulations
+#       n_sim - number of replications
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       first - index of the first replication
+def simulate_ring_vector(stats, n_sim, n_nodes, delay, initiators, first = 0):
+    last = first + n_sim
+    variates = initiators * 2 * (n_nodes - 1)
+    for block in range(first // BLOCK_SIZE, -(-last // BLOCK_SIZE)):
+        for lo, hi in block_chunks(block, first, last, variates):
+            runtimes, msgs = ring_block(
+                block_rng(stats.seed, block),
+                n_nodes,
+                delay,
+                initiators,
+                stats.antithetic,
+                lo,
+                hi
+            )
+            stats.add_replications(runtimes, msgs)
+
+# This function computes a block of reliable Bully replications assuming a
+# single election wave: every active node j starts its election (ELECTION to
+# the higher nodes, timer of 2 * max_wait) when it receives the first
+# ELECTION, at start_j = min over the lower starters s of start_s + el[s, j]
+# (0 for the initiators), and it answers OK to every ELECTION. A node
+# broadcasts COORDINATOR when its timer expires if no OK came back, i.e. if all
+# its ELECTION + OK round trips are longer than the wait. The election ends
+# when every active node received a COORDINATOR; it is wrong if their last
+# COORDINATORs come from different nodes. The wave assumption fails if an
+# ELECTION reaches a node after the end of its election (timer or COORDINATOR
+# received) and before the end: the node would start a new election, so these
+# replications are flagged as irregular
+#   params:
+#       rng - random number generator of the block
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       max_wait - max delay considered by the nodes
+#       initiators - number of initiators
+#       antithetic - if true, the replications are antithetic pairs
+#       lo - first replication of the block
+#       hi - end of the replications (excluded)
+def bully_block(
+    rng,
+    n_nodes,
+    delay,
+    max_wait,
+    initiators,
+    antithetic = False,
+    lo = 0,
+    hi = BLOCK_SIZE
+):
+    m = n_nodes - 1     # active nodes, the coordinator n - 1 crashed
+    wait = 2 * max_wait
+    order = np.argsort(block_uniforms(rng, (m,), antithetic, lo, hi), axis=1)
+    init = np.zeros((hi - lo, m), dtype=bool)
+    np.put_along_axis(init, order[:, :initiators], True, axis=1)
+    # delays of ELECTION s -> j, of its OK j -> s and of COORDINATOR b -> i
+    u = block_uniforms(rng, (3, m, m), antithetic, lo, hi)
+    el, ok, coord = np.moveaxis(-delay * np.log1p(-u), 1, 0)
+    higher = np.triu(np.ones((m, m), dtype=bool), 1)   # pairs s < j
+
+    start = np.where(init, 0.0, np.inf)
+    for j in range(1, m):
+        first = (start[:, :j] + el[:, :j, j]).min(axis=1)
+        start[:, j] = np.minimum(start[:, j], first)
+    arrivals = np.where(higher, start[:, :, None] + el, np.inf)
+
+    blocked = np.any(higher & (el + ok < wait), axis=2)
+    bcast = np.where(np.isfinite(start) & ~blocked, start + wait, np.inf)
+    recv = bcast[:, :, None] + coord    # COORDINATOR b -> i
+    runtimes = recv.min(axis=1).max(axis=1)
+    end = runtimes[:, None]
+
+    last = np.where(recv <= end[:, :, None], recv, -np.inf).argmax(axis=1)
+    wrong = np.any(last != last[:, :1], axis=1)
+
+    msgs = (
+        np.where(start <= end, m - 1 - np.arange(m), 0).sum(axis=1)
+        + np.count_nonzero(arrivals <= end[:, :, None], axis=(1, 2))
+        + m * np.count_nonzero(bcast <= end, axis=1)
+    )
+
+    after = np.where(recv > start[:, None, :], recv, np.inf).min(axis=1)
+    reset = np.minimum(start + wait, after)
+    irregular = np.any(
+        (arrivals > reset[:, None, :]) & (arrivals < end[:, :, None]),
+        axis=(1, 2)
+    )
+
+    return runtimes, msgs, wrong, irregular, (init, el, ok, coord)
+
+# this class collects the result of one replication of the event kernel (it
+# has the recording methods of SimStats used by the kernel)
+#   attributes:
+#       runtime - turnaround time
+#       msgs - number of messages
+#       wrong - true if the nodes elected different coordinators
+class ReplicationRecord:
+
+    def __init__(self):
+        self.runtime = 0.0
+        self.msgs = 0
+        self.wrong = False
+
+    def add_msg(self, id, delay):
+        self.msgs += 1
+
+    def add_runtime(self, t_time):
+        self.runtime = t_time
+
+    def add_wrong_sim(self):
+        self.wrong = True
+
+    def clear_delays(self, sim_id = -1):
+        pass
+
+# this class represents a reliable Bully simulation on the event kernel that
+# replays a replication of a block: the initiators and the delays of the first
+# ELECTION, OK and COORDINATOR message of every pair of nodes are the ones of
+# the block, the delays of the further messages (new elections) are drawn from
+# the generator of the replication
+#   attributes:
+#       init - boolean array of the initiators
+#       tables - delays of the ELECTION, OK and COORDINATOR messages
+#       used - set of the (kind, sender, destination) already sent
+class ReplayBullySimulation(KernelBullySimulation):
+
+    def __init__(self, n_nodes, delay_mean, max_wait, n_initiators):
+        super().__init__(n_nodes, delay_mean, 0.0, ReplicationRecord(),
+                         n_initiators)
+        self.max_wait = max_wait
+        self.init = None
+        self.tables = None
+        self.used = set()
+
+    # method to replay a replication
+    #   params:
+    #       init - boolean array of the initiators
+    #       el, ok, coord - delays of the first messages of every pair
+    def replay(self, init, el, ok, coord):
+        self.init = init
+        self.tables = {ELECTION: el, OK: ok.T, COORDINATOR: coord}
+        self.used.clear()
+        self.sim_stats = ReplicationRecord()
+        self.run()
+
+        return self.sim_stats
+
+    def choose_initiators(self):
+        return [self.nodes[i] for i in np.flatnonzero(self.init)]
+
+    def msg_delay(self, kind, sender, dest_id):
+        key = (kind, sender, dest_id)
+        if key in self.used:
+            return super().msg_delay(kind, sender, dest_id)
+        self.used.add(key)
+        return self.tables[kind][sender, dest_id]
+
+# This function performs n_sim replications of the reliable Bully algorithm as
+# NumPy arrays and records them in the given SimStats (the delays of the
+# single replications are not stored); the irregular replications (more than
+# one election wave) are replayed on the event kernel with the same delays
+#   params:
+#       stats - SimStats of the Bully algorithm simulations
+#       n_sim - number of replications
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       delay_q - quantile of exponential distribution for the timeouts
+#       first - index of the first replication
+def simulate_bully_vector(
+    stats,
+    n_sim,
+    n_nodes,
+    delay,
+    initiators,
+    delay_q,
+    first = 0
+):
+    max_wait = max_delay(delay_q, delay)
+    replay = ReplayBullySimulation(n_nodes, delay, max_wait, initiators)
+    last = first + n_sim
+    variates = (1 + 3 * (n_nodes - 1)) * (n_nodes - 1)
+    for block in range(first // BLOCK_SIZE, -(-last // BLOCK_SIZE)):
+        for lo, hi in block_chunks(block, first, last, variates):
+            runtimes, msgs, wrong, irregular, tables = bully_block(
+                block_rng(stats.seed, block),
+                n_nodes,
+                delay,
+                max_wait,
+                initiators,
+                stats.antithetic,
+                lo,
+                hi
+            )
+            for r in np.flatnonzero(irregular):
+                replay.set_rng(block_rng(stats.seed, block, lo + int(r)))
+                record = replay.replay(*(table[r] for table in tables))
+                runtimes[r] = record.runtime
+                msgs[r] = record.msgs
+                wrong[r] = record.wrong
+
+            stats.add_replications(runtimes, msgs, wrong)
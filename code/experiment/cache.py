@@ -0,0 +1,141 @@
+import functools
+import hashlib
+import json
+import os
+import numpy as np
+
+from statistic.store import FACTORS, ResultStore
+
+# sources whose changes alter the replications: the cached replications are
+# discarded when they change (the statistics and plots code is not included,
+# so the plots can be changed without invalidating the cache)
+SOURCES = (
+    "election",
+    "node",
+    "engine",
+    "msg",
+    os.path.join("experiment", "runner.py"),
+    os.path.join("experiment", "streams.py"),
+    "utils.py"
+)
+# root directory of the sources
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# This function returns the version of the simulation code, i.e. the hash of
+# its sources
+@functools.lru_cache(maxsize=None)
+def code_version():
+    files = []
+    for source in SOURCES:
+        path = os.path.join(CODE_DIR, source)
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [d for d in dirs if d != "__pycache__"]
+                files.extend(
+                    os.path.join(root, name) for name in names
+                    if name.endswith(".py")
+                )
+        else:
+            files.append(path)
+
+    digest = hashlib.sha256()
+    for file in sorted(files):
+        digest.update(os.path.relpath(file, CODE_DIR).encode())
+        with open(file, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()[:16]
+
+# this class represents a cache of the replications of the configurations,
+# stored in a ResultStore under a key that is the hash of the configuration
+# (algorithm, factors, seed, engine and version of the code): replication k
+# of a configuration is always the same, so the replications requested are
+# taken from the cache when they are stored and only the missing ones are
+# performed. Simulations without a seed are not cached
+#   attributes:
+#       store - ResultStore of the cached replications
+class ExperimentCache:
+
+    def __init__(self, root):
+        self.store = ResultStore(root)
+
+    # method to return the configuration of a simulation as a dictionary;
+    # factors that do not affect the replications are normalized (the loss
+    # rate with reliable links, the timeout of the reliable Ring)
+    #   params:
+    #       stats - SimStats of the simulation
+    #       factors - dictionary with the factors of the simulation (its
+    #       engine is used)
+    def config(self, stats, factors):
+        loss = stats.loss_rate if stats.unreliable else 0.0
+        timeout = stats.timeout
+        if stats.name == "Ring" and not stats.unreliable:
+            timeout = 0.0
+        return {
+            "name": stats.name,
+            "n_nodes": int(stats.n_nodes),
+            "initiators": int(stats.initiators),
+            "delay": float(stats.delay),
+            "unreliable": bool(stats.unreliable),
+            "loss_rate": float(loss),
+            "timeout": float(timeout),
+            "seed": stats.seed,
+            "antithetic": bool(stats.antithetic),
+            "engine": factors.get("engine", "simpy"),
+            "version": code_version()
+        }
+
+    # method to return the key of a simulation in the store
+    #   params:
+    #       stats - SimStats of the simulation
+    #       factors - dictionary with the factors of the simulation
+    def key(self, stats, factors):
+        config = json.dumps(self.config(stats, factors), sort_keys=True)
+        return hashlib.sha256(config.encode()).hexdigest()[:32]
+
+    # method to add to a simulation its next n_sim replications that are
+    # cached, returns how many were added
+    #   params:
+    #       stats - SimStats of the simulation
+    #       factors - dictionary with the factors of the simulation
+    #       n_sim - number of replications requested
+    def fill(self, stats, factors, n_sim):
+        if stats.seed is None or n_sim <= 0:
+            return 0
+        key = self.key(stats, factors)
+        if self.store.meta(key) is None:
+            return 0
+
+        cached = self.store.load(key)
+        first = stats.n_sims()
+        n = max(0, min(n_sim, len(cached.runtimes) - first))
+        if n == 0:
+            return 0
+        wrong = np.zeros(n, dtype=bool)
+        for w_s in cached.wrong_sims:
+            if first <= w_s < first + n:
+                wrong[w_s - first] = True
+        stats.add_replications(
+            np.array(cached.runtimes[first:first + n]),
+            np.array(cached.msg_counter[first:first + n]),
+            wrong
+        )
+
+        return n
+
+    # method to save the replications of a simulation that are not cached yet
+    #   params:
+    #       stats - SimStats of the simulation
+    #       factors - dictionary with the factors of the simulation
+    def save(self, stats, factors):
+        if stats.seed is None or stats.streaming:
+            return
+        key = self.key(stats, factors)
+        meta = self.store.meta(key)
+        if meta is not None and meta["lengths"]["runtimes"] >= stats.n_sims():
+            return
+        # the factors of the configuration are normalized as in its key
+        config = self.config(stats, factors)
+        info = {factor: config[factor] for factor in FACTORS}
+        info["config"] = config
+        self.store.save(stats, key, info)
@@ -0,0 +1,359 @@
+import multiprocessing
+import os
+import random as py_random
+import simpy
+from numpy import random
+
+from election.ring import RingSimulation
+from election.bully import BullySimulation
+from election.simulation import ReusableEnvironment
+from engine.bully import KernelBullySimulation
+from engine.ring import KernelRingSimulation
+from engine.vector import simulate_bully_vector, simulate_ring_vector
+from experiment.streams import configuration_rng, unseeded_rng
+
+# default number of worker processes used to split the replications
+N_WORKERS = os.cpu_count() or 1
+# default replications budget of the sequential stopping
+MIN_SIM = 1000
+MAX_SIM = 100000
+BATCH_SIM = 1000
+# simulation engines: "simpy" runs the SimPy processes of the nodes, "kernel"
+# the same algorithms on the lean event kernel (faster, no debug messages),
+# "compact" the kernel with the nodes as views of the network state arrays (a
+# few bytes per node, for very large networks), "vector" computes whole
+# blocks of reliable replications as NumPy arrays (the other configurations
+# run on the kernel)
+ENGINES = ("simpy", "kernel", "compact", "vector")
+# if true, the SimPy engine resets the environment, the nodes and their queues
+# in place after each replication instead of creating new ones; off by
+# default: the reset writes private attributes of the SimPy environment (it
+# needs SimPy 4.1) and it saves little (1.0-1.24x, benchmarks/reuse_bench.py)
+REUSE = False
+
+# workers are forked so that they do not re-import the main script
+if "fork" in multiprocessing.get_all_start_methods():
+    MP_CONTEXT = multiprocessing.get_context("fork")
+else:
+    MP_CONTEXT = multiprocessing.get_context()
+
+# This function returns the random streams of the replications of a
+# simulation: the streams of its configuration, moved to each replication in
+# place, or streams not pinned to a seed (shared by all the replications)
+#   params:
+#       stats - SimStats of the simulation
+def stream_set(stats):
+    if stats.seed is None:
+        return unseeded_rng()
+    return configuration_rng(stats.seed)
+
+# This function performs n_sim replications of the Ring algorithm and records
+# them in the given SimStats
+#   params:
+#       stats - SimStats of the Ring algorithm simulations
+#       n_sim - number of repetitions of the Ring procedure
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       unreliable - boolean value, simulations with unreliable links
+#       loss - loss rate
+#       timeout - quantile of exponential distribution for unreliable timeouts
+#       debug_mode - if true the nodes will print debug messages
+#       first - index of the first replication (it selects the random streams)
+#       engine - simulation engine ("simpy", "kernel", "compact"
+#       or "vector")
+#       reuse - if true, the SimPy objects are reused by the replications
+def simulate_ring(
+    stats,
+    n_sim,
+    n_nodes,
+    delay,
+    initiators,
+    unreliable = False,
+    loss = 0.0,
+    timeout = 0.0,
+    debug_mode = False,
+    first = 0,
+    engine = "simpy",
+    reuse = REUSE
+):
+    if engine == "vector" and not unreliable:
+        simulate_ring_vector(stats, n_sim, n_nodes, delay, initiators, first)
+        return
+
+    if engine != "simpy":
+        ring = KernelRingSimulation(
+            n_nodes, delay, stats, initiators, unreliable, loss, timeout,
+            compact=engine == "compact"
+        )
+        streams = stream_set(stats)
+        ring.set_rng(streams)
+        for k in range(first, first + n_sim):
+            if stats.seed is not None:
+                streams.select(k, stats.antithetic)
+            ring.run()
+        return
+
+    env_ring = ReusableEnvironment() if reuse else simpy.Environment()
+    if unreliable:
+        ring = RingSimulation(
+            env_ring,
+            n_nodes,
+            delay,
+            stats,
+            n_initiators=initiators,
+            unreliable=True,
+            loss=loss,
+            timeout=timeout,
+            debug_mode=debug_mode
+        )
+    else:
+        ring = RingSimulation(
+            env_ring,
+            n_nodes,
+            delay,
+            stats,
+            n_initiators=initiators)
+
+    streams = stream_set(stats)
+    ring.set_rng(streams)
+    for k in range(first, first + n_sim):
+        if stats.seed is not None:
+            streams.select(k, stats.antithetic)
+        env_ring.process(ring.start_election()) # starts Ring procedure
+        env_ring.run()
+        if reuse:
+            env_ring.reset()
+            ring.reset()
+        else:
+            env_ring = simpy.Environment()
+            ring.clean(env_ring)
+
+# This function performs n_sim replications of the Bully algorithm and records
+# them in the given SimStats
+#   params:
+#       stats - SimStats of the Bully algorithm simulations
+#       n_sim - number of repetitions of the Bully procedure
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       unreliable - boolean value, if true simulations with unreliable links
+#       loss - loss rate
+#       delay_q - quantile of exponential distribution for unreliable timeouts
+#       delay_q_r - quantile of exponential distribution for reliable timeouts
+#       debug_mode - if true the nodes will print debug messages
+#       first - index of the first replication (it selects the random streams)
+#       engine - simulation engine ("simpy", "kernel", "compact"
+#       or "vector")
+#       reuse - if true, the SimPy objects are reused by the replications
+def simulate_bully(
+    stats,
+    n_sim,
+    n_nodes,
+    delay,
+    initiators,
+    unreliable = False,
+    loss = 0.0,
+    delay_q = 0.0,
+    delay_q_r = 0.0,
+    debug_mode = False,
+    first = 0,
+    engine = "simpy",
+    reuse = REUSE
+):
+    if engine == "vector" and not unreliable:
+        simulate_bully_vector(
+            stats, n_sim, n_nodes, delay, initiators, delay_q_r, first
+        )
+        return
+
+    if engine != "simpy":
+        bully = KernelBullySimulation(
+            n_nodes,
+            delay,
+            delay_q if unreliable else delay_q_r,
+            stats,
+            initiators,
+            loss if unreliable else 0,
+            compact=engine == "compact"
+        )
+        streams = stream_set(stats)
+        bully.set_rng(streams)
+        for k in range(first, first + n_sim):
+            if stats.seed is not None:
+                streams.select(k, stats.antithetic)
+            bully.run()
+        return
+
+    env_bully = ReusableEnvironment() if reuse else simpy.Environment()
+    if unreliable:
+        bully = BullySimulation(env_bully, n_nodes, delay, delay_q, stats)
+    else:
+        bully = BullySimulation(env_bully, n_nodes, delay, delay_q_r, stats)
+
+    streams = stream_set(stats)
+    bully.set_rng(streams)
+    for k in range(first, first + n_sim):
+        if stats.seed is not None:
+            streams.select(k, stats.antithetic)
+        if unreliable:
+            bully.env.process(
+                bully.start_election(
+                    initiators,
+                    loss_rate=loss,
+                    debug_mode=debug_mode
+                )
+            )
+        else:
+            bully.env.process(
+                bully.start_election(initiators, debug_mode=debug_mode)
+            )
+        bully.env.run()
+        if reuse:   # the nodes are reset by start_election
+            bully.env.reset()
+        else:
+            env_bully = simpy.Environment()
+            bully.env = env_bully
+
+# This function initializes a worker process: forked workers inherit the
+# state of the global generators (NumPy and Python), so they are re-seeded to
+# avoid identical replications in different workers
+def init_worker():
+    random.seed()
+    py_random.seed()
+
+# This function performs a batch of replications of one configuration in the
+# current process
+#   params:
+#       stats - SimStats where the replications are recorded (its name selects
+#       the algorithm)
+#       factors - dictionary with the factors of the configuration, i.e. the
+#       keyword arguments of simulate_ring/simulate_bully
+#       n_sim - number of replications
+#       debug_mode - if true the nodes will print debug messages
+#       first - index of the first replication of the chunk
+def run_chunk(stats, factors, n_sim, debug_mode = False, first = 0):
+    if stats.name == "Bully":
+        simulate_bully(stats, n_sim, debug_mode=debug_mode, first=first,
+                       **factors)
+    else:
+        simulate_ring(stats, n_sim, debug_mode=debug_mode, first=first,
+                      **factors)
+
+    return stats
+
+# This function splits a number of replications in nearly equal chunks
+#   params:
+#       n_sim - number of replications
+#       n_chunks - number of chunks
+def split_replications(n_sim, n_chunks):
+    n_chunks = max(1, min(n_chunks, n_sim))
+    size, rest = divmod(n_sim, n_chunks)
+
+    return [size + 1 if i < rest else size for i in range(n_chunks)]
+
+# This function performs the replications of one configuration splitting them
+# across a pool of worker processes; each worker records its replications in
+# its own SimStats and the results are merged (in chunk order) into stats, so
+# the final statistics are the same as the ones of a serial run (if stats has a
+# seed, they are identical for any number of workers). The replications are
+# appended to the ones already recorded in stats; with a cache, the cached
+# replications are taken from it and only the missing ones are performed (and
+# then cached)
+#   params:
+#       stats - SimStats where the replications are recorded
+#       factors - dictionary with the factors of the configuration
+#       n_sim - number of replications
+#       n_workers - number of worker processes (1 runs in the current process)
+#       debug_mode - if true the nodes will print debug messages
+#       cache - ExperimentCache of the replications (or None)
+def run_replications(
+    stats,
+    factors,
+    n_sim,
+    n_workers = N_WORKERS,
+    debug_mode = False,
+    cache = None
+):
+    if cache is not None:
+        n_sim -= cache.fill(stats, factors, n_sim)
+        if n_sim == 0:
+            return stats
+
+    first = stats.n_sims()
+    chunks = split_replications(n_sim, n_workers)
+    if len(chunks) <= 1 and first == 0:
+        run_chunk(stats, factors, n_sim, debug_mode)
+        if cache is not None:
+            cache.save(stats, factors)
+        return stats
+
+    tasks = []
+    for n in chunks:
+        tasks.append((stats.empty_copy(first), factors, n, debug_mode, first))
+        first += n
+    if len(chunks) <= 1:
+        results = [run_chunk(*tasks[0])]
+    else:
+        with MP_CONTEXT.Pool(len(chunks), init_worker) as pool:
+            results = pool.starmap(run_chunk, tasks)
+
+    for result in results:
+        stats.merge(result)
+    if cache is not None:
+        cache.save(stats, factors)
+
+    return stats
+
+# This function performs the replications of one configuration in batches,
+# until the relative half-width of the 95% CI of both the turnaround time and
+# the number of messages is below rel_width (or the budget is exhausted); the
+# reason of the stop is recorded in stats
+#   params:
+#       stats - SimStats where the replications are recorded
+#       factors - dictionary with the factors of the configuration
+#       rel_width - target relative half-width of the CIs (e.g. 0.01)
+#       min_sim - minimum number of replications
+#       max_sim - maximum number of replications
+#       batch_sim - number of replications of each batch after the first one
+#       n_workers - number of worker processes (1 runs in the current process)
+#       debug_mode - if true the nodes will print debug messages
+#       cache - ExperimentCache of the replications (or None)
+def run_sequential(
+    stats,
+    factors,
+    rel_width,
+    min_sim = MIN_SIM,
+    max_sim = MAX_SIM,
+    batch_sim = BATCH_SIM,
+    n_workers = N_WORKERS,
+    debug_mode = False,
+    cache = None
+):
+    n_sim = min(min_sim, max_sim)
+    while True:
+        run_replications(stats, factors, n_sim, n_workers, debug_mode, cache)
+        done = stats.n_sims()
+        if stats.precision_reached(rel_width):
+            stats.set_stop_reason("precision")
+            break
+        if done >= max_sim:
+            stats.set_stop_reason("max_sim")
+            break
+        n_sim = min(batch_sim, max_sim - done)
+
+    return stats
+
+# This function performs again the replication k of a configuration alone
+# (e.g. a wrong simulation or an outlier), using the same random stream of the
+# full run
+#   params:
+#       stats - SimStats of the configuration (it must have a seed)
+#       factors - dictionary with the factors of the configuration
+#       k - index of the replication
+#       debug_mode - if true the nodes will print debug messages
+def replay(stats, factors, k, debug_mode = True):
+    if stats.seed is None:
+        raise ValueError("a replication can be replayed only with a seed")
+
+    return run_chunk(stats.empty_copy(k), factors, 1, debug_mode, k)
@@ -0,0 +1,178 @@
+import numpy as np
+
+# size of the first block of variates generated by a stream; every refill
+# doubles it up to MAX_BLOCK, so short replications do not generate (much)
+# more than they use and long ones pay the NumPy call overhead rarely
+MIN_BLOCK = 64
+MAX_BLOCK = 4096
+# distance between the starts of the streams of two consecutive replications
+# in the sequence of a substream: every replication draws from its own segment
+# of 2**64 numbers of the PCG64 sequence (whose period is 2**128)
+REPLICATION_STRIDE = 2**64
+
+# this class represents the random streams of the replications of a
+# configuration: delays, packet losses and initiators selection use three
+# independent substreams, so that
+# simulations of different algorithms (or factor levels) run with the same
+# seed consume the same variates for the same purpose (common random numbers)
+# even if they draw a different number of them. Delays and loss uniforms are
+# generated in blocks by the vectorized Generator and handed out one at a time
+# from a buffer (as Python floats); a delay is its mean times a unit-mean
+# delay, so it matches the direct draw of Generator.exponential only up to
+# floating-point rounding. The streams are moved to a replication in place
+# (select), by advancing the generators of the substreams to the segment of
+# the replication, instead of creating new generators for each replication. It
+# offers the subset of the NumPy Generator interface used by the simulations
+#   attributes:
+#       delay_rng - generator of the delays
+#       loss_rng - generator of the packet losses
+#       init_rng - generator of the initiators
+#       bases - states of the generators at the start of the replication 0
+#       antithetic - if true, the uniforms u of delays and losses are replaced
+#       by 1 - u and the integers i in [0, high) by high - 1 - i
+#       delays - buffer of unit-mean exponential delays
+#       losses - buffer of uniforms for the packet losses
+#       delay_pos - position of the next delay in the buffer
+#       loss_pos - position of the next uniform in the buffer
+#       delay_block - size of the next block of delays
+#       loss_block - size of the next block of uniforms
+class ReplicationStreams:
+
+    def __init__(self, seed_seq, antithetic = False):
+        delay_seq, loss_seq, init_seq = seed_seq.spawn(3)
+        self.delay_rng = np.random.default_rng(delay_seq)
+        self.loss_rng = np.random.default_rng(loss_seq)
+        self.init_rng = np.random.default_rng(init_seq)
+        self.bases = [
+            rng.bit_generator.state
+            for rng in (self.delay_rng, self.loss_rng, self.init_rng)
+        ]
+        self.antithetic = antithetic
+        self.clear()
+
+    # method to empty the buffers of the variates
+    def clear(self):
+        self.delays = []
+        self.losses = []
+        self.delay_pos = 0
+        self.loss_pos = 0
+        self.delay_block = MIN_BLOCK
+        self.loss_block = MIN_BLOCK
+
+    # method to move the streams to the start of a replication. With
+    # antithetic variates, the replications 2j and 2j+1 share the segment j,
+    # the second one with the complementary uniforms
+    #   params:
+    #       k - index of the replication
+    #       antithetic - if true, replications are antithetic pairs
+    def select(self, k, antithetic = False):
+        segment = k // 2 if antithetic else k
+        rngs = (self.delay_rng, self.loss_rng, self.init_rng)
+        for rng, base in zip(rngs, self.bases):
+            rng.bit_generator.state = base
+            rng.bit_generator.advance(segment * REPLICATION_STRIDE)
+        self.antithetic = antithetic and k % 2 == 1
+        self.clear()
+
+    # method to generate a new block of unit-mean delays by inversion
+    def refill_delays(self):
+        u = self.delay_rng.random(self.delay_block)
+        if self.antithetic:
+            with np.errstate(divide="ignore"):
+                d = np.where(u > 0.0, -np.log(u), -np.log1p(-u))
+        else:
+            d = -np.log1p(-u)
+        self.delays = d.tolist()
+        self.delay_pos = 0
+        self.delay_block = min(2 * self.delay_block, MAX_BLOCK)
+
+    # method to generate a new block of uniforms for the packet losses
+    def refill_losses(self):
+        u = self.loss_rng.random(self.loss_block)
+        if self.antithetic:
+            u = 1.0 - u
+        self.losses = u.tolist()
+        self.loss_pos = 0
+        self.loss_block = min(2 * self.loss_block, MAX_BLOCK)
+
+    # method to draw an exponential delay (or a list of size delays, the same
+    # ones drawn one at a time)
+    #   params:
+    #       scale - exponential mean
+    #       size - number of delays (None for a single one)
+    def exponential(self, scale, size = None):
+        if size is not None:
+            delays = []
+            while len(delays) < size:
+                if self.delay_pos == len(self.delays):
+                    self.refill_delays()
+                end = min(
+                    len(self.delays), self.delay_pos + size - len(delays)
+                )
+                delays.extend(self.delays[self.delay_pos:end])
+                self.delay_pos = end
+            return [scale * d for d in delays]
+
+        if self.delay_pos == len(self.delays):
+            self.refill_delays()
+        d = self.delays[self.delay_pos]
+        self.delay_pos += 1
+        return scale * d
+
+    # method to draw a uniform number in [0, 1) for the packet losses (or a
+    # list of size uniforms, the same ones drawn one at a time)
+    #   params:
+    #       size - number of uniforms (None for a single one)
+    def random(self, size = None):
+        if size is not None:
+            losses = []
+            while len(losses) < size:
+                if self.loss_pos == len(self.losses):
+                    self.refill_losses()
+                end = min(
+                    len(self.losses), self.loss_pos + size - len(losses)
+                )
+                losses.extend(self.losses[self.loss_pos:end])
+                self.loss_pos = end
+            return losses
+
+        if self.loss_pos == len(self.losses):
+            self.refill_losses()
+        u = self.losses[self.loss_pos]
+        self.loss_pos += 1
+        return u
+
+    # method to draw an integer in [0, high) for the initiators selection
+    #   params:
+    #       high - upper bound (excluded)
+    def integers(self, high):
+        i = self.init_rng.integers(high)
+        if self.antithetic:
+            return high - 1 - i
+        return i
+
+# create random streams that are not pinned to a seed (fresh entropy from the
+# OS), e.g. shared by all the replications of an unseeded configuration
+def unseeded_rng():
+    return ReplicationStreams(np.random.SeedSequence())
+
+# create the random streams of the replications of a configuration, derived
+# from its seed; the replication k uses the k-th segment of each substream
+# (ReplicationStreams.select), so its streams do not depend on which worker
+# runs it and it can be replayed alone
+#   params:
+#       seed - seed of the configuration
+def configuration_rng(seed):
+    return ReplicationStreams(np.random.SeedSequence(seed))
+
+# create the random streams of a single replication of a configuration (the
+# replications of a run share the streams of configuration_rng instead)
+#   params:
+#       seed - seed of the configuration
+#       k - index of the replication
+#       antithetic - if true, replications are antithetic pairs
+def replication_rng(seed, k, antithetic = False):
+    streams = configuration_rng(seed)
+    streams.select(k, antithetic)
+
+    return streams
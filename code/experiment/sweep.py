@@ -0,0 +1,304 @@
+import itertools
+
+from experiment.runner import MP_CONTEXT, N_WORKERS, init_worker, run_chunk
+from experiment.runner import split_replications, MIN_SIM, BATCH_SIM
+from statistic.statistics import CAPACITY, CompactSimStats
+from utils import config_seed, factors_key
+
+# default number of replications of a single task of the sweep
+CHUNK_SIZE = 250
+
+# this class represents a point (configuration) of a factor sweep
+#   attributes:
+#       name - algorithm name ("Ring" or "Bully")
+#       n_nodes - number of nodes
+#       initiators - number of initiators
+#       delay - exponential mean for delays
+#       unreliable - if true, the simulations assume unreliable links
+#       loss - loss rate
+#       quantile - quantile of exponential distribution for the timeouts
+#       engine - simulation engine ("simpy", "kernel", "compact"
+#       or "vector")
+class SweepPoint:
+
+    def __init__(
+        self,
+        name,
+        n_nodes,
+        initiators,
+        delay,
+        unreliable = False,
+        loss = 0.0,
+        quantile = 0.0,
+        engine = "simpy"
+    ):
+        self.name = name
+        self.n_nodes = n_nodes
+        self.initiators = initiators
+        self.delay = delay
+        self.unreliable = unreliable
+        self.loss = loss
+        self.quantile = quantile
+        self.engine = engine
+
+    def __str__(self):
+        rel = "unreliable" if self.unreliable else "reliable"
+        return (
+            f"{self.name} ({rel}): N = {self.n_nodes}, " +
+            f"init = {self.initiators}, delay = {self.delay}, " +
+            f"loss = {self.loss}, quantile = {self.quantile}"
+        )
+
+    # method to create the (empty) SimStats of the point
+    #   params:
+    #       capacity - number of replications preallocated
+    def new_stats(self, capacity = CAPACITY):
+        return CompactSimStats(
+            self.initiators,
+            self.delay,
+            self.n_nodes,
+            self.name,
+            self.unreliable,
+            self.quantile,
+            self.loss,
+            capacity=capacity
+        )
+
+    # method to return the factors of the point as keyword arguments of
+    # simulate_ring/simulate_bully
+    def factors(self):
+        factors = {
+            "n_nodes": self.n_nodes,
+            "delay": self.delay,
+            "initiators": self.initiators,
+            "unreliable": self.unreliable,
+            "loss": self.loss,
+            "engine": self.engine
+        }
+        if self.name == "Bully":
+            factors["delay_q"] = self.quantile
+            factors["delay_q_r"] = self.quantile
+        else:
+            factors["timeout"] = self.quantile
+
+        return factors
+
+    # method to estimate the relative cost of one replication, i.e. the
+    # expected number of messages: the Ring sends 2(n-1) messages per
+    # initiator, the Bully O(n^2); lost messages are retransmitted and, with
+    # unreliable links, the Ring also sends one ACK per message
+    def cost(self):
+        if self.name == "Bully":
+            cost = self.n_nodes ** 2
+        else:
+            cost = 2 * self.n_nodes * self.initiators
+        if self.unreliable:
+            cost *= 2 / max(1.0 - self.loss, 0.05)
+
+        return cost
+
+# This function creates the points of a full factorial grid
+#   params:
+#       names - list of algorithm names
+#       n_nodes - list of numbers of nodes
+#       initiators - list of numbers of initiators
+#       delays - list of delays' mean
+#       losses - list of loss rates (0 means reliable links)
+#       quantiles - list of quantiles for the timeouts
+#       engine - simulation engine of the points
+def make_grid(
+    names,
+    n_nodes,
+    initiators,
+    delays,
+    losses,
+    quantiles,
+    engine = "simpy"
+):
+    return [
+        SweepPoint(name, n, init, delay, loss > 0, loss, q, engine)
+        for name, n, init, delay, loss, q in itertools.product(
+            names, n_nodes, initiators, delays, losses, quantiles
+        )
+    ]
+
+# This function performs one task of the sweep (a chunk of replications of a
+# point) and returns it labelled with its position
+#   params:
+#       task - tuple (point index, chunk index, SimStats, factors, n_sim,
+#       index of the first replication)
+def run_task(task):
+    point_id, chunk_id, stats, factors, n_sim, first = task
+    return point_id, chunk_id, run_chunk(stats, factors, n_sim, False, first)
+
+# This function performs all the replications of the sweep points: every
+# (point x replications chunk) is a task of a shared pool of workers, tasks are
+# scheduled from the most expensive one and handed out one at a time, so that
+# the workers stay busy until the end. When all the chunks of a point are done
+# they are merged (in chunk order), the statistics are computed and the SimStats
+# is inserted in the manager. With a target CI width (sequential stopping) the
+# replications are performed in rounds: after each round, the points that
+# reached the target precision (or the budget of n_sim replications) are
+# completed, the other ones get another batch of replications
+#   params:
+#       points - list of SweepPoint
+#       n_sim - number of replications of each point (maximum number with
+#       sequential stopping)
+#       manager - StatsManager where the finished SimStats are inserted
+#       n_workers - number of worker processes (1 runs in the current process)
+#       chunk_size - number of replications of each task
+#       on_finish - function called as on_finish(point, stats) when a point is
+#       completed
+#       seed - root seed of the sweep, the seed of each point is derived from it
+#       and from the factors of the point (if None, the global generators are
+#       used)
+#       common - if true, all the points use the root seed, i.e. the same random
+#       streams (common random numbers), and keep their replications to be
+#       paired
+#       antithetic - if true, the replications are antithetic pairs
+#       rel_width - target relative half-width of the 95% CIs (if None, n_sim
+#       replications are performed for each point)
+#       min_sim - replications of the first round (sequential stopping)
+#       batch_sim - replications of the next rounds (sequential stopping)
+#       streaming - if true, the SimStats accumulate the replications online
+#       without storing them
+#       keep_raw - if true, the SimStats keep their replications before the
+#       outliers removal (e.g. to save them in a ResultStore)
+#       cache - ExperimentCache of the replications: the cached ones are not
+#       performed again (if None, all the replications are performed)
+def run_sweep(
+    points,
+    n_sim,
+    manager,
+    n_workers = N_WORKERS,
+    chunk_size = CHUNK_SIZE,
+    on_finish = None,
+    seed = None,
+    common = False,
+    antithetic = False,
+    rel_width = None,
+    min_sim = MIN_SIM,
+    batch_sim = BATCH_SIM,
+    streaming = False,
+    keep_raw = False,
+    cache = None
+):
+    if seed is None or common:
+        seeds = [seed] * len(points)
+    else:
+        seeds = [
+            config_seed(
+                seed,
+                *factors_key(
+                    point.name,
+                    point.n_nodes,
+                    point.initiators,
+                    point.delay,
+                    point.unreliable,
+                    point.loss,
+                    point.quantile
+                )
+            )
+            for point in points
+        ]
+
+    stats_list = []
+    for point_id, point in enumerate(points):
+        stats = point.new_stats(n_sim)
+        stats.set_seed(seeds[point_id], antithetic)
+        stats.keep_raw = common or keep_raw
+        if streaming:
+            stats.set_streaming()
+        stats_list.append(stats)
+
+    # finish the point: compute its statistics and insert it in the manager
+    def complete(point_id, reason):
+        stats = stats_list[point_id]
+        stats.set_stop_reason(reason)
+        stats.compute_stats()
+        stats.set_id(len(manager.stats))
+        manager.insert_stat(stats)
+        if on_finish is not None:
+            on_finish(points[point_id], stats)
+
+    # check the point after a round: complete it (after caching its new
+    # replications) or return true if it needs more replications
+    def check(point_id):
+        stats = stats_list[point_id]
+        if cache is not None:
+            cache.save(stats, points[point_id].factors())
+        if rel_width is None:
+            complete(point_id, "n_sim")
+        elif stats.precision_reached(rel_width):
+            complete(point_id, "precision")
+        elif stats.n_sims() >= n_sim:
+            complete(point_id, "max_sim")
+        else:
+            return True
+        return False
+
+    # perform one round of replications for the active points
+    def run_round(active, n_round, pool):
+        tasks = []
+        n_chunks = {}
+        still_active = []
+        for point_id in active:
+            stats = stats_list[point_id]
+            n = min(n_round, n_sim - stats.n_sims())
+            if cache is not None:
+                n -= cache.fill(stats, points[point_id].factors(), n)
+            if n == 0:  # all the replications of the round are cached
+                if check(point_id):
+                    still_active.append(point_id)
+                continue
+            chunks = split_replications(n, -(-n // chunk_size))
+            first = stats.n_sims()
+            for chunk_id, n in enumerate(chunks):
+                tasks.append((
+                    point_id,
+                    chunk_id,
+                    stats.empty_copy(first),
+                    points[point_id].factors(),
+                    n,
+                    first
+                ))
+                first += n
+            n_chunks[point_id] = len(chunks)
+        # longest processing time first
+        tasks.sort(key=lambda t: points[t[0]].cost() * t[4], reverse=True)
+
+        if pool is None:
+            done = map(run_task, tasks)
+        else:
+            done = pool.imap_unordered(run_task, tasks)
+
+        results = {point_id: {} for point_id in n_chunks}
+        for point_id, chunk_id, chunk_stats in done:
+            results[point_id][chunk_id] = chunk_stats
+            if len(results[point_id]) < n_chunks[point_id]:
+                continue
+
+            stats = stats_list[point_id]
+            for i in range(n_chunks[point_id]):
+                stats.merge(results[point_id][i])
+            results[point_id] = None
+            if check(point_id):
+                still_active.append(point_id)
+
+        return sorted(still_active)
+
+    # perform all the rounds
+    def run_rounds(pool):
+        active = list(range(len(points)))
+        n_round = n_sim if rel_width is None else min_sim
+        while len(active) > 0:
+            active = run_round(active, n_round, pool)
+            n_round = batch_sim
+
+    if n_workers <= 1:
+        run_rounds(None)
+    else:
+        with MP_CONTEXT.Pool(n_workers, init_worker) as pool:
+            run_rounds(pool)
+
+    return stats_list
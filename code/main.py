@@ -1,26 +1,67 @@
-import simpy
-import matplotlib.pyplot as plt
+import argparse
+import contextlib
+import json
+import os
+import sys
 import numpy as np
-import time
 
-from election.ring import RingSimulation
-from election.bully import BullySimulation
-from statistic.statistics import SimStats, StatsManager
+from experiment import runner
+from experiment.cache import ExperimentCache
+from experiment.sweep import SweepPoint, make_grid, run_sweep
+from statistic.statistics import CompactSimStats, StatsManager
+from statistic.store import ResultStore
+from utils import config_seed, factors_key
 
 # ------------------- SETTINGS ---------------------
-# DEFAULT SCENARIO
+# DEFAULT SCENARIO (defaults of the command line options)
 N_NODES = 5
-DELAY = 110 # mean of exponential distribution for delays 
+DELAY = 110 # mean of exponential distribution for delays
 INITIATORS = 1
 N_SIM = 10000
-LOSS = 0.2      
-DELAY_Q_R = 0.99    # quantile of exponential distribution for reliable Bully 
+LOSS = 0.2
+DELAY_Q_R = 0.99    # quantile of exponential distribution for reliable Bully
 DELAY_Q = 0.8   # quantile of exponential distribution for unreliable timeouts
+N_WORKERS = runner.N_WORKERS    # worker processes for the replications
+ROOT_SEED = 2025    # root seed of the experiments (None for random runs)
+CRN = True  # compared simulations and sweeps share the random streams
+ANTITHETIC = False  # replications are antithetic pairs (with CRN)
+# sequential stopping: target relative half-width of the 95% CIs of turnaround
+# time and number of messages (None performs always N_SIM replications,
+# otherwise N_SIM is the maximum number of replications)
+REL_WIDTH = None
+MIN_SIM = 1000  # replications before the first precision check
+BATCH_SIM = 1000    # replications between two precision checks
+# streaming statistics: replications are accumulated online instead of being
+# stored (constant memory, but no outliers removal, plots of the single
+# replications and paired comparisons)
+STREAMING = False
+# simulation engine: "simpy" (SimPy processes, debug messages available),
+# "kernel" (same algorithms on the lean event kernel, faster), "compact"
+# (kernel with a few bytes of state per node, for very large networks) or
+# "vector" (reliable replications computed in blocks as NumPy arrays, no
+# delays histograms; the other configurations run on the kernel)
+ENGINE = "simpy"
+# directory where figures and results are written (None shows the figures)
+OUTPUT_DIR = None
+SHOW_PLOTS = True   # if false (and no OUTPUT_DIR), the figures are discarded
+# ResultStore where the replications of every simulation are saved (None if
+# they are not saved)
+STORE = None
+# ExperimentCache of the replications: the cached replications are not
+# performed again (None performs all of them)
+CACHE = None
 
 sim_manager = StatsManager()
-ids_boxplot = []
+# machine-readable results of the command: summaries of the simulations and of
+# the paired comparisons, single runs and figures written
+results = {"simulations": [], "comparisons": [], "runs": [], "figures": []}
 
-# ------------ RING ALGORITHM SIMULATION ------------
+# This function returns the default timeout quantile of an algorithm
+#   params:
+#       name - algorithm name
+#       unreliable - boolean value, simulations with unreliable links
+def default_quantile(name, unreliable):
+    return DELAY_Q_R if name == "Bully" and not unreliable else DELAY_Q
 
 # This function generates the SimStats for one simulation
 #   params:
@@ -30,6 +71,8 @@ ids_boxplot = []
 #       unreliable - boolean value, simulations with unreliable links
 #       loss - loss rate
 #       delay_q - quantile of exponential distribution for unreliable timeouts
+#       seed - seed shared with other simulations (common random numbers), if
+#       None the seed is derived from the root seed and the factors
 def set_stats(
     initiators,
     delay,
@@ -37,22 +80,68 @@ def set_stats(
     name,
     unreliable = False,
     loss = 0.0,
-    delay_q = 0.0
+    delay_q = 0.0,
+    seed = None
 ):
-    stats = SimStats(
+    stats = CompactSimStats(
         initiators,
         delay,
         n_nodes,
         name,
         unreliable,
         delay_q,
-        loss
+        loss,
+        capacity=N_SIM
     )
     stats.set_id(len(sim_manager.stats))
+    if seed is not None:
+        stats.set_seed(seed, ANTITHETIC)
+        stats.keep_raw = True   # replications are paired
+    elif ROOT_SEED is not None:
+        stats.set_seed(config_seed(ROOT_SEED, *factors_key(
+            name, n_nodes, initiators, delay, unreliable, loss, delay_q
+        )))
+    if STREAMING:
+        stats.set_streaming()
+    if STORE is not None:
+        stats.keep_raw = True   # replications are saved
     sim_manager.insert_stat(stats)
 
     return stats
 
+# This function returns the seed shared by the simulations compared with common
+# random numbers (sweeps and comparisons), derived from the root seed of the
+# experiments only: every compared configuration uses the same random streams,
+# whatever command performs it (so its replications can be taken from the
+# cache)
+def shared_seed():
+    if ROOT_SEED is None:
+        return None
+    return config_seed(ROOT_SEED)
+
+# This function shows the figures created since the last call or, with an
+# output directory, saves them as <name>.png (<name>_<i>.png if more than one)
+#   params:
+#       name - name of the figures
+def show(name):
+    import matplotlib.pyplot as plt
+
+    if OUTPUT_DIR is None:
+        if SHOW_PLOTS:
+            plt.show()
+        plt.close("all")
+        return
+
+    fig_nums = plt.get_fignums()
+    for i, num in enumerate(fig_nums):
+        suffix = f"_{i}" if len(fig_nums) > 1 else ""
+        path = os.path.join(OUTPUT_DIR, f"{name}{suffix}.png")
+        plt.figure(num).savefig(path)
+        results["figures"].append(path)
+    plt.close("all")
+
+# ------------ ALGORITHMS SIMULATION ------------
+
 # This function perform a Ring algorithm simulation
 #   params:
 #       stats_ring - SimStats of the Ring algorithm simulations
@@ -63,6 +152,13 @@ def set_stats(
 #       unreliable - boolean value, simulations with links
 #       loss - loss rate
 #       timeout - quantile of exponential distribution for unreliable timeouts
+#       debug_mode - if true the nodes will print debug messages
+#       n_workers - number of worker processes sharing the replications
+#       rel_width - target relative half-width of the CIs, if not None the
+#       replications stop when it is reached (n_sim is the maximum number)
+#       engine - simulation engine ("simpy", "kernel", "compact"
+#       or "vector")
+#       cache - ExperimentCache of the replications (or None)
 def ring_sim(
     stats_ring,
     n_nodes,
@@ -72,114 +168,41 @@ def ring_sim(
     unreliable = False,
     loss = 0.0,
     timeout = 0.0,
-    debug_mode=False
+    debug_mode=False,
+    n_workers=N_WORKERS,
+    rel_width=REL_WIDTH,
+    engine=ENGINE,
+    cache=None
 ):
-    env_ring = simpy.Environment()
-    if unreliable:          
-        ring = RingSimulation(
-            env_ring,
-            n_nodes,
-            delay,
-            stats_ring,
-            n_initiators=initiators,
-            unreliable=True,
-            loss=loss,
-            timeout=timeout,
-            debug_mode=debug_mode
+    factors = {
+        "n_nodes": n_nodes,
+        "delay": delay,
+        "initiators": initiators,
+        "unreliable": unreliable,
+        "loss": loss,
+        "timeout": timeout,
+        "engine": engine
+    }
+    if rel_width is None:
+        runner.run_replications(
+            stats_ring, factors, n_sim, n_workers, debug_mode, cache
         )
-    else:          
-        ring = RingSimulation(
-            env_ring,
-            n_nodes,
-            delay,
+    else:
+        runner.run_sequential(
             stats_ring,
-            n_initiators=initiators)          
-
-    for i in range(n_sim):
-        env_ring.process(ring.start_election()) # starts Ring procedure
-        env_ring.run()
-        env_ring = simpy.Environment()
-        ring.clean(env_ring)            
+            factors,
+            rel_width,
+            MIN_SIM,
+            n_sim,
+            BATCH_SIM,
+            n_workers,
+            debug_mode,
+            cache
+        )
 
     # statistics computation
-    stats_ring.remove_outliers()
-    stats_ring.compute_mean_rtt()
-    stats_ring.compute_var_rtt()
-    stats_ring.compute_ci_rtt()
-    stats_ring.compute_mean_msg()
-    stats_ring.compute_var_msg()
-    stats_ring.compute_ci_msg()
-
-# SINGLE RUN RELIABLE LINKS
-print("------------------------------------------------\n")
-print("---------SINGLE RUN RING RELIABLE LINKS---------\n")
-
-stats_ring = set_stats(INITIATORS, DELAY, N_NODES, "Ring", False, LOSS, DELAY_Q)
-env_ring = simpy.Environment()
-ring = RingSimulation(
-    env_ring,
-    N_NODES,
-    DELAY,
-    stats_ring,
-    n_initiators=INITIATORS,
-    debug_mode=True
-)          
-env_ring.process(ring.start_election())         # starts Ring procedure
-env_ring.run()  
-print("\nRing election algorithm terminated")
-print("\n------------------------------------------------\n")     
-
-# RELIABLE LINKS
-print("-------------- RING RELIABLE LINKS-------------\n")
-print("------------------------------------------------\n\n")
-
-stats_ring = set_stats(INITIATORS, DELAY, N_NODES, "Ring", False, LOSS, DELAY_Q)
-ids_boxplot.append(stats_ring.id)
-print("Starting ring with reliable links execution...\n")
-ring_sim(stats_ring, N_NODES, DELAY, INITIATORS, N_SIM, False, LOSS, DELAY_Q)
-
-stats_ring.plot_runtimes_hist(200)  # plot histogram of turnaround times 
-print(stats_ring)   # print simulations results 
-plt.show()
-print("Election completed!\n\n")
-
-# SINGLE RUN UNRELIABLE LINKS
-print("------------------------------------------------\n")
-print("--------SINGLE RUN RING UNRELIABLE LINKS--------\n")
-
-stats_ring = set_stats(INITIATORS, DELAY, N_NODES, "Ring", True, LOSS, DELAY_Q)
-env_ring = simpy.Environment()
-ring = RingSimulation(
-    env_ring,
-    N_NODES,
-    DELAY,
-    stats_ring,
-    n_initiators=INITIATORS,
-    unreliable=True,
-    timeout=DELAY_Q,
-    loss=LOSS,
-    debug_mode=True
-)          
-env_ring.process(ring.start_election()) # starts Ring procedure
-env_ring.run()       
-print("\nRing election algorithm terminated")
-print("\n------------------------------------------------\n")
-
-# UNRELIABLE LINKS
-print("-------------RING UNRELIABLE LINKS--------------\n")
-print("------------------------------------------------\n\n")
-
-stats_ring = set_stats(INITIATORS, DELAY, N_NODES, "Ring", True, LOSS, DELAY_Q)
-ids_boxplot.append(stats_ring.id)
-print("Starting ring with unreliable links execution...\n")
-ring_sim(stats_ring, N_NODES, DELAY, INITIATORS, N_SIM, True, LOSS, DELAY_Q)
-
-stats_ring.plot_runtimes_hist(200)  # plot histogram of turnaround times 
-print(stats_ring)   # print simulations results 
-plt.show()
-print("Simulation completed!\n\n")
-
-# ------------ BULLY ALGORITHM SIMULATION -----------
+    stats_ring.compute_stats()
+
 # This function perform a Bully algorithm simulation
 #   params:
 #       stats_bully - SimStats of the Bully algorithm simulations
@@ -191,213 +214,262 @@ print("Simulation completed!\n\n")
 #       loss - loss rate
 #       delay_q - quantile of exponential distribution for unreliable timeouts
 #       delay_q_r - quantile of exponential distribution for reliable timeouts
+#       debug_mode - if true the nodes will print debug messages
+#       n_workers - number of worker processes sharing the replications
+#       rel_width - target relative half-width of the CIs, if not None the
+#       replications stop when it is reached (n_sim is the maximum number)
+#       engine - simulation engine ("simpy", "kernel", "compact"
+#       or "vector")
+#       cache - ExperimentCache of the replications (or None)
 def bully_sim(
     stats_bully,
     n_nodes,
     delay,
     initiators,
     n_sim,
-    unreliable = False, 
+    unreliable = False,
     loss = 0.0,
     delay_q = 0.0,
     delay_q_r = 0.0,
-    debug_mode = False
+    debug_mode = False,
+    n_workers = N_WORKERS,
+    rel_width = REL_WIDTH,
+    engine = ENGINE,
+    cache = None
 ):
-    env_bully = simpy.Environment()
-    if unreliable:
-        bully = BullySimulation(env_bully, n_nodes, delay, delay_q, stats_bully)
+    factors = {
+        "n_nodes": n_nodes,
+        "delay": delay,
+        "initiators": initiators,
+        "unreliable": unreliable,
+        "loss": loss,
+        "delay_q": delay_q,
+        "delay_q_r": delay_q_r,
+        "engine": engine
+    }
+    # Bully procedure
+    if rel_width is None:
+        runner.run_replications(
+            stats_bully, factors, n_sim, n_workers, debug_mode, cache
+        )
     else:
-        bully = BullySimulation(
-            env_bully,
-            n_nodes,
-            delay,
-            delay_q_r, 
-            stats_bully
+        runner.run_sequential(
+            stats_bully,
+            factors,
+            rel_width,
+            MIN_SIM,
+            n_sim,
+            BATCH_SIM,
+            n_workers,
+            debug_mode,
+            cache
         )
 
-    # Bully procedure
-    for i in range (n_sim):
-        if unreliable:          
-            bully.env.process(
-                bully.start_election(
-                    initiators,
-                    loss_rate=loss,
-                    debug_mode=debug_mode
-                )
-            )
-        else:
-            bully.env.process(
-                bully.start_election(initiators, debug_mode=debug_mode)
-            )
-        bully.env.run()
-        env_bully = simpy.Environment()
-        bully.env = env_bully
-
     # statistics computation
-    stats_bully.wrg_sim()
-    stats_bully.remove_outliers()
-    stats_bully.compute_mean_rtt()
-    stats_bully.compute_var_rtt()
-    stats_bully.compute_ci_rtt()
-    stats_bully.compute_mean_msg()
-    stats_bully.compute_var_msg()
-    stats_bully.compute_ci_msg()
-
-# SINGLE RUN RELIABLE LINKS
-print("------------------------------------------------\n")
-print("---------SINGLE RUN BULLY RELIABLE LINKS--------\n")
-
-stats_bully = set_stats(
-    INITIATORS,
-    DELAY,
-    N_NODES,
-    "Bully",
-    False,
-    LOSS,
-    DELAY_Q_R
-)
-env_bully = simpy.Environment()
-bully = BullySimulation(env_bully, N_NODES, DELAY, DELAY_Q_R, stats_bully)
-bully.env.process(bully.start_election(INITIATORS, debug_mode=True))
-bully.env.run()
-
-# RELIABLE LINKS 
-print("--------------BULLY RELIABLE LINKS--------------\n")
-print("------------------------------------------------\n\n")
-stats_bully = set_stats(
-    INITIATORS,
-    DELAY,
-    N_NODES,
-    "Bully",
-    False,
-    LOSS,
-    DELAY_Q_R
-)
-ids_boxplot.append(stats_bully.id)
-print("Starting bully with reliable links execution...\n")
-bully_sim(
-    stats_bully,
-    N_NODES,
-    DELAY,
-    INITIATORS,
-    N_SIM,
-    False,
-    LOSS,
-    DELAY_Q,
-    DELAY_Q_R
-)
-
-stats_bully.plot_runtimes_hist(200) # plot histogram of turnaround times   
-print(stats_bully)
-plt.show()
-print("Simulation completed!\n\n")
-
-# SINGLE RUN UNRELIABLE LINKS
-
-print("------------------------------------------------\n")
-print("--------SINGLE RUN BULLY UNRELIABLE LINKS-------\n")
-
-stats_bully = set_stats(
-    INITIATORS,
-    DELAY,
-    N_NODES,
-    "Bully",
-    True,
-    LOSS,
-    DELAY_Q
-)
-env_bully = simpy.Environment()
-bully = BullySimulation(env_bully, N_NODES, DELAY, DELAY_Q, stats_bully)
-bully.env.process(
-    bully.start_election(INITIATORS, loss_rate=LOSS, debug_mode=True)
-)
-bully.env.run()
-
-# UNRELIABLE LINKS
-print("-------------BULLY UNRELIABLE LINKS-------------\n")
-print("------------------------------------------------\n\n")
-stats_bully = set_stats(
-    INITIATORS,
-    DELAY,
-    N_NODES, 
-    "Bully",
-    True,
-    LOSS,
-    DELAY_Q
-)
-ids_boxplot.append(stats_bully.id)
-print("Starting bully with unreliable links execution...\n")
-bully_sim(
-    stats_bully,
-    N_NODES,
-    DELAY,
-    INITIATORS,
-    N_SIM,
-    True,
-    LOSS,
-    DELAY_Q,
-    DELAY_Q_R
-)
-
-stats_bully.plot_runtimes_hist(200) # plot histogram of turnaround times   
-print(stats_bully)
-print("Simulation completed!\n\n")
-plt.show()
-
-# ------------ BULLY VS RING -----------
-
-print("------------------------------------------------\n")
-print("--------------ALGORITHMS COMPARISON-------------\n")
-print("------------------------------------------------\n\n")
-
-# plot Ring and Bully of turnaround times box plot
-print("Comparison with reliable links...\n\n")
-print(sim_manager.stats[ids_boxplot[0]])
-print(sim_manager.stats[ids_boxplot[2]])
-print("\n")
-sim_manager.cmp_runtimes_box_plot(ids_boxplot[0], ids_boxplot[2])        
-plt.show()
-
-print("Comparison with unreliable links (loss rate = 0.2)...\n\n")
-print(sim_manager.stats[ids_boxplot[1]])
-print(sim_manager.stats[ids_boxplot[3]])
-print("\n")
-sim_manager.cmp_runtimes_box_plot(ids_boxplot[1], ids_boxplot[3])        
-plt.show()
-
-print("Comparison with reliable links (loss rate = 0.75)...\n\n")
-stats_ring = set_stats(INITIATORS, DELAY, N_NODES, "Ring", True, 0.75, DELAY_Q)
-ring_sim(stats_ring, N_NODES, DELAY, INITIATORS, N_SIM, True, 0.75, DELAY_Q)
-print(stats_ring)
-stats_bully = set_stats(
-    INITIATORS,
-    DELAY,
-    N_NODES,
-    "Bully",
-    True,
-    0.75,
-    DELAY_Q
-)
-bully_sim(
-    stats_bully,
-    N_NODES,
-    DELAY,
-    INITIATORS,
-    N_SIM,
-    True,
-    0.75,
-    DELAY_Q,
-    DELAY_Q_R
-)
-print(stats_bully)
-sim_manager.cmp_runtimes_box_plot(stats_bully.id, stats_ring.id)
-plt.show()
-
-print("Comparison completed!\n\n")
+    stats_bully.compute_stats()
+
+# This function performs the replications of a simulation with the algorithm
+# of its SimStats, using the settings of the command
+#   params:
+#       stats - SimStats of the simulation (it contains the factors)
+#       n_sim - number of replications
+def simulate(stats, n_sim):
+    if stats.name == "Bully":
+        bully_sim(
+            stats,
+            stats.n_nodes,
+            stats.delay,
+            stats.initiators,
+            n_sim,
+            stats.unreliable,
+            stats.loss_rate,
+            stats.timeout,
+            stats.timeout,
+            n_workers=N_WORKERS,
+            rel_width=REL_WIDTH,
+            engine=ENGINE,
+            cache=CACHE
+        )
+    else:
+        ring_sim(
+            stats,
+            stats.n_nodes,
+            stats.delay,
+            stats.initiators,
+            n_sim,
+            stats.unreliable,
+            stats.loss_rate,
+            stats.timeout,
+            n_workers=N_WORKERS,
+            rel_width=REL_WIDTH,
+            engine=ENGINE,
+            cache=CACHE
+        )
+    save(stats)
+    results["simulations"].append(stats.summary())
+
+# This function saves the replications of a simulation in the store (if any)
+#   params:
+#       stats - SimStats of the simulation
+def save(stats):
+    if STORE is not None:
+        STORE.save(stats)
+
+# This function performs a single election printing the debug messages of the
+# nodes (SimPy engine)
+#   params:
+#       name - algorithm name
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       unreliable - boolean value, simulations with unreliable links
+#       loss - loss rate
+#       quantile - quantile of exponential distribution for the timeouts
+#       replication - index of the replication (it selects the random streams)
+def single_run(
+    name,
+    n_nodes,
+    delay,
+    initiators,
+    unreliable,
+    loss,
+    quantile,
+    replication = 0
+):
+    stats = set_stats(
+        initiators, delay, n_nodes, name, unreliable, loss, quantile
+    )
+    factors = SweepPoint(
+        name, n_nodes, initiators, delay, unreliable, loss, quantile
+    ).factors()
+    runner.run_chunk(stats, factors, 1, True, replication)
+    print(f"\n{name} election algorithm terminated")
+    print("\n------------------------------------------------\n")
+
+    results["runs"].append({
+        "name": name,
+        "n_nodes": n_nodes,
+        "initiators": initiators,
+        "delay": delay,
+        "unreliable": unreliable,
+        "loss_rate": loss,
+        "timeout": quantile,
+        "seed": stats.seed,
+        "replication": replication,
+        "runtime": float(stats.runtimes[0]),
+        "msgs": int(stats.msg_counter[0]),
+        "wrong": len(stats.wrong_sims) > 0
+    })
+
+# This function performs the replications of one configuration, prints its
+# statistics and plots the histogram of the turnaround times
+#   params:
+#       name - algorithm name
+#       n_nodes - number of nodes
+#       delay - exponential mean for delays
+#       initiators - number of initiators
+#       unreliable - boolean value, simulations with unreliable links
+#       loss - loss rate
+#       quantile - quantile of exponential distribution for the timeouts
+#       n_sim - number of replications
+#       seed - seed shared with other simulations (common random numbers)
+def batch(
+    name,
+    n_nodes,
+    delay,
+    initiators,
+    unreliable,
+    loss,
+    quantile,
+    n_sim,
+    seed = None
+):
+    stats = set_stats(
+        initiators, delay, n_nodes, name, unreliable, loss, quantile, seed
+    )
+    rel = "unreliable" if unreliable else "reliable"
+    print(f"Starting {name.lower()} with {rel} links execution...\n")
+    simulate(stats, n_sim)
+
+    stats.plot_runtimes_hist(200)   # plot histogram of turnaround times
+    print(stats)    # print simulations results
+    show(f"{name.lower()}_{rel}_runtimes")
+    print("Simulation completed!\n\n")
+
+    return stats
+
+# This function compares the two algorithms on the same configuration: their
+# statistics, the paired differences (with common random numbers) and the box
+# plot of the turnaround times
+#   params:
+#       stats_ring - SimStats of the Ring simulation
+#       stats_bully - SimStats of the Bully simulation
+def compare(stats_ring, stats_bully):
+    print(stats_ring)
+    print(stats_bully)
+    # differences (turnaround times paired by common random numbers, the
+    # streaming statistics keep no replications to pair)
+    if CRN and not STREAMING:
+        paired = sim_manager.paired_cmp(stats_ring.id, stats_bully.id)
+        print(paired)
+        results["comparisons"].append(paired.summary())
+    print("\n")
+    sim_manager.cmp_runtimes_box_plot(stats_ring.id, stats_bully.id)
+    show(f"cmp_{stats_ring.id}_{stats_bully.id}")
 
 # ------------ FACTORS ANALYSIS -------------
 
-# This function plots different simulations results for different factors
+# This function prints the completion of a point of the factors analysis
+#   params:
+#       sim_name - name of the simulations
+#       point - SweepPoint completed
+def print_completed(sim_name, point):
+    match sim_name:
+        case "Initiators":
+            print(
+                f"Completed simulation with #initiators = {point.initiators}\n"
+            )
+        case "Number of Nodes":
+            print(f"Completed simulation with #nodes = {point.n_nodes}\n")
+        case "Delays Mean":
+            print(f"Completed simulation with delay mean = {point.delay}\n")
+        case "Packet Loss Rate":
+            print(f"Completed simulation with loss rate = {point.loss}\n")
+        case "Quantile":
+            print(f"Completed simulation with quantile = {point.quantile}\n")
+        case _:
+            print(f"Completed simulation {point}\n")
+
+# This function performs the simulations of the sweep points on a shared pool
+# of workers and returns their SimStats (in the points order)
+#   params:
+#       points - list of SweepPoint
+#       sim_name - name of the simulations (for the completion messages)
+def run_points(points, sim_name):
+    stats_list = run_sweep(
+        points,
+        N_SIM,
+        sim_manager,
+        N_WORKERS,
+        seed=shared_seed() if CRN else ROOT_SEED,
+        common=CRN,
+        antithetic=ANTITHETIC,
+        rel_width=REL_WIDTH,
+        min_sim=MIN_SIM,
+        batch_sim=BATCH_SIM,
+        streaming=STREAMING,
+        keep_raw=STORE is not None,
+        cache=CACHE,
+        on_finish=lambda point, stats: print_completed(sim_name, point)
+    )
+    for stats in stats_list:
+        save(stats)
+        results["simulations"].append(stats.summary())
+
+    return stats_list
+
+# This function plots different simulations results for different factors; all
+# the simulations are performed by the sweep engine on a shared pool of workers
 #   params:
 #       sim_name - name of the simulations
 #       tot_sims - number of simulations to perform
@@ -417,225 +489,476 @@ def factors_sim(
     bully,
     unreliable
 ):
-    ids = []    # ids of each pack of simulations in the sim_manager
-
-    for i in range(tot_sims):
-        # set SimStats
-        name = f"Bully" if bully else f"Ring"
-        if bully and not unreliable:
-            stats = set_stats(
-                n_init[i],
-                n_delays[i],
-                n_n[i],
-                name,
-                unreliable,
-                n_loss[i],
-                DELAY_Q_R
-            )
-        else:
-            stats = set_stats(
-                n_init[i],
-                n_delays[i],
-                n_n[i], name,
-                unreliable,
-                n_loss[i],
-                DELAY_Q
-            )
-        ids.append(stats.id)
-
-        # perform simulations
-        if bully:
-            bully_sim(
-                stats,
-                n_n[i],
-                n_delays[i],
-                n_init[i],
-                N_SIM,
-                unreliable,
-                n_loss[i],
-                DELAY_Q,
-                DELAY_Q_R
-            )
-        else:
-            ring_sim(
-                stats,
-                n_n[i],
-                n_delays[i],
-                n_init[i],
-                N_SIM,
-                unreliable,
-                n_loss[i],
-                DELAY_Q
-            )
+    name = f"Bully" if bully else f"Ring"
+    quantile = default_quantile(name, unreliable)
+    points = [
+        SweepPoint(
+            name,
+            n_n[i],
+            n_init[i],
+            n_delays[i],
+            unreliable,
+            n_loss[i],
+            quantile,
+            ENGINE
+        )
+        for i in range(tot_sims)
+    ]
 
-        match sim_name:
-            case "Initiators": 
-                print(f"Completed simulation with #initiators = {n_init[i]}\n")
-            case "Number of Nodes":
-                print(f"Completed simulation with #nodes = {n_n[i]}\n")
-            case "Delays Mean":
-                print(f"Completed simulation with delay mean = {n_delays[i]}\n")
-            case "Packet Loss Rate":
-                print(f"Completed simulation with loss rate = {n_loss[i]}\n")
-            case _:
-                print(f"Completed simulation {i}")
+    # perform simulations
+    points_stats = run_points(points, sim_name)
+    ids = [stats.id for stats in points_stats]   # ids in the sim_manager
 
     sim_manager.cmp_runtimes(ids, 200, sim_name)    # plot simulations results
 
-# possible titles to obtain a right plot
-#   - "Initiators" -> if the number of initiators changes
-#   - "Number of Nodes" -> if the number of nodes changes
-#   - "Delays Mean" -> if the delay mean changes
-#   - "Packet Loss Rate" -> if the packet loss changes
-sim_title = "Packet Loss Rate"
-tot_sims = 3
-n_init = [1]*tot_sims
-n_n = [5]*tot_sims
-n_delays = [DELAY]*tot_sims
-n_loss = [0.2, 0.5, 0.75]
-
-print("------------------------------------------------\n")
-print("-------------BULLY LOSS RATE ANALYSIS-----------\n")
-print("------------------------------------------------\n\n")
-
-print("Starting bully loss rate analysis...\n")
-factors_sim(
-    sim_title,
-    tot_sims,
-    n_init,
-    n_n,
-    n_delays,
-    n_loss=n_loss,
-    bully=True,
-    unreliable=True
-)
-print("Analysis completed!\n\n")
-plt.show()
-
-# ------------ NUMBER OF NODES ANALYSIS -------------
-
-# This function plots the number of messages and the turnaround time at the 
-# variation of the number of nodes
+# This function plots the number of messages and the turnaround time at the
+# variation of the number of nodes; the simulations of all the algorithm/links
+# combinations are performed in a single sweep
 #   params:
-#       max_n_nodes - maximum number of nodes 
-#       bully - if true, simulations refer to the Bully, Ring otherwise
-#       unreliable - if true, simulations under unreliable links
-def n_nodes_sim(max_n_nodes, bully = True, unreliable = False):
-    ids = []            # ids of each pack of simulations in the sim_manager
-
-    if max_n_nodes < 3: return 
-
-    for i in range(3, max_n_nodes):
+#       max_n_nodes - maximum number of nodes
+#       combinations - list of (bully, unreliable) pairs: if bully is true,
+#       simulations refer to the Bully, Ring otherwise; if unreliable is true,
+#       simulations under unreliable links
+def n_nodes_sim(max_n_nodes, combinations):
+    if max_n_nodes < 3: return
+
+    points = []
+    for bully, unreliable in combinations:
         name = f"Bully" if bully else f"Ring"
-        if bully and not unreliable:
-            stats = set_stats(
-                1,
-                DELAY,
-                i,
-                name,
-                unreliable,
-                round(LOSS, 2),
-                DELAY_Q_R
+        quantile = default_quantile(name, unreliable)
+        for i in range(3, max_n_nodes):
+            points.append(
+                SweepPoint(name, i, 1, DELAY, unreliable, round(LOSS, 2),
+                           quantile, ENGINE)
             )
-        else:
-            stats = set_stats(
-                1,
-                DELAY,
-                i,
-                name,
-                unreliable,
-                round(LOSS, 2),
-                DELAY_Q
-            )
-        ids.append(stats.id)
-
-        if bully:
-            bully_sim(
-                stats,
-                i,
-                DELAY,
-                1,
-                N_SIM,
-                unreliable,
-                round(LOSS, 2),
-                DELAY_Q,
-                DELAY_Q_R
-            )
-        else:
-            ring_sim(
-                stats,
-                i,
-                DELAY,
-                1,
-                N_SIM,
-                unreliable,
-                round(LOSS, 2),
-                DELAY_Q
-            )
-        print(f"Completed simulation with #nodes = {i}\n")
 
-    sim_manager.n_nodes_cmp(ids)
+    points_stats = run_points(points, "")
+
+    n_points = max_n_nodes - 3
+    for c, (bully, unreliable) in enumerate(combinations):
+        # ids of each pack of simulations in the sim_manager
+        ids = [stats.id for stats in points_stats[c*n_points:(c+1)*n_points]]
+        sim_manager.n_nodes_cmp(ids)
     print("\n")
 
-print("------------------------------------------------\n")
-print("-------------NUMBER OF NODES ANALYSIS-----------\n")
-print("------------------------------------------------\n\n")
-
-print("Starting number of nodes analysis of the bully reliable links...\n")
-n_nodes_sim(26, bully=True, unreliable=False)
-plt.show()
-print("Starting number of nodes analysis of the ring reliable links...\n")
-n_nodes_sim(26, bully=False, unreliable=False)
-plt.show()
-print("Starting number of nodes analysis of the bully unreliable links...\n")
-n_nodes_sim(26, bully=True, unreliable=True)
-plt.show()
-print("Starting number of nodes analysis of the ring unreliable links...\n")
-n_nodes_sim(26, bully=False, unreliable=True)
-plt.show()
-print("Analysis completed!\n\n")
-
-# ------------ RELIABLE BULLY TIMEOUTS ANALYSIS -------------
-
-# This function compare the mean of the number of messages and the turnaround 
-# time mean of the reliable Bully algorithm for different timeouts quantile 
+# This function compare the mean of the number of messages and the turnaround
+# time mean of the reliable Bully algorithm for different timeouts quantile
 def bully_timeout_analysis():
-    # generate timeouts quantiles from 0.8 to 0.98  
-    timeouts = np.round(np.arange(0.8, 1.0, 0.01), 2).tolist()      
+    # generate timeouts quantiles from 0.8 to 0.98
+    timeouts = np.round(np.arange(0.8, 1.0, 0.01), 2).tolist()
     timeouts.sort()
 
-    ids = []    # ids of each pack of simulations in the sim_manager
-
-    for t in timeouts:
-        bully_stats = set_stats(    # Bully simulation
-            INITIATORS,
-            DELAY,
-            N_NODES,
-            "Bully",
-            unreliable=False,
-            loss=LOSS,
-            delay_q=t)
-        ids.append(bully_stats.id)
-        bully_sim(
-            bully_stats,
-            N_NODES,
-            DELAY,
-            INITIATORS,
+    points = [  # Bully simulations
+        SweepPoint("Bully", N_NODES, INITIATORS, DELAY, False, LOSS, t,
+                   ENGINE)
+        for t in timeouts
+    ]
+    points_stats = run_points(points, "Quantile")
+    ids = [stats.id for stats in points_stats]   # ids in the sim_manager
+
+    sim_manager.quantile_bully_cmp(ids)
+
+# ------------ COMMANDS -------------
+
+# This function performs a single (debug) election
+#   params:
+#       args - command line arguments
+def cmd_single(args):
+    print("------------------------------------------------\n")
+    print(f"SINGLE RUN {args.algorithm.upper()}\n")
+    unreliable = args.loss > 0
+    single_run(
+        args.algorithm,
+        args.nodes,
+        args.delay,
+        args.initiators,
+        unreliable,
+        args.loss,
+        quantile_arg(args.quantile, args.algorithm, unreliable),
+        args.replication
+    )
+
+# This function performs the replications of one configuration
+#   params:
+#       args - command line arguments
+def cmd_batch(args):
+    unreliable = args.loss > 0
+    batch(
+        args.algorithm,
+        args.nodes,
+        args.delay,
+        args.initiators,
+        unreliable,
+        args.loss,
+        quantile_arg(args.quantile, args.algorithm, unreliable),
+        N_SIM
+    )
+
+# This function compares Ring and Bully on one configuration
+#   params:
+#       args - command line arguments
+def cmd_compare(args):
+    unreliable = args.loss > 0
+    seed = shared_seed() if CRN else None
+    stats = [
+        batch(
+            name,
+            args.nodes,
+            args.delay,
+            args.initiators,
+            unreliable,
+            args.loss,
+            quantile_arg(args.quantile, name, unreliable),
             N_SIM,
-            unreliable= False,
-            loss=round(LOSS, 2),
-            delay_q=DELAY_Q,
-            delay_q_r=t
+            seed
         )
-        print(f"Completed simulation with quantile = {t}\n")
-    
-    sim_manager.quantile_bully_cmp(ids)
+        for name in ("Ring", "Bully")
+    ]
+    compare(*stats)
+
+# titles of the plots of the sweeps in which one factor changes
+SWEEP_TITLES = {
+    "initiators": "Initiators",
+    "nodes": "Number of Nodes",
+    "delays": "Delays Mean",
+    "losses": "Packet Loss Rate",
+    "quantiles": "Quantile"
+}
+
+# This function performs a sweep over the full factorial grid of the given
+# factor levels; if only the number of nodes (or only the quantile of the
+# reliable Bully) changes, the means are plotted against it, otherwise the
+# histograms of the turnaround times are compared
+#   params:
+#       args - command line arguments
+def cmd_sweep(args):
+    names = args.algorithms
+    quantiles = args.quantiles
+    points = []
+    for name in names:
+        for loss in args.losses:
+            q_levels = quantiles or [default_quantile(name, loss > 0)]
+            points.extend(make_grid(
+                [name],
+                args.nodes,
+                args.initiators,
+                args.delays,
+                [loss],
+                q_levels,
+                ENGINE
+            ))
+
+    varied = [key for key in SWEEP_TITLES if len(getattr(args, key) or []) > 1]
+    title = SWEEP_TITLES[varied[0]] if len(varied) == 1 else ""
+    stats_list = run_points(points, title)
+
+    if varied == ["nodes"]:
+        n_levels = len(args.nodes)
+        for i in range(0, len(stats_list), n_levels):
+            sim_manager.n_nodes_cmp(
+                [stats.id for stats in stats_list[i:i + n_levels]]
+            )
+    elif varied == ["quantiles"] and names == ["Bully"]:
+        sim_manager.quantile_bully_cmp([stats.id for stats in stats_list])
+    else:
+        sim_manager.cmp_runtimes(
+            [stats.id for stats in stats_list], 200, title
+        )
+    show("sweep")
+
+# This function performs the whole study of the report: single runs, Ring and
+# Bully simulations, their comparisons and the factors analysis
+#   params:
+#       args - command line arguments
+def cmd_study(args):
+    # seed of the Ring vs Bully comparisons: with common random numbers the
+    # compared simulations use the same random streams
+    cmp_seed = shared_seed() if CRN else None
+
+    print("------------------------------------------------\n")
+    print("---------SINGLE RUN RING RELIABLE LINKS---------\n")
+    single_run("Ring", N_NODES, DELAY, INITIATORS, False, LOSS, DELAY_Q)
+    print("-------------- RING RELIABLE LINKS-------------\n")
+    print("------------------------------------------------\n\n")
+    ring_rel = batch("Ring", N_NODES, DELAY, INITIATORS, False, LOSS,
+                     DELAY_Q, N_SIM, cmp_seed)
+
+    print("------------------------------------------------\n")
+    print("--------SINGLE RUN RING UNRELIABLE LINKS--------\n")
+    single_run("Ring", N_NODES, DELAY, INITIATORS, True, LOSS, DELAY_Q)
+    print("-------------RING UNRELIABLE LINKS--------------\n")
+    print("------------------------------------------------\n\n")
+    ring_unrel = batch("Ring", N_NODES, DELAY, INITIATORS, True, LOSS,
+                       DELAY_Q, N_SIM, cmp_seed)
+
+    print("------------------------------------------------\n")
+    print("---------SINGLE RUN BULLY RELIABLE LINKS--------\n")
+    single_run("Bully", N_NODES, DELAY, INITIATORS, False, LOSS, DELAY_Q_R)
+    print("--------------BULLY RELIABLE LINKS--------------\n")
+    print("------------------------------------------------\n\n")
+    bully_rel = batch("Bully", N_NODES, DELAY, INITIATORS, False, LOSS,
+                      DELAY_Q_R, N_SIM, cmp_seed)
+
+    print("------------------------------------------------\n")
+    print("--------SINGLE RUN BULLY UNRELIABLE LINKS-------\n")
+    single_run("Bully", N_NODES, DELAY, INITIATORS, True, LOSS, DELAY_Q)
+    print("-------------BULLY UNRELIABLE LINKS-------------\n")
+    print("------------------------------------------------\n\n")
+    bully_unrel = batch("Bully", N_NODES, DELAY, INITIATORS, True, LOSS,
+                        DELAY_Q, N_SIM, cmp_seed)
+
+    print("------------------------------------------------\n")
+    print("--------------ALGORITHMS COMPARISON-------------\n")
+    print("------------------------------------------------\n\n")
+    print("Comparison with reliable links...\n\n")
+    compare(ring_rel, bully_rel)
+    print(f"Comparison with unreliable links (loss rate = {LOSS})...\n\n")
+    compare(ring_unrel, bully_unrel)
+    print("Comparison with unreliable links (loss rate = 0.75)...\n\n")
+    ring_075 = batch("Ring", N_NODES, DELAY, INITIATORS, True, 0.75, DELAY_Q,
+                     N_SIM, cmp_seed)
+    bully_075 = batch("Bully", N_NODES, DELAY, INITIATORS, True, 0.75,
+                      DELAY_Q, N_SIM, cmp_seed)
+    compare(ring_075, bully_075)
+    print("Comparison completed!\n\n")
+
+    print("------------------------------------------------\n")
+    print("-------------BULLY LOSS RATE ANALYSIS-----------\n")
+    print("------------------------------------------------\n\n")
+    print("Starting bully loss rate analysis...\n")
+    # possible titles to obtain a right plot
+    #   - "Initiators" -> if the number of initiators changes
+    #   - "Number of Nodes" -> if the number of nodes changes
+    #   - "Delays Mean" -> if the delay mean changes
+    #   - "Packet Loss Rate" -> if the packet loss changes
+    tot_sims = 3
+    factors_sim(
+        "Packet Loss Rate",
+        tot_sims,
+        [1]*tot_sims,
+        [5]*tot_sims,
+        [DELAY]*tot_sims,
+        n_loss=[0.2, 0.5, 0.75],
+        bully=True,
+        unreliable=True
+    )
+    show("bully_loss_rate")
+    print("Analysis completed!\n\n")
+
+    print("------------------------------------------------\n")
+    print("-------------NUMBER OF NODES ANALYSIS-----------\n")
+    print("------------------------------------------------\n\n")
+    print("Starting number of nodes analysis of the bully and ring with " +
+          "reliable and unreliable links...\n")
+    n_nodes_sim(
+        26,
+        [(True, False), (False, False), (True, True), (False, True)]
+    )
+    show("n_nodes")
+    print("Analysis completed!\n\n")
+
+    print("------------------------------------------------\n")
+    print("----------BULLY RELIABLE LINKS ANALYSIS---------\n")
+    print("------------------------------------------------\n\n")
+    print("Starting bully reliable links turnaround time analysis...\n")
+    bully_timeout_analysis()
+    show("bully_timeouts")
+    print("Analysis completed")
 
-print("------------------------------------------------\n")
-print("----------BULLY RELIABLE LINKS ANALYSIS---------\n")
-print("------------------------------------------------\n\n")
+# ------------ COMMAND LINE -------------
 
-print("Starting bully reliable links turnaround time analysis...\n")
-bully_timeout_analysis()
-plt.show()
-print("Analysis completed")
\ No newline at end of file
+# This function returns the timeout quantile given on the command line or the
+# default one of the algorithm
+#   params:
+#       quantile - quantile given on the command line (or None)
+#       name - algorithm name
+#       unreliable - boolean value, simulations with unreliable links
+def quantile_arg(quantile, name, unreliable):
+    if quantile is None:
+        return default_quantile(name, unreliable)
+    return quantile
+
+# This function converts an algorithm name of the command line
+#   params:
+#       value - "ring" or "bully" (any case)
+def algorithm_arg(value):
+    name = value.capitalize()
+    if name not in ("Ring", "Bully"):
+        raise argparse.ArgumentTypeError(f"unknown algorithm '{value}'")
+    return name
+
+# This function converts a seed of the command line ("none" for random runs)
+#   params:
+#       value - seed
+def seed_arg(value):
+    if value.lower() == "none":
+        return None
+    return int(value)
+
+# This function creates the parser of the command line and returns it with the
+# dictionary of the parsers of the commands
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON file with the options " +
+                        "(keys are the option names, e.g. \"n_sim\"); " +
+                        "command line options override it")
+    common.add_argument("--output", metavar="DIR", help="non-interactive: " +
+                        "write figures and results.json to DIR")
+    common.add_argument("--store", metavar="DIR", help="save the " +
+                        "replications of the simulations in the store DIR")
+    common.add_argument("--cache", metavar="DIR", help="take the " +
+                        "replications already performed from the cache DIR " +
+                        "and cache the new ones")
+    common.add_argument("--json", action="store_true", help="print the " +
+                        "results as JSON on stdout (messages go to stderr)")
+    common.add_argument("--no-plots", action="store_true",
+                        help="do not show the figures")
+    common.add_argument("--n-sim", type=int, default=N_SIM,
+                        help="replications (maximum with --rel-width)")
+    common.add_argument("--seed", type=seed_arg, default=ROOT_SEED,
+                        help="root seed (\"none\" for random runs)")
+    common.add_argument("--no-crn", action="store_true",
+                        help="no common random numbers in comparisons/sweeps")
+    common.add_argument("--antithetic", action="store_true",
+                        help="antithetic pairs of replications (with CRN)")
+    common.add_argument("--rel-width", type=float, default=REL_WIDTH,
+                        help="target relative half-width of the 95%% CIs")
+    common.add_argument("--min-sim", type=int, default=MIN_SIM)
+    common.add_argument("--batch-sim", type=int, default=BATCH_SIM)
+    common.add_argument("--streaming", action="store_true",
+                        help="accumulate the statistics online")
+    common.add_argument("--engine", choices=runner.ENGINES, default=ENGINE)
+    common.add_argument("--workers", type=int, default=N_WORKERS)
+
+    config = argparse.ArgumentParser(add_help=False)
+    config.add_argument("--nodes", type=int, default=N_NODES)
+    config.add_argument("--delay", type=float, default=DELAY)
+    config.add_argument("--initiators", type=int, default=INITIATORS)
+    config.add_argument("--loss", type=float, default=0.0,
+                        help="loss rate (> 0 means unreliable links)")
+    config.add_argument("--quantile", type=float, default=None,
+                        help="quantile of the timeouts (default: " +
+                        f"{DELAY_Q_R} reliable Bully, {DELAY_Q} otherwise)")
+
+    parser = argparse.ArgumentParser(
+        description="Bully and Ring election algorithms simulations"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    single = commands.add_parser("single", parents=[common, config],
+                                 help="single election with debug messages")
+    single.add_argument("algorithm", type=algorithm_arg)
+    single.add_argument("--replication", type=int, default=0,
+                        help="index of the replication (random streams)")
+    single.set_defaults(func=cmd_single)
+
+    batch = commands.add_parser("batch", parents=[common, config],
+                                help="replications of one configuration")
+    batch.add_argument("algorithm", type=algorithm_arg)
+    batch.set_defaults(func=cmd_batch)
+
+    compare = commands.add_parser("compare", parents=[common, config],
+                                  help="Ring vs Bully on one configuration")
+    compare.set_defaults(func=cmd_compare)
+
+    sweep = commands.add_parser("sweep", parents=[common],
+                                help="full factorial sweep of the factors")
+    sweep.add_argument("--algorithms", type=algorithm_arg, nargs="+",
+                       default=["Ring", "Bully"])
+    sweep.add_argument("--nodes", type=int, nargs="+", default=[N_NODES])
+    sweep.add_argument("--initiators", type=int, nargs="+",
+                       default=[INITIATORS])
+    sweep.add_argument("--delays", type=float, nargs="+", default=[DELAY])
+    sweep.add_argument("--losses", type=float, nargs="+", default=[0.0])
+    sweep.add_argument("--quantiles", type=float, nargs="+", default=None)
+    sweep.set_defaults(func=cmd_sweep)
+
+    study = commands.add_parser("study", parents=[common],
+                                help="whole study of the report")
+    study.set_defaults(func=cmd_study)
+
+    return parser, commands.choices
+
+# This function parses the command line; the options of the config file are
+# used as defaults of the command
+#   params:
+#       argv - command line arguments
+def parse_args(argv):
+    parser, commands = build_parser()
+    args = parser.parse_args(argv)
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+        commands[args.command].set_defaults(**config)
+        args = parser.parse_args(argv)
+    if args.store is not None and args.streaming:
+        parser.error("--store needs the replications (no --streaming)")
+    if args.cache is not None and args.streaming:
+        parser.error("--cache needs the replications (no --streaming)")
+    if args.command == "single" and args.streaming:
+        parser.error("single needs the replication (no --streaming)")
+
+    return args
+
+# This function sets the settings of the module from the command line
+#   params:
+#       args - command line arguments
+def configure(args):
+    global N_SIM, ROOT_SEED, CRN, ANTITHETIC, REL_WIDTH, MIN_SIM, BATCH_SIM
+    global STREAMING, ENGINE, N_WORKERS, OUTPUT_DIR, SHOW_PLOTS, STORE, CACHE
+
+    N_SIM = args.n_sim
+    ROOT_SEED = args.seed
+    CRN = not args.no_crn
+    ANTITHETIC = args.antithetic
+    REL_WIDTH = args.rel_width
+    MIN_SIM = args.min_sim
+    BATCH_SIM = args.batch_sim
+    STREAMING = args.streaming
+    ENGINE = args.engine
+    N_WORKERS = args.workers
+    OUTPUT_DIR = args.output
+    SHOW_PLOTS = not args.no_plots and not args.json
+    if args.store is not None:
+        STORE = ResultStore(args.store)
+    if args.cache is not None:
+        CACHE = ExperimentCache(args.cache)
+
+    if OUTPUT_DIR is not None or not SHOW_PLOTS:
+        import matplotlib
+        matplotlib.use("Agg")   # no windows
+    if OUTPUT_DIR is not None:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# This function runs a command of the command line and returns the exit status
+# (0 success, 1 invalid experiment, 2 invalid command line)
+#   params:
+#       argv - command line arguments (None for sys.argv)
+def main(argv = None):
+    args = parse_args(argv)
+    configure(args)
+    results["command"] = args.command
+    results["settings"] = {
+        key: value for key, value in vars(args).items() if key != "func"
+    }
+
+    # with --json only the results are printed on stdout
+    out = sys.stderr if args.json else sys.stdout
+    try:
+        with contextlib.redirect_stdout(out):
+            args.func(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if OUTPUT_DIR is not None:
+        with open(os.path.join(OUTPUT_DIR, "results.json"), "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
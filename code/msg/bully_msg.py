@@ -1,10 +1,49 @@
-# this class represents a message passed during bully algorithm execution
+from enum import IntEnum
+
+# message kinds of the bully algorithm (same values of the event kernel)
+class BullyKind(IntEnum):
+    ELECTION = 0
+    OK = 1
+    COORDINATOR = 2
+    ACK = 3
+
+# maximum number of released messages kept for reuse
+MAX_FREE = 1024
+
+# this class represents a message passed during bully algorithm execution;
+# every message is received once, so the receiver can release it and it is
+# reused by the next send (free list)
 #    attributes:
-#        type - a string representing the type of the message
-#        (coordinator, election or ok)
+#        type - kind of the message (BullyKind: coordinator, election, ok or
+#        ack)
 #        sender_id - it is the id of the node that sent the message
 class BullyMsg:
-     
+    __slots__ = ("type", "sender_id")
+
+    # released messages
+    free = []
+
     def __init__(self, type, sender_id):
-        self.type = type      
-        self.sender_id = sender_id         
\ No newline at end of file
+        self.type = type
+        self.sender_id = sender_id
+
+    def __repr__(self):
+        return f"{self.type.name}(sender={self.sender_id})"
+
+    # method to create a message, reusing a released one if available
+    #   params:
+    #       type - kind of the message
+    #       sender_id - id of the node that sends the message
+    @classmethod
+    def new(cls, type, sender_id):
+        if cls.free:
+            msg = cls.free.pop()
+            msg.type = type
+            msg.sender_id = sender_id
+            return msg
+        return cls(type, sender_id)
+
+    # method to release the message once received, to be reused
+    def release(self):
+        if len(BullyMsg.free) < MAX_FREE:
+            BullyMsg.free.append(self)
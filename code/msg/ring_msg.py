@@ -1,12 +1,30 @@
+from enum import IntEnum
+
+# message kinds of the ring algorithm (same values of the event kernel)
+class RingKind(IntEnum):
+    ELECTION = 0
+    COORDINATOR = 1
+    ACK_ELECTION = 2
+    ACK_COORDINATOR = 3
+
+# kinds of the acknowledgements
+ACKS = (RingKind.ACK_ELECTION, RingKind.ACK_COORDINATOR)
+# maximum number of released messages kept for reuse
+MAX_FREE = 1024
+
 # this class represents a message passed during ring algorithm execution
 #    attributes:
-#        type - a string representing the type of the message
-#        (coordinator, election, ACK)
+#        type - kind of the message (RingKind: coordinator, election, ACKs)
 #        transaction_id - (unique) id of the messages coming from the same
 #         initiator election
 #        sender - message sender
 #        event - event for the ack 
 class RingMsg():
+    __slots__ = ("type", "transaction_id", "sender", "ack_event")
+
+    # released acknowledgements (an ACK is received once, the other messages
+    # can be retransmitted and are not reused)
+    free = []
 
     def __init__(self, type, transaction_id, sender, event = None):
         self.type = type
@@ -22,6 +40,35 @@ class RingMsg():
                 self.sender==__o.sender
             )
         return False
+
+    def __repr__(self):
+        return (
+            f"{self.type.name}(transaction={self.transaction_id}, " +
+            f"sender={self.sender})"
+        )
+
+    # method to create an acknowledgement, reusing a released one if available
+    #   params:
+    #       type - kind of the acknowledgement
+    #       transaction_id - id of the transaction
+    #       sender - message sender
+    #       event - event for the ack
+    @classmethod
+    def new_ack(cls, type, transaction_id, sender, event):
+        if cls.free:
+            msg = cls.free.pop()
+            msg.type = type
+            msg.transaction_id = transaction_id
+            msg.sender = sender
+            msg.ack_event = event
+            return msg
+        return cls(type, transaction_id, sender, event)
+
+    # method to release an acknowledgement once received, to be reused
+    def release(self):
+        self.ack_event = None
+        if len(RingMsg.free) < MAX_FREE:
+            RingMsg.free.append(self)
     
     # method to give to the message an ack event to be triggered
     #    params:
@@ -29,22 +76,70 @@ class RingMsg():
     def set_event(self, event):
         self.ack_event = event
 
+# this class represents the ids collected by the ELECTION messages of a cycle:
+# a byte per node marks the visited ones and the highest id is kept, so both
+# checking a node and selecting the coordinator are O(1). The cycle starts
+# from the initiator and follows the ring, so the list of the ids (in order
+# of visit) is rebuilt from the marks when needed (debug messages)
+#    attributes:
+#        visited - bytearray, visited[id] is 1 if the node id was visited
+#        start - id of the node that starts the cycle (the initiator)
+#        max_id - highest id visited (-1 if none)
+class RingIds():
+    __slots__ = ("visited", "start", "max_id")
+
+    def __init__(self, n_nodes, start):
+        self.visited = bytearray(n_nodes)
+        self.start = start
+        self.max_id = -1
+
+    def __contains__(self, id):
+        return self.visited[id] == 1
+
+    def __repr__(self):
+        return repr(self.ids)
+
+    # method to mark a node as visited
+    #   params:
+    #       id - id of the node
+    def add(self, id):
+        self.visited[id] = 1
+        if id > self.max_id:
+            self.max_id = id
+
+    # list of the visited ids in order of visit
+    @property
+    def ids(self):
+        n = len(self.visited)
+        return [
+            id % n for id in range(self.start, self.start + n)
+            if self.visited[id % n]
+        ]
+
 # this class represents an ELECTION message (without ack)
 #    attributes:
-#        ids - list of all nodes ids collected so far 
+#        visited - RingIds of all nodes ids collected so far (shared by the
+#         messages of the cycle)
 class ElectionRingMsg(RingMsg):
+    __slots__ = ("visited",)
+
+    def __init__(self, transaction_id, sender, visited):
+        super().__init__(RingKind.ELECTION, transaction_id, sender)
+        self.visited = visited
 
-    def __init__(self, transaction_id, sender, ids):
-        super().__init__("ELECTION", transaction_id, sender)
-        self.ids = ids
+    # list of all nodes ids collected so far (debug)
+    @property
+    def ids(self):
+        return self.visited.ids
 
 # this class represents a COORDINATOR message (without ack)
 #    attributes:
 #        elected - id of the new coordinator
 #        initiator - id of the initiator of the messages cycle
 class CoordinatorRingMsg(RingMsg):
+    __slots__ = ("initiator", "elected")
 
     def __init__(self, transaction_id, sender, initiator, elected):
-        super().__init__("COORDINATOR", transaction_id, sender)
+        super().__init__(RingKind.COORDINATOR, transaction_id, sender)
         self.initiator = initiator
-        self.elected = elected
\ No newline at end of file
+        self.elected = elected
@@ -0,0 +1,66 @@
+# this class represents the agreement of the active nodes of an election on
+# the new coordinator, shared by the nodes of a simulation: it counts the
+# active nodes that did not elect a coordinator yet and the votes of each
+# candidate, and the nodes update it when they elect a coordinator or crash,
+# so the end of the election (and a split decision) is known in O(1) instead
+# of checking all the nodes
+#   attributes:
+#       n_nodes - number of nodes of the network
+#       n_undecided - number of active nodes without a coordinator
+#       votes - dictionary, number of active nodes electing each candidate
+#       (only candidates with votes)
+class AgreementTracker:
+
+    __slots__ = ("n_nodes", "n_undecided", "votes")
+
+    def __init__(self, n_nodes):
+        self.n_nodes = n_nodes
+        self.votes = {}
+        self.reset()
+
+    # method to set all the nodes as active and undecided (new election)
+    def reset(self):
+        self.n_undecided = self.n_nodes
+        self.votes.clear()
+
+    # method to add an active node
+    #   params:
+    #       elected - coordinator elected by the node (-1 if none)
+    def add(self, elected):
+        if elected == -1:
+            self.n_undecided += 1
+        else:
+            self.votes[elected] = self.votes.get(elected, 0) + 1
+
+    # method to remove an active node (it crashed)
+    #   params:
+    #       elected - coordinator elected by the node (-1 if none)
+    def remove(self, elected):
+        if elected == -1:
+            self.n_undecided -= 1
+        elif self.votes[elected] == 1:
+            del self.votes[elected]
+        else:
+            self.votes[elected] -= 1
+
+    # method to change the coordinator elected by an active node
+    #   params:
+    #       old - coordinator elected before (-1 if none)
+    #       new - coordinator elected now
+    def change(self, old, new):
+        if old != new:
+            self.remove(old)
+            self.add(new)
+
+    # method that returns [True, electee] if all the active nodes elected a
+    # coordinator (electee is -1 if they disagree, -2 if there are no active
+    # nodes), [False, -1] otherwise
+    def finished(self):
+        if self.n_undecided != 0:
+            return [False, -1]
+        if len(self.votes) == 0:
+            return [True, -2]
+        if len(self.votes) > 1:
+            return [True, -1]
+
+        return [True, next(iter(self.votes))]
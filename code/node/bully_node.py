@@ -1,8 +1,7 @@
-from numpy import random
 from node.node import Node
-from msg.bully_msg import BullyMsg
-from utils import delay, max_delay
-from simpy import Store, core, AnyOf
+from msg.bully_msg import BullyKind, BullyMsg
+from utils import delays, max_delay, uniforms
+from simpy import Store
 
 # this class represents a node in the bully algorithm execution
 #   attributes:
@@ -10,158 +9,230 @@ from simpy import Store, core, AnyOf
 #       el_in_progress - true if the node is already participating in the
 #       election
 #       blocked - true if the node received at least an OK message
-#       missing_ack - list of nodes ids for which the node is waiting an ack
+#       missing_ack - set of nodes ids for which the node is waiting an ack
 #       max_wait - max timeout to wait (unreliable)
 #       sim_stats - reference to the SimStats of the simulation
 #       sim_id - unique id of the execution for the SimStats of the simulation
 #       crashed - if true, the node crashed
-#       queue - messages queue 
-#       wait_msg - event to be triggered if all the acks were received
+#       queue - messages queue (mailbox)
+#       receiver - receive process of the node (mailbox loop)
+#       phase - kind of the message retransmitted (unreliable)
+#       waiting - true if the node is waiting for the acks of a round
+#       round - counter of the retransmission rounds
 #       max_active_id - id of greatest node that gave OK
 #       loss_rate - packets loss rate
 #       debug_mode - if true the nodes and this class will print debug messages
 #       finish - reference to the event to trigger to stop the election
 #       peers - network nodes
+#       rng - random number generator (if None, the global ones are used)
+#       agreement - AgreementTracker of the election (shared by the nodes)
 class BullyNode(Node):
 
-    def __init__(self, env, id, sim_stats, sim_id, delay_mean, delay_q):
+    def __init__(
+        self,
+        env,
+        id,
+        sim_stats,
+        sim_id,
+        delay_mean,
+        delay_q,
+        agreement
+    ):
         super().__init__(env, id, delay_mean)
         self.elected = -1
         self.el_in_progress = False
         self.blocked = False
-        self.missing_ack = []
+        self.missing_ack = set()
+        self.phase = BullyKind.ELECTION
+        self.waiting = False
+        self.round = 0
+        # the receive process is started by reset
+        self.receiver = None
         # maximum wait is computed using the quantile given by delay_q (saved as
-        # attribute to reduce calls to scipy)
+        # attribute)
         self.max_wait = max_delay(delay_q, delay_mean)
         # reference to sim_stat class to record all statistics during simulation
         self.sim_stats = sim_stats
         self.sim_id = sim_id
+        self.rng = None
+        self.agreement = agreement
 
-    # method to send message with reliable links
+    # method to make the node crash
+    def crash(self):
+        if not self.crashed:
+            self.agreement.remove(self.elected)
+        super().crash()
+
+    # method to make a crashed node active again
+    def recover(self):
+        if self.crashed:
+            self.agreement.add(self.elected)
+        super().recover()
+
+    # method to set the coordinator elected by the node
     #   params:
-    #       type - message type
-    #       dest_id - destination node id
-    def reliable_send(self, type, dest_id):
-        
-        if not self.peers[dest_id].crashed:
-            # create the election message
-            election_msg = BullyMsg(type, self.id)  
+    #       elected - id of the coordinator
+    def set_elected(self, elected):
+        if not self.crashed:
+            self.agreement.change(self.elected, elected)
+        self.elected = elected
+
+    # method to send a message to a group of nodes (multicast): the delays of
+    # all the destinations (and their losses, with unreliable links) are
+    # drawn in one batch and every delivery is a callback of the timeout of
+    # the message, so no process is created; messages to crashed nodes are not
+    # sent. Every message is counted in the SimStats
+    #   params:
+    #       type - message type (BullyKind)
+    #       dest_ids - destination nodes ids (in order of sending)
+    def multicast(self, type, dest_ids):
+        dest_ids = [i for i in dest_ids if not self.peers[i].crashed]
+        msg_delays = delays(self.delay_mean, len(dest_ids), self.rng)
+        unreliable = self.loss_rate != 0
+        if unreliable:
+            losses = uniforms(len(dest_ids), self.rng)
 
+        for i, dest_id in enumerate(dest_ids):
             if self.debug_mode:
-                print(f"Time {self.env.now:.2f}: Node {self.id} sends {type} " +
-                      "to node {dest_id}")
+                print(f"Time {self.env.now:.2f}: Node {self.id} sends " +
+                      f"{type.name} to node {dest_id}")
 
-            msg_delay = delay(self.delay_mean)
             # increase message counter
-            self.sim_stats.add_msg(self.sim_id, msg_delay)      
-            yield self.env.timeout(msg_delay)
-            # send the message
-            yield self.peers[dest_id].queue.put(election_msg)       
-            self.env.process(self.peers[dest_id].reliable_receive())
-
-    # method to receive messages with reliable links
-    def reliable_receive(self):
-        
-        msg = yield self.queue.get()
-        if msg.type == "ELECTION":
+            self.sim_stats.add_msg(self.sim_id, msg_delays[i])
+            if not unreliable or losses[i] > self.loss_rate: # is packet lost?
+                timeout = self.env.timeout(msg_delays[i], (type, dest_id))
+                timeout.callbacks.append(self.deliver)
+            elif self.debug_mode:
+                print(f"\033[31mTime {self.env.now:.2f}: Lost {type.name} " +
+                      f"message from node {self.id} to node {dest_id}\033[0m")
+
+    # method to send a message to a node
+    #   params:
+    #       type - message type (BullyKind)
+    #       dest_id - destination node id
+    def send(self, type, dest_id):
+        self.multicast(type, (dest_id,))
+
+    # method to deliver a message when its delay expires (callback of its
+    # timeout): the message is put in the mailbox of the destination
+    #   params:
+    #       event - timeout of the message, its value is (type, dest_id)
+    def deliver(self, event):
+        type, dest_id = event.value
+        self.peers[dest_id].queue.put(BullyMsg.new(type, self.id))
+
+    # method to start a timer: the callback is called after the wait, while the
+    # node keeps handling its messages
+    #   params:
+    #       wait - time to wait
+    #       callback - function called with the expired timeout
+    #       value - value of the timeout (passed to the callback)
+    def set_timer(self, wait, callback, value = None):
+        self.env.timeout(wait, value).callbacks.append(callback)
+
+    # method to trigger the end of the election (the simulation stops it)
+    #   params:
+    #       electee - elected node (-1 if the nodes disagree)
+    def end_election(self, electee):
+        if not self.finish.triggered:
+            self.finish.succeed(electee)    # set value of event
+
+    # mailbox of the node: the messages are handled one at a time in order of
+    # arrival by the handler of the links (the waits of the handlers are
+    # timers, so they do not block the next messages)
+    def receive(self):
+        while True:
+            msg = yield self.queue.get()
+            if self.loss_rate == 0:
+                self.reliable_receive(msg)
+            else:
+                self.unreliable_receive(msg)
+
+    # method to handle a message with reliable links
+    #   params:
+    #       msg - message received
+    def reliable_receive(self, msg):
+        type, sender_id = msg.type, msg.sender_id
+        if sender_id != -1:     # the message is reused by the next sends
+            msg.release()
+        if type == BullyKind.ELECTION:
             
             if self.debug_mode:
-                if msg.sender_id == -1: # begin of the election
+                if sender_id == -1: # begin of the election
                     print(f"\033[94mTime {self.env.now:.2f}: Node {self.id} " +
                             "detected coordinator crash\033[0m")
                 else:
                     print(f"Time {self.env.now:.2f}: Node {self.id} receives " +
-                            "ELECTION message from node {msg.sender_id}")
+                            f"ELECTION message from node {sender_id}")
 
-            if self.id > msg.sender_id:
+            if self.id > sender_id:
                 # if id is greater than sender: stop election
-                if msg.sender_id != -1:     
-                    self.env.process(self.reliable_send("OK", msg.sender_id))
+                if sender_id != -1:     
+                    self.send(BullyKind.OK, sender_id)
                 if not self.el_in_progress:
                     self.el_in_progress = True  
-                    # each node can only start election ONCE           
-                    for i in range(self.id + 1, len(self.peers)):  
-                        # send ELECTION messages to all nodes with greater id         
-                        self.env.process(self.reliable_send("ELECTION", i))
+                    # each node can only start election ONCE: send ELECTION
+                    # messages to all nodes with greater id
+                    self.multicast(
+                        BullyKind.ELECTION,
+                        range(self.id + 1, len(self.peers))
+                    )
 
                     # wait for a certain time to be passed ...
-                    # if it wasn't stopped it is elected
-                    yield self.env.timeout(2 * self.max_wait)
-                    if not self.blocked:
-                        for i in range(len(self.peers)):
-                            self.env.process(
-                                self.reliable_send(
-                                    "COORDINATOR",
-                                    self.peers[i].id)
-                                )
-    
-                    self.el_in_progress = False # election of node ended
+                    self.set_timer(2 * self.max_wait, self.election_timeout)
 
-        elif msg.type == "OK":
+        elif type == BullyKind.OK:
             if self.debug_mode:
                 print(f"Time {self.env.now:.2f}: Node {self.id} receives OK "
-                        "message from node {msg.sender_id}")
+                        f"message from node {sender_id}")
 
             self.blocked = True # stop election
 
-        elif msg.type == "COORDINATOR":
+        elif type == BullyKind.COORDINATOR:
             if self.debug_mode:
                 print(f"\033[92mTime {self.env.now:.2f}: Node {self.id} " +
-                        "elects {msg.sender_id} as coordinator\033[0m")
+                        f"elects {sender_id} as coordinator\033[0m")
             
-            self.elected = msg.sender_id
+            self.set_elected(sender_id)
             # if active, set election status of node
             self.el_in_progress = False
             # if election terminated trigger finish event         
             is_finished, electee = self.finished()          
             if is_finished:
-                self.finish.succeed(electee)    # set value of event
-                raise core.StopSimulation("")
+                self.end_election(electee)
 
-    # method to send messages with unreliable links
+    # method called when the wait of an election ends (reliable links): if it
+    # wasn't stopped the node is elected
     #   params:
-    #       type - message type
-    #       dest_id - destination node id
-    def unreliable_send(self, type, dest_id):
-        
-        if not self.peers[dest_id].crashed:
-            # create the election message
-            election_msg = BullyMsg(type, self.id)          
-            
-            if self.debug_mode:
-                print(f"Time {self.env.now:.2f}: Node {self.id} sends {type} " +
-                        " to node {dest_id}")
-
-            msg_delay = delay(self.delay_mean)   
-            # increase message counter       
-            self.sim_stats.add_msg(self.sim_id, msg_delay) 
-            if random.uniform(0, 1) > self.loss_rate:   # is packet lost?
-                yield self.env.timeout(msg_delay)
-                # send the message
-                yield self.peers[dest_id].queue.put(election_msg)       
-                self.env.process(self.peers[dest_id].unreliable_receive())
-            elif self.debug_mode:
-                print(f"\033[31mTime {self.env.now:.2f}: Lost {type} message " +
-                      "from node {self.id} to node {dest_id}\033[0m")
+    #       event - expired timeout
+    def election_timeout(self, event):
+        if not self.blocked:
+            self.multicast(BullyKind.COORDINATOR, range(len(self.peers)))
+    
+        self.el_in_progress = False # election of node ended
 
-    # method to receive messages with unreliable links
-    def unreliable_receive(self):
-        msg = yield self.queue.get()
+    # method to handle a message with unreliable links
+    #   params:
+    #       msg - message received
+    def unreliable_receive(self, msg):
+        type, sender_id = msg.type, msg.sender_id
+        if sender_id != -1:     # the message is reused by the next sends
+            msg.release()
         # keep track of highest node id that ever interacted with this node
-        self.max_active_id = max(self.max_active_id, msg.sender_id)
-        if msg.type == "ELECTION":
+        self.max_active_id = max(self.max_active_id, sender_id)
+        if type == BullyKind.ELECTION:
             if self.debug_mode:
-                if msg.sender_id == -1:         # begin of the election
+                if sender_id == -1:         # begin of the election
                     print(f"\033[94mTime {self.env.now:.2f}: Node {self.id} " +
                           "detected coordinator crash\033[0m")
                 else:
                     print(f"Time {self.env.now:.2f}: Node {self.id} receives " +
-                          "ELECTION message from node {msg.sender_id}")
+                          f"ELECTION message from node {sender_id}")
 
-            if self.id > msg.sender_id:   
+            if self.id > sender_id:   
                 # if id is greater than sender: stop election  
-                if msg.sender_id != -1:     
-                    self.env.process(self.unreliable_send("OK", msg.sender_id))
+                if sender_id != -1:     
+                    self.send(BullyKind.OK, sender_id)
 
                 # OPTIMIZATION: don't even start election if you already know of
                 # a node with higher ID
@@ -170,107 +241,108 @@ class BullyNode(Node):
                     # are not counted)
                     self.el_in_progress = True
                     # send ELECTION messages to all nodes with greater id
-                    self.missing_ack = []
-                    self.missing_ack.extend(
+                    self.missing_ack = set(
                         range(self.id + 1, len(self.peers) - 1)
                     )
-                    yield self.env.process(self.retransmit("ELECTION"))
-                    
-                    if not self.blocked:
-                        # no OK received: this node is the one with highest id
-                        # prepare to wait for all nodes to send ACK of
-                        # COORDINATOR message
-                        self.missing_ack = []
-                        self.missing_ack.extend(range(0, len(self.peers) - 1))
-                        # do not send COORDINATOR message to self
-                        self.missing_ack.remove(self.id)
-                        yield self.env.process(self.retransmit("COORDINATOR"))
-                        # election of group terminated trigger finish event
-                        self.elected = self.id
-                        self.finish.succeed(self.id)
-                        raise core.StopSimulation("") 
+                    self.phase = BullyKind.ELECTION
+                    self.retransmit()
             else:    
-                self.env.process(self.unreliable_send("ACK", msg.sender_id))               
+                self.send(BullyKind.ACK, sender_id)
 
-        elif msg.type == "OK":
+        elif type == BullyKind.OK:
             if self.debug_mode:
                 print(f"Time {self.env.now:.2f}: Node {self.id} receives OK " +
-                      "message from node {msg.sender_id}")
+                      f"message from node {sender_id}")
             
-            self.update_ack_list(msg.sender_id)
+            self.update_ack_list(sender_id)
             self.blocked = True # stop election
 
-        elif msg.type == "ACK":
+        elif type == BullyKind.ACK:
             if self.debug_mode:
                 print(f"Time {self.env.now:.2f}: Node {self.id} receives ACK " +
-                      "message from node {msg.sender_id}")
+                      f"message from node {sender_id}")
             
-            self.update_ack_list(msg.sender_id)
+            self.update_ack_list(sender_id)
 
-        elif msg.type == "COORDINATOR":
+        elif type == BullyKind.COORDINATOR:
             if self.debug_mode:
                 print(f"\033[92mTime {self.env.now:.2f}: Node {self.id} " +
-                      "elects {msg.sender_id} as coordinator\033[0m")
+                      f"elects {sender_id} as coordinator\033[0m")
             
             # send ACK
-            self.env.process(self.unreliable_send("ACK", msg.sender_id))        
-            self.elected = msg.sender_id
+            self.send(BullyKind.ACK, sender_id)
+            self.set_elected(sender_id)
             
             self.el_in_progress = False # if active, set election status of node
 
-    # method to udpate ack list counter and trigger appropriate event when all 
-    # answers arrived
+    # method to udpate ack list counter and end the retransmission round when
+    # all answers arrived (at the same time, after the current message)
     #   params:
     #       sender - message sender
     def update_ack_list(self, sender): 
         
-        # remove the node from missing_ack list
-        if sender in self.missing_ack:      
-            self.missing_ack.remove(sender)
+        # remove the node from missing_ack set
+        self.missing_ack.discard(sender)
 
-        if len(self.missing_ack) == 0 and not self.wait_msg.triggered:
-            self.wait_msg.succeed() # trigger event
-    
-    # method to send message that will be retransmitted if not all answers are
-    # received
+        if len(self.missing_ack) == 0 and self.waiting:
+            self.waiting = False
+            self.set_timer(0, self.retransmit)
+
+    # method called when the timeout of a retransmission round expires
+    #   params:
+    #       event - expired timeout, its value is the round
+    def round_timeout(self, event):
+        if self.waiting and event.value == self.round:
+            self.waiting = False
+            self.retransmit()
+
+    # method to perform a retransmission round of the message of the current
+    # phase: it is sent to a snapshot of the missing nodes in order of id (the
+    # acks of the round can change the set) and the round ends when all
+    # answers arrived or after a timeout. When there are no missing answers
+    # the ELECTION phase is followed by the COORDINATOR one (if no OK was
+    # received), which ends the election
+    # OPTIMIZATION
+    # If while retransmitting a message you discover a node of higher ID quit
     #   params:
-    #       msg_type - message type
-    def retransmit(self, msg_type):
-        self.wait_msg = self.env.event()
-        # OPTIMIZATION
-        # If while retransmitting a message you discover a node of higher ID
-        # quit
-        while len(self.missing_ack) != 0 and not self.blocked:
-            for n_id in self.missing_ack:
-                self.env.process(self.unreliable_send(msg_type, n_id))
+    #       event - expired timeout (if called by a timer)
+    def retransmit(self, event = None):
+        if len(self.missing_ack) != 0 and not self.blocked:
+            self.multicast(self.phase, sorted(self.missing_ack))
             # set timeout /wait for answers
-            yield AnyOf(
-                self.env,
-                [self.wait_msg, self.env.timeout(2 * self.max_wait)]
-            )
+            self.round += 1
+            self.waiting = True
+            self.set_timer(2 * self.max_wait, self.round_timeout, self.round)
 
-    # method that return array with two values:
+        elif self.phase == BullyKind.ELECTION:
+            if not self.blocked:
+                # no OK received: this node is the one with highest id
+                # prepare to wait for all nodes to send ACK of
+                # COORDINATOR message
+                self.missing_ack = set(range(0, len(self.peers) - 1))
+                # do not send COORDINATOR message to self
+                self.missing_ack.discard(self.id)
+                self.phase = BullyKind.COORDINATOR
+                self.retransmit()
+
+        else:
+            # election of group terminated trigger finish event
+            self.set_elected(self.id)
+            self.end_election(self.id)
+
+    # method that return array with two values (kept by the agreement tracker):
     #   params: 
     #       first - is True if all nodes decided on coordinator
     #       second - is an integer (-1 = different coordinators, otherwise it
     #       indicates the node that was elected)
     def finished(self):
-        electee = -2
-        for i in range(len(self.peers)):
-            if not self.peers[i].crashed:   # count only non crashed processes
-                if self.peers[i].elected == -1:  
-                    return [False, -1]
-                else:
-                    # check that all nodes elected the same coordinator
-                    if electee == -2:
-                        electee = self.peers[i].elected
-                    elif electee != -1:
-                        if electee != self.peers[i].elected :
-                            electee = -1
-
-        return [True, electee]
+        return self.agreement.finished()
 
-    # resets node to default status
+    # resets node to default status (with the same environment, reset by the
+    # caller, the queue is reused); the agreement tracker is reset by the
+    # simulation. The receive process is kept if it is still waiting for a
+    # message, otherwise (its get was triggered or it did not start) a new one
+    # is started
     #   params:
     #       env - simpy environment
     def reset(self, env):
@@ -278,10 +350,23 @@ class BullyNode(Node):
         self.crashed = False
         self.elected = -1
         self.el_in_progress = False
-        self.missing_ack = []
-        self.env = env
-        self.queue = Store(env)
-        self.wait_msg = env.event()
+        self.missing_ack.clear()
+        self.phase = BullyKind.ELECTION
+        self.waiting = False
+        self.round = 0
+        listening = (
+            env is self.env and
+            self.receiver is not None and
+            self.receiver.is_alive and
+            not self.receiver.target.triggered
+        )
+        if env is self.env:
+            self.clear_queue(keep_gets=listening)
+        else:
+            self.env = env
+            self.queue = Store(env)
+        if not listening:
+            self.receiver = env.process(self.receive())
         self.max_active_id = -1
         self.sim_id+=1
         
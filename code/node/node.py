@@ -26,4 +26,18 @@ class Node:
 
     # method to make the node crash
     def crash(self):
-        self.crashed = True
\ No newline at end of file
+        self.crashed = True
+
+    # method to make a crashed node active again
+    def recover(self):
+        self.crashed = False
+
+    # method to empty the messages queue in place (the queue is reused in the
+    # next replication)
+    #   params:
+    #       keep_gets - if true, the pending get requests are kept
+    def clear_queue(self, keep_gets = False):
+        self.queue.items.clear()
+        self.queue.put_queue.clear()
+        if not keep_gets:
+            self.queue.get_queue.clear()
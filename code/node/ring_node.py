@@ -1,7 +1,6 @@
-from numpy import random
-
 from node.node import Node
-from msg.ring_msg import CoordinatorRingMsg, ElectionRingMsg, RingMsg
+from msg.ring_msg import ACKS, CoordinatorRingMsg, ElectionRingMsg, RingKind
+from msg.ring_msg import RingMsg
 
 import utils
 
@@ -18,6 +17,8 @@ import utils
 #       rng - random number generator
 #       id_stats - unique id of the execution for the SimStats of the simulation
 #       sim_stats - reference to the SimStats of the simulation
+#       successors - SuccessorIndex of the active nodes (shared by the nodes)
+#       receiver - receive process of the node
 class RingNode(Node):
 
     def __init__(
@@ -31,7 +32,8 @@ class RingNode(Node):
         timeout,
         rng,
         id_stats,
-        sim_stats
+        sim_stats,
+        successors
     ):
        super().__init__(env, id, delay_mean)
        self.unreliable = unreliable
@@ -40,12 +42,42 @@ class RingNode(Node):
        self.timeout=timeout
        self.crashed=False
        self.initiator=False
-       self.rng = rng   # debug
+       self.rng = rng
        self.id_stats = id_stats
        self.sim_stats = sim_stats
+       self.successors = successors
        
        # the node can receive and manage messages
-       self.env.process(self.receive())     
+       self.receiver = self.env.process(self.receive())
+
+    # method to reset the node for a new replication in the same (reset)
+    # environment: the receive process is kept if it is still waiting for a
+    # message, otherwise (its get was triggered or it did not start) a new one
+    # is started
+    #   params:
+    #       id_stats - id of the new execution in the SimStats
+    def reset(self, id_stats):
+        self.crashed = False
+        self.initiator = False
+        self.elected = -1
+        self.id_stats = id_stats
+        waiting = (
+            self.receiver.is_alive and
+            not self.receiver.target.triggered
+        )
+        self.clear_queue(keep_gets=waiting)
+        if not waiting:
+            self.receiver = self.env.process(self.receive())
+
+    # method to make the node crash
+    def crash(self):
+        super().crash()
+        self.successors.crash(self.id)
+
+    # method to make a crashed node active again
+    def recover(self):
+        super().recover()
+        self.successors.recover(self.id)
 
     # this method set the initiator parameter to true
     def initiate(self):
@@ -74,13 +106,14 @@ class RingNode(Node):
             yield self.peers[next].queue.put(msg)       # send the message 
 
             if self.debug_mode:
-                if msg.type == "ELECTION":
+                if msg.type == RingKind.ELECTION:
                     print(f"Time {(self.env.now-delay):.2f}: Node {self.id} " +
-                          "sends {msg.type} with IDs {msg.ids} to node {next}")
-                elif msg.type == "COORDINATOR":
+                          f"sends {msg.type.name} with IDs {msg.ids} to node " +
+                          f"{next}")
+                elif msg.type == RingKind.COORDINATOR:
                     print(f"Time {(self.env.now-delay):.2f}: Node {self.id} " +
-                          "sends {msg.type} with ID {msg.elected} to node " +
-                          "{next}")
+                          f"sends {msg.type.name} with ID {msg.elected} to " +
+                          f"node {next}")
 
             # if we have reliable links we do not need acks (replication)
             if not self.unreliable: break   
@@ -94,7 +127,7 @@ class RingNode(Node):
             else:   # don't stop, restart cycle for resending the message
                 if self.debug_mode:
                     print(f"Time {(self.env.now-delay):.2f}: Node {self.id} " +
-                          "didn't received ACK_{msg.type} from {next}, " +
+                          f"didn't received ACK_{msg.type.name} from {next}, " +
                           "resend message")
 
     # this method is used to send an ack
@@ -104,8 +137,8 @@ class RingNode(Node):
     def send_ack(self, msg, receiver):
 
         if self.debug_mode: 
-            print(f"Time {self.env.now:.2f}: Node {self.id} sends {msg.type} " +
-                  "to node {receiver}")
+            print(f"Time {self.env.now:.2f}: Node {self.id} sends " +
+                  f"{msg.type.name} to node {receiver}")
         
         delay = utils.delay(self.delay_mean, rng=self.rng)
         self.sim_stats.add_msg(self.id_stats, delay)
@@ -122,19 +155,21 @@ class RingNode(Node):
             # unreliable links packet losses
             if (
                 self.unreliable and
-                random.uniform(0,1) < self.loss and
+                utils.uniform(self.rng) < self.loss and
                 msg.sender!=-1
             ):    
+                if msg.type in ACKS:
+                    msg.release()
                 continue      
 
             if self.debug_mode:
                 print(f"Time {self.env.now:.2f}: Node {self.id} receives " +
-                      "{msg.type} from node {msg.sender}")
+                      f"{msg.type.name} from node {msg.sender}")
 
-            if msg.type == "ELECTION":
+            if msg.type == RingKind.ELECTION:
                 # the election message performed a cycle
-                if self.id in msg.ids:      
-                    leader = max(msg.ids)   # select the new coordinator
+                if self.id in msg.visited:      
+                    leader = msg.visited.max_id   # select the new coordinator
                     self.elected = leader
                     self.env.process(
                         self.send(
@@ -147,10 +182,14 @@ class RingNode(Node):
                         )
                     )
                 else:   # the node receives an election message
-                    msg.ids.append(self.id)
+                    msg.visited.add(self.id)
                     self.env.process(
                         self.send(
-                            ElectionRingMsg(msg.transaction_id,self.id, msg.ids)
+                            ElectionRingMsg(
+                                msg.transaction_id,
+                                self.id,
+                                msg.visited
+                            )
                         )
                     )
 
@@ -158,8 +197,8 @@ class RingNode(Node):
                 if self.unreliable and msg.sender!=-1:      
                     self.env.process(
                         self.send_ack(
-                            RingMsg(
-                                "ACK_ELECTION",
+                            RingMsg.new_ack(
+                                RingKind.ACK_ELECTION,
                                 msg.transaction_id,
                                 self.id,
                                 msg.ack_event
@@ -168,14 +207,14 @@ class RingNode(Node):
                         )
                     )
 
-            elif msg.type == "COORDINATOR":
+            elif msg.type == RingKind.COORDINATOR:
 
                 if self.id != msg.initiator:        
                     if self.unreliable: 
                         self.env.process(
                             self.send_ack(
-                                RingMsg(
-                                    "ACK_COORDINATOR",
+                                RingMsg.new_ack(
+                                    RingKind.ACK_COORDINATOR,
                                     msg.transaction_id,
                                     self.id,
                                     msg.ack_event
@@ -197,14 +236,13 @@ class RingNode(Node):
                 # we finish the simulation when a coordinator cycle is completed
                 else:           
                     self.finish.succeed()       
-            # we received the ack, we trigger the ack event 
-            elif "ACK" in msg.type:     
+            # we received the ack, we trigger the ack event (the ack can be
+            # reused)
+            elif msg.type in ACKS:
                 msg.ack_event.succeed()
+                msg.release()
             
 
     # find the next active neighbor
     def find_next(self):
-        for i in range(1,len(self.peers)):
-            next = self.peers[(i+self.id)%len(self.peers)]
-            if next.crashed == False:
-                return next.id
\ No newline at end of file
+        return self.successors.next(self.id)
\ No newline at end of file
@@ -0,0 +1,83 @@
+import numpy as np
+
+# this class represents the index of the next active node of a ring, shared
+# by the nodes of a simulation: it is a "next alive" union-find where every
+# active node is the root of itself and every crashed node points to a
+# following node (the next one when it crashes), so the next active node after
+# an id is the root of the node after it. The paths are compressed by the
+# lookups, so a lookup takes amortized near-constant time however many nodes
+# crashed. A compressed pointer never skips active nodes: it can skip a
+# crashed node only in the same run of crashed nodes, so when a node recovers
+# only the run before it has to point to it again
+#   attributes:
+#       n_nodes - number of nodes of the ring
+#       parents - NumPy array, parents[id] is id if the node is active,
+#       otherwise a following node that is not after the next active one
+#       parent - memoryview of parents (the items are Python ints)
+#       alive - bytearray, alive[id] is 1 if the node is active
+#       n_alive - number of active nodes
+class SuccessorIndex:
+
+    __slots__ = ("n_nodes", "parents", "parent", "alive", "n_alive")
+
+    def __init__(self, n_nodes):
+        self.n_nodes = n_nodes
+        self.parents = np.arange(n_nodes, dtype=np.int64)
+        self.parent = memoryview(self.parents)
+        self.alive = bytearray(b"\x01") * n_nodes
+        self.n_alive = n_nodes
+
+    # method to set all the nodes as active (new replication)
+    def reset(self):
+        self.parents[:] = np.arange(self.n_nodes)
+        self.alive[:] = b"\x01" * self.n_nodes
+        self.n_alive = self.n_nodes
+
+    # method to return the first active node from id on (following the ring),
+    # compressing the path; at least one node must be active
+    #   params:
+    #       id - id of the first node checked
+    def find(self, id):
+        parent = self.parent
+        root = id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[id] != root:
+            parent[id], id = root, parent[id]
+
+        return root
+
+    # method to return the next active neighbor of a node (None if there are
+    # no other active nodes)
+    #   params:
+    #       id - id of the node
+    def next(self, id):
+        if self.n_alive == 0:
+            return None
+        next = self.find((id + 1) % self.n_nodes)
+
+        return None if next == id else next
+
+    # method to mark a node as crashed
+    #   params:
+    #       id - id of the node
+    def crash(self, id):
+        if self.alive[id]:
+            self.alive[id] = 0
+            self.parent[id] = (id + 1) % self.n_nodes
+            self.n_alive -= 1
+
+    # method to mark a node as active again: the crashed nodes before it
+    # (the only ones whose pointers can skip it) point to it
+    #   params:
+    #       id - id of the node
+    def recover(self, id):
+        if self.alive[id]:
+            return
+        self.alive[id] = 1
+        self.parent[id] = id
+        self.n_alive += 1
+        prev = (id - 1) % self.n_nodes
+        while not self.alive[prev]:
+            self.parent[prev] = id
+            prev = (prev - 1) % self.n_nodes
@@ -1,8 +1,35 @@
 import math
 from numpy import random 
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats as st
+
+from statistic.streaming import DelayHistogram, TDigest, Welford
+from utils import max_delay
+
+# default bins of the aggregated histogram of the delays: DELAY_BINS linear
+# bins up to the DELAY_QUANTILE quantile of the delays distribution
+DELAY_BINS = 100
+DELAY_QUANTILE = 0.999
+# default number of replications (the first ones) whose delays histogram is
+# also kept on its own
+HIST_SAMPLE = 10
+# number of delays buffered before being added to the aggregated histogram
+DELAY_BUFFER = 4096
+# default number of replications preallocated by a CompactSimStats
+CAPACITY = 1024
+
+# This function returns a copy of an array with room for at least size values,
+# at least doubling its length (geometric growth)
+#   params:
+#       arr - NumPy array
+#       size - number of values needed
+def grow(arr, size):
+    new = np.empty(max(size, 2 * len(arr)), dtype=arr.dtype)
+    new[:len(arr)] = arr
+
+    return new
+
+# matplotlib and scipy are imported by the plotting methods, so the statistics
+# accumulation (e.g. in the worker processes) does not load them
 
 # this class represents the statistics for multiple simulations of an election
 # algorithm with the same factors
@@ -17,10 +44,15 @@ import scipy.stats as st
 #       condition
 #       runtimes - list containing runtime/turnaround time for each simulation
 #       msg_counter - list of the number of messages
-#       delays_hist - contains histogram information about the delays for each
-#       execution 
-#       delays - support array that contains the delays for the current
-#       execution
+#       delays_hist - dictionary with the histogram information about the
+#       delays of the sampled executions (indexed by replication)
+#       delays - support array that contains the delays not yet added to the
+#       aggregated histogram (from rep_start, the ones of the current
+#       execution)
+#       rep_start - index in delays of the first delay of the current execution
+#       delay_hist - DelayHistogram of the delays of all the executions
+#       hist_sample - replications whose delays histogram is kept on its own
+#       first - index of the first replication recorded (e.g. by a worker)
 #       id - id of the simulation
 #       current_sim - number of the algorithm execution
 #       mean_rtt - mean of the runtimes
@@ -31,7 +63,35 @@ import scipy.stats as st
 #       err_msg - err of the number of messages
 #       wrong_sims - list of runtimes of wrong simulations (only for reliable bully)
 #       wrong_stat - percentage of wrong simulations (only for reliable bully)
+#       seed - seed of the configuration, the replication k uses the k-th
+#       random stream spawned from it (if None, the global generators are used)
+#       antithetic - if true, the replications are antithetic pairs
+#       keep_raw - if true, the replications are also kept before the outliers
+#       removal (raw_runtimes and raw_msg_counter), to be paired with the ones
+#       of a simulation with common random numbers (or to be stored)
+#       filtered - if true, the outliers were removed from runtimes and
+#       msg_counter
+#       stop_reason - why the replications stopped: "n_sim" (fixed number),
+#       "precision" (target CI width reached) or "max_sim" (budget exhausted)
+#       streaming - if true, the replications are not stored: runtimes and
+#       number of messages are accumulated online (Welford accumulators
+#       acc_rtt and acc_msg, t-digests digest_rtt and digest_msg for the
+#       quantiles), so the memory does not grow with the replications
+#       msg_id - id of the execution whose messages are being counted
+#       (streaming)
+#       msg_count - number of messages of the execution msg_id (streaming)
 class SimStats:
+    __slots__ = (
+        "initiators", "delay", "n_nodes", "name", "unreliable", "timeout",
+        "loss_rate", "seed", "antithetic", "keep_raw", "filtered",
+        "stop_reason", "streaming", "runtimes", "msg_counter", "delays_hist",
+        "delays", "rep_start", "delay_hist", "hist_sample", "first", "id",
+        "mean_rtt", "mean_msg", "var_rtt", "var_msg", "err_rtt", "err_msg",
+        "wrong_sims", "wrong_stat", "raw_runtimes", "raw_msg_counter",
+        "acc_rtt", "acc_msg", "digest_rtt", "digest_msg", "msg_id",
+        "msg_count"
+    )
+
     def __init__(
             self,
             initiators,
@@ -40,7 +100,9 @@ class SimStats:
             name,
             unreliable = False,
             timeout=0.0,
-            loss_rate=0.0
+            loss_rate=0.0,
+            seed=None,
+            antithetic=False
         ):
         self.initiators = initiators
         self.delay = delay
@@ -49,11 +111,23 @@ class SimStats:
         self.unreliable = unreliable
         self.timeout = timeout
         self.loss_rate = loss_rate
+        self.seed = seed
+        self.antithetic = antithetic
+        self.keep_raw = False
+        self.filtered = False
+        self.stop_reason = "n_sim"
+        self.streaming = False
         
         self.runtimes = []
         self.msg_counter = []
-        self.delays_hist = []   # debug
+        self.delays_hist = {}   # debug
         self.delays = []    # debug
+        self.rep_start = 0
+        self.delay_hist = DelayHistogram(
+            np.linspace(0, max_delay(DELAY_QUANTILE, delay), DELAY_BINS + 1)
+        )
+        self.hist_sample = range(HIST_SAMPLE)
+        self.first = 0
         self.id = -1
 
         self.mean_rtt = 0
@@ -68,10 +142,13 @@ class SimStats:
         self.wrong_sims = []
         self.wrong_stat = 0.0
 
+        self.raw_runtimes = []
+        self.raw_msg_counter = []
+
     def __str__(self):
         main_info = (
             f"{self.name} Algorithm:\n"
-            f"- Simulations: {len(self.runtimes)}\n"
+            f"- Simulations: {self.n_sims()}\n"
             f"- Parameters: N = {self.n_nodes}, init = {self.initiators}, " +
             "mean delay = {self.delay:.2f}\n"
             f"- Turnaround time mean: {self.mean_rtt:.2f} \u00B1 " +
@@ -82,11 +159,49 @@ class SimStats:
             f"- Message number var: {self.var_msg:.2f}\n"
         )
         
+        if self.stop_reason != "n_sim":
+            main_info += f"- Stop reason: {self.stop_reason}\n"
         if self.name == "Bully" and not self.unreliable:
             main_info += f"- Wrong simulations: {self.wrong_stat:.4f} %"
 
         return main_info
     
+    # method to return the factors and the statistics as a dictionary (e.g. to
+    # be written as JSON)
+    def summary(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "n_nodes": self.n_nodes,
+            "initiators": self.initiators,
+            "delay": self.delay,
+            "unreliable": self.unreliable,
+            "loss_rate": self.loss_rate,
+            "timeout": self.timeout,
+            "seed": self.seed,
+            "antithetic": self.antithetic,
+            "n_sims": self.n_sims(),
+            "stop_reason": self.stop_reason,
+            "mean_rtt": float(self.mean_rtt),
+            "var_rtt": float(self.var_rtt),
+            "err_rtt": float(self.err_rtt),
+            "mean_msg": float(self.mean_msg),
+            "var_msg": float(self.var_msg),
+            "err_msg": float(self.err_msg),
+            "wrong_stat": float(self.wrong_stat)
+        }
+
+    # method to return the replications before the outliers removal, as the
+    # lists of runtimes and of numbers of messages
+    def replications(self):
+        if not self.filtered:
+            return self.runtimes, self.msg_counter
+        if not self.keep_raw:
+            raise ValueError(
+                "the outliers were removed and the replications were not kept"
+            )
+        return self.raw_runtimes, self.raw_msg_counter
+
     # method to return the list of runtimes
     def get_runtimes(self):
         return self.runtimes
@@ -111,48 +226,210 @@ class SimStats:
     def set_timeout(self, timeout):
         self.timeout = timeout
 
+    # method to return the number of replications recorded
+    def n_sims(self):
+        if self.streaming:
+            return self.acc_rtt.n
+        return len(self.runtimes)
+
+    # method to switch to the streaming mode (before recording replications)
+    def set_streaming(self):
+        self.streaming = True
+        self.acc_rtt = Welford()
+        self.acc_msg = Welford()
+        self.digest_rtt = TDigest()
+        self.digest_msg = TDigest()
+        self.msg_id = -1
+        self.msg_count = 0
+
+    # method to set the bins of the aggregated histogram of the delays and the
+    # replications whose delays histogram is kept on its own (before recording
+    # replications)
+    #   params:
+    #       bins - number of bins
+    #       upper - upper edge of the bins (if None, the DELAY_QUANTILE quantile
+    #       of the delays distribution)
+    #       log - if true, the bins are log-spaced (from upper / 10^4)
+    #       sample - replications whose delays histogram is kept on its own (if
+    #       None, the current ones)
+    def set_delay_hist(self, bins, upper = None, log = False, sample = None):
+        if upper is None:
+            upper = max_delay(DELAY_QUANTILE, self.delay)
+        if log:
+            edges = np.geomspace(upper / 10**4, upper, bins + 1)
+        else:
+            edges = np.linspace(0, upper, bins + 1)
+        self.delay_hist = DelayHistogram(edges)
+        if sample is not None:
+            self.hist_sample = sample
+
+    # method to create an empty SimStats with the same factors (e.g. to record
+    # the replications performed by a worker process)
+    #   params:
+    #       first - index of the first replication it will record
+    def empty_copy(self, first = 0):
+        stats = type(self)(
+            self.initiators,
+            self.delay,
+            self.n_nodes,
+            self.name,
+            self.unreliable,
+            self.timeout,
+            self.loss_rate,
+            self.seed,
+            self.antithetic
+        )
+        stats.delay_hist = self.delay_hist.empty_copy()
+        stats.hist_sample = self.hist_sample
+        stats.first = first
+        if self.streaming:
+            stats.set_streaming()
+
+        return stats
+
+    # method to append the replications recorded by another SimStats of the
+    # same configuration, as if they were performed after the ones already
+    # recorded
+    #   params:
+    #       other - SimStats to merge
+    def merge(self, other):
+        offset = self.n_sims()
+        self.wrong_sims.extend(w_s + offset for w_s in other.wrong_sims)
+        self.delays_hist.update(other.delays_hist)
+        other.flush_delays()
+        self.delay_hist.merge(other.delay_hist)
+        if self.streaming:
+            other.flush_msg()
+            self.acc_rtt.merge(other.acc_rtt)
+            self.acc_msg.merge(other.acc_msg)
+            self.digest_rtt.merge(other.digest_rtt)
+            self.digest_msg.merge(other.digest_msg)
+        else:
+            self.extend_replications(other.runtimes, other.msg_counter)
+
+    # method to set the seed of the configuration
+    #   params:
+    #       seed - seed of the configuration
+    #       antithetic - if true, the replications are antithetic pairs
+    def set_seed(self, seed, antithetic = False):
+        self.seed = seed
+        self.antithetic = antithetic
+
+    # method to set why the replications stopped
+    #   params:
+    #       reason - "n_sim", "precision" or "max_sim"
+    def set_stop_reason(self, reason):
+        self.stop_reason = reason
+
     # add the turnaround time to the list
     #   params:
     #       t_time - runtime to add
     def add_runtime(self, t_time):
-        self.runtimes.append(t_time)
+        if self.streaming:
+            self.acc_rtt.add(t_time)
+            self.digest_rtt.add(t_time)
+        else:
+            self.runtimes.append(t_time)
+
+    # method to add a batch of replications computed as arrays (their delays
+    # are not stored)
+    #   params:
+    #       runtimes - NumPy array of turnaround times
+    #       msgs - NumPy array of numbers of messages
+    #       wrong - NumPy boolean array of the wrong replications (or None)
+    def add_replications(self, runtimes, msgs, wrong = None):
+        if wrong is not None:
+            offset = self.n_sims()
+            self.wrong_sims.extend((np.flatnonzero(wrong) + offset).tolist())
+        if self.streaming:
+            self.flush_msg()
+            self.acc_rtt.add_array(runtimes)
+            self.digest_rtt.add_array(runtimes)
+            self.acc_msg.add_array(msgs)
+            self.digest_msg.add_array(msgs)
+        else:
+            self.extend_replications(runtimes.tolist(), msgs.tolist())
+
+    # method to append the runtimes and the numbers of messages of whole
+    # replications
+    #   params:
+    #       runtimes - list (or array) of turnaround times
+    #       msgs - list (or array) of numbers of messages
+    def extend_replications(self, runtimes, msgs):
+        self.runtimes.extend(runtimes)
+        self.msg_counter.extend(msgs)
 
     # increase counter message and store delay message
     #   params:
     #       id - simulation index
     #       delay - delay of the message
     def add_msg(self, id, delay):
+        if self.streaming:
+            # the messages of the previous execution are all counted
+            if id != self.msg_id:
+                self.flush_msg()
+                self.msg_id = id
+            self.msg_count += 1
+            return
         if id == len(self.msg_counter):
             self.msg_counter.insert(id, 0)
         self.msg_counter[id] += 1
         self.delays.append(delay)
 
-    # method to clear delays list and save histogram information
+    # method to accumulate the number of messages of the last execution
+    # (streaming)
+    def flush_msg(self):
+        if self.streaming and self.msg_id >= 0:
+            self.acc_msg.add(self.msg_count)
+            self.digest_msg.add(self.msg_count)
+            self.msg_id = -1
+            self.msg_count = 0
+
+    # method to end the delays of an execution: they stay in the buffer of the
+    # aggregated histogram and, if the execution is sampled, their histogram
+    # is saved
     #   params:
     #       sim_id - id of the specific execution
     def clear_delays(self, sim_id=-1):
+        if self.streaming:  # the delays are not stored
+            return
         if sim_id < len(self.msg_counter) and sim_id >= 0:
-            bins_msg = round(self.msg_counter[sim_id]/2)        
-            counts, bins = np.histogram(self.delays, bins=bins_msg)
-            counts_d, bins_d = np.histogram(
-                self.delays, bins=bins_msg, density=True
+            self.end_delays(sim_id)
+
+    # method to end the delays of an execution that sent messages
+    #   params:
+    #       sim_id - id of the specific execution
+    def end_delays(self, sim_id):
+        if self.first + sim_id in self.hist_sample:
+            delays = self.delays[self.rep_start:]
+            bins_msg = max(1, round(self.msg_counter[sim_id]/2))
+            counts, bins = np.histogram(delays, bins=bins_msg)
+            counts_d = counts / (len(delays) * np.diff(bins))
+            self.delays_hist[self.first + sim_id] = (
+                counts, bins, counts_d, bins
             )
-            self.delays_hist.append((counts, bins, counts_d, bins_d))         
+        if len(self.delays) >= DELAY_BUFFER:
+            self.flush_delays()
+        # the next simulation starts after the current delays
+        self.rep_start = len(self.delays)
 
-            # clear the delays list for the next simulation
-            self.delays.clear()     
+    # method to add the buffered delays to the aggregated histogram
+    def flush_delays(self):
+        self.delay_hist.add_array(self.delays)
+        self.delays.clear()
+        self.rep_start = 0
 
     # add index of simulation to the wrong simulations counter
     def add_wrong_sim(self):
-        self.wrong_sims.append(len(self.runtimes))
+        self.wrong_sims.append(self.n_sims())
 
     # method to check the rate of wrong simulations of the reliable bully
     def check_wrong_sim(self, whis = 1.5):
+        if self.streaming:
+            print("Warning: runtimes of single simulations are not stored.")
+            return
         # follows boxplot where outliers are outside the "whiskers"
-        q_1 =  np.quantile(self.runtimes, 0.25)
-        q_3 = np.quantile(self.runtimes, 0.75)
-        bound_1 = q_1 - whis * (q_3 - q_1)
-        bound_2 = q_3 + whis * (q_3 - q_1)
+        bound_1, bound_2 = self.whisker_bounds(self.runtimes, whis)
 
         wrong_outlier = 0
         for w_s in self.wrong_sims:
@@ -166,15 +443,22 @@ class SimStats:
         
     def wrg_sim(self):
         if self.name == "Bully" and not self.unreliable:
-            self.wrong_stat = (len(self.wrong_sims) / len(self.runtimes)) * 100
+            self.wrong_stat = (len(self.wrong_sims) / self.n_sims()) * 100
 
     # computes mean of runtimes
     def compute_mean_rtt(self):
-        self.mean_rtt = self.compute_mean(self.runtimes)
+        if self.streaming:
+            self.mean_rtt = self.acc_rtt.mean
+        else:
+            self.mean_rtt = self.compute_mean(self.runtimes)
 
     # computes mean of number of messages
     def compute_mean_msg(self):
-        self.mean_msg = self.compute_mean(self.msg_counter)
+        if self.streaming:
+            self.flush_msg()
+            self.mean_msg = self.acc_msg.mean
+        else:
+            self.mean_msg = self.compute_mean(self.msg_counter)
 
     # computes mean
     #   params:
@@ -188,11 +472,18 @@ class SimStats:
 
     # computes variance of runtimes
     def compute_var_rtt(self):
-        self.var_rtt = self.compute_var(self.runtimes, self.mean_rtt)
+        if self.streaming:
+            self.var_rtt = self.acc_rtt.var()
+        else:
+            self.var_rtt = self.compute_var(self.runtimes, self.mean_rtt)
 
     # computes variance of number of messages
     def compute_var_msg(self):
-        self.var_msg = self.compute_var(self.msg_counter, self.mean_msg)
+        if self.streaming:
+            self.flush_msg()
+            self.var_msg = self.acc_msg.var()
+        else:
+            self.var_msg = self.compute_var(self.msg_counter, self.mean_msg)
 
     # compute variance
     #   params:
@@ -207,11 +498,14 @@ class SimStats:
     
     # method to compute asymptotic CI 95% confidence for runtimes
     def compute_ci_rtt(self):
-        self.err_rtt = self.compute_ci(self.var_rtt, len(self.runtimes))
+        self.err_rtt = self.compute_ci(self.var_rtt, self.n_sims())
 
     # method to compute asymptotic CI 95% confidence for number of messages
     def compute_ci_msg(self):
-        self.err_msg = self.compute_ci(self.var_msg, len(self.msg_counter))
+        if self.streaming:
+            self.err_msg = self.compute_ci(self.var_msg, self.acc_msg.n)
+        else:
+            self.err_msg = self.compute_ci(self.var_msg, len(self.msg_counter))
 
     # method to compute asymptotic CI 95% confidence
     #   params:
@@ -220,10 +514,51 @@ class SimStats:
     def compute_ci(self, var, n):
         return 1.96 * math.sqrt(var / n)
 
+    # method to check if the relative half-width of the 95% CI of the runtimes
+    # and of the number of messages (computed before the outliers removal) is
+    # at most rel_width
+    #   params:
+    #       rel_width - target relative half-width of the CIs
+    def precision_reached(self, rel_width):
+        if self.streaming:
+            self.flush_msg()
+            for acc in (self.acc_rtt, self.acc_msg):
+                if acc.n < 2:
+                    return False
+                err = self.compute_ci(acc.var(), acc.n)
+                if err > rel_width * abs(acc.mean):
+                    return False
+            return True
+
+        for stat_arr in (self.runtimes, self.msg_counter):
+            if len(stat_arr) < 2:
+                return False
+            mean = self.compute_mean(stat_arr)
+            var = self.compute_var(stat_arr, mean)
+            err = self.compute_ci(var, len(stat_arr))
+            if err > rel_width * abs(mean):
+                return False
+
+        return True
+
+    # method to compute all the statistics once the replications are completed
+    # (wrong simulations rate, outliers removal, mean, variance and CI)
+    def compute_stats(self):
+        self.wrg_sim()
+        self.remove_outliers()
+        self.compute_mean_rtt()
+        self.compute_var_rtt()
+        self.compute_ci_rtt()
+        self.compute_mean_msg()
+        self.compute_var_msg()
+        self.compute_ci_msg()
+
     # method to plot the histogram of the simulation runtimes
     #   params:
     #       bins - bins of the histogram
     def plot_runtimes_hist(self, bins):
+        import matplotlib.pyplot as plt
+
         plt.figure()
         rel = "Unreliable" if self.unreliable else "Reliable"
         title = self.name+" - Simulations with "+rel+" Links"
@@ -240,6 +575,9 @@ class SimStats:
     #   params:
     #       bins - bins of the histogram
     def plot_ring_distribution(self, bins):
+        import matplotlib.pyplot as plt
+        import scipy.stats as st
+
         plt.figure()
         plt.hist(
             self.runtimes,
@@ -260,6 +598,8 @@ class SimStats:
 
     # method to plot the boxplot of the simulation runtimes
     def plot_runtimes_box_plot(self):
+        import matplotlib.pyplot as plt
+
         plt.figure()
         plt.boxplot(self.runtimes, tick_labels=[self.name])
         plt.title(self.name+" - Box Plot")
@@ -270,36 +610,101 @@ class SimStats:
     #       sim_index - index of the simulation
     #       density - if true, it plots the density
     def plot_delays_hist_single(self, sim_index, density = False):
-        if sim_index >= len(self.delays_hist): return     
+        import matplotlib.pyplot as plt
+
+        if sim_index not in self.delays_hist:
+            print(f"Warning: delays of simulation {sim_index} not sampled.")
+            return
 
         plt.figure()
         if density:
             plt.stairs(
                 self.delays_hist[sim_index][2], self.delays_hist[sim_index][3]
             )
-            plt.title(self.name+" - Delays Histogram")
-            plt.ylabel("Count")
+            plt.title(self.name+" - Delays Density")
+            plt.ylabel("Density")
         else:
             plt.stairs(
                 self.delays_hist[sim_index][0], self.delays_hist[sim_index][1]
             )
-            plt.title(self.name+" - Delays Density")
+            plt.title(self.name+" - Delays Histogram")
+            plt.ylabel("Count")
+
+        plt.xlabel("Delay")
+
+    # method to plot the aggregated histogram of the delays of all the
+    # simulations
+    #   params:
+    #       density - if true, it plots the density
+    def plot_delays_hist(self, density = False):
+        import matplotlib.pyplot as plt
+
+        self.flush_delays()
+        hist = self.delay_hist
+        plt.figure()
+        if density:
+            plt.stairs(hist.density(), hist.edges)
+            plt.title(self.name+" - Delays Density (all simulations)")
             plt.ylabel("Density")
+        else:
+            plt.stairs(hist.counts, hist.edges)
+            plt.title(self.name+" - Delays Histogram (all simulations)")
+            plt.ylabel("Count")
+        if hist.over > 0:
+            print(f"Warning: {hist.over} delays above {hist.edges[-1]:.2f}.")
 
         plt.xlabel("Delay")
     
+    # method to compute quantiles of the runtimes (estimated by the t-digest in
+    # streaming mode)
+    #   params:
+    #       q - quantile desired (or list of quantiles)
+    def quantile_rtt(self, q):
+        if self.streaming:
+            return self.digest_rtt.quantile(q)
+        return np.quantile(self.runtimes, q)
+
+    # method to compute quantiles of the number of messages (estimated by the
+    # t-digest in streaming mode)
+    #   params:
+    #       q - quantile desired (or list of quantiles)
+    def quantile_msg(self, q):
+        if self.streaming:
+            self.flush_msg()
+            return self.digest_msg.quantile(q)
+        return np.quantile(self.msg_counter, q)
+
+    # method to compute the bounds of the box plot whiskers, values outside are
+    # outliers
+    #   params:
+    #       stat_arr - list of values, or the t-digest of the values
+    #       whis - factor to compute range of whiskers
+    def whisker_bounds(self, stat_arr, whis = 1.5):
+        if isinstance(stat_arr, TDigest):
+            q_1, q_3 = stat_arr.quantile([0.25, 0.75])
+        else:
+            q_1, q_3 = np.quantile(stat_arr, [0.25, 0.75])
+        bound_1 = q_1 - whis * (q_3 - q_1)
+        bound_2 = q_3 + whis * (q_3 - q_1)
+
+        return bound_1, bound_2
+
     # method to remove outliers data points from runtimes and msg 
     #   params:
     #       whis - factor to compute range of whiskers
     def remove_outliers(self, whis = 1.5):
 
+        # the replications are not stored, the statistics include outliers
+        if self.streaming:
+            return
         if len(self.runtimes) == 0:
             print("Warning: no runtimes available to remove outliers.")
             return
-        q_1 =  np.quantile(self.runtimes, 0.25)
-        q_3 = np.quantile(self.runtimes, 0.75)
-        bound_1 = q_1 - whis * (q_3 - q_1)
-        bound_2 = q_3 + whis * (q_3 - q_1)
+        if self.keep_raw:
+            self.raw_runtimes = list(self.runtimes)
+            self.raw_msg_counter = list(self.msg_counter)
+
+        bound_1, bound_2 = self.whisker_bounds(self.runtimes, whis)
 
         def not_outlier(e):
             if e < bound_1 or e > bound_2:
@@ -308,11 +713,308 @@ class SimStats:
 
         self.runtimes = list(filter(not_outlier, self.runtimes))
 
-        q_1 =  np.quantile(self.msg_counter, 0.25)
-        q_3 = np.quantile(self.msg_counter, 0.75)
-        bound_1 = q_1 - whis * (q_3 - q_1)
-        bound_2 = q_3 + whis * (q_3 - q_1)
+        bound_1, bound_2 = self.whisker_bounds(self.msg_counter, whis)
         self.msg_counter = list(filter(not_outlier, self.msg_counter))
+        self.filtered = True
+
+# this class represents the statistics of an election algorithm, as SimStats,
+# recorded in preallocated NumPy arrays that grow geometrically when full. The
+# messages of the current execution are counted by a plain integer, written in
+# the array when the next execution starts (or when the counts are read), and
+# the statistics and the outliers removal are vectorized NumPy operations
+#   attributes:
+#       rtt_buf - array of the runtimes (the first n_rtt are recorded)
+#       n_rtt - number of runtimes recorded
+#       msg_buf - array of the numbers of messages (the first n_msg are
+#       recorded)
+#       n_msg - number of executions whose messages are recorded
+#       cur_id - id of the execution whose messages are being counted
+#       cur_msgs - number of messages of the execution cur_id not yet recorded
+class CompactSimStats(SimStats):
+    __slots__ = ("rtt_buf", "n_rtt", "msg_buf", "n_msg", "cur_id", "cur_msgs")
+
+    def __init__(
+            self,
+            initiators,
+            delay,
+            n_nodes,
+            name,
+            unreliable = False,
+            timeout=0.0,
+            loss_rate=0.0,
+            seed=None,
+            antithetic=False,
+            capacity=CAPACITY
+        ):
+        super().__init__(
+            initiators,
+            delay,
+            n_nodes,
+            name,
+            unreliable,
+            timeout,
+            loss_rate,
+            seed,
+            antithetic
+        )
+        self.rtt_buf = np.empty(capacity)
+        self.msg_buf = np.empty(capacity, dtype=np.int64)
+
+    # the pickled state (e.g. of the replications of a worker) contains only the
+    # recorded part of the arrays
+    def __getstate__(self):
+        self.flush_count()
+        state = {}
+        for cls in type(self).__mro__:
+            for attr in getattr(cls, "__slots__", ()):
+                if attr in ("runtimes", "msg_counter"):
+                    continue
+                if hasattr(self, attr):
+                    state[attr] = getattr(self, attr)
+        state["rtt_buf"] = self.runtimes.copy()
+        state["msg_buf"] = self.msg_counter.copy()
+
+        return state
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    # runtimes recorded (view of the array)
+    @property
+    def runtimes(self):
+        return self.rtt_buf[:self.n_rtt]
+
+    @runtimes.setter
+    def runtimes(self, values):
+        self.rtt_buf = np.array(values, dtype=float)
+        self.n_rtt = len(self.rtt_buf)
+
+    # numbers of messages recorded (view of the array)
+    @property
+    def msg_counter(self):
+        self.flush_count()
+        return self.msg_buf[:self.n_msg]
+
+    @msg_counter.setter
+    def msg_counter(self, values):
+        self.msg_buf = np.array(values, dtype=np.int64)
+        self.n_msg = len(self.msg_buf)
+        self.cur_id = -1
+        self.cur_msgs = 0
+
+    # method to return the number of replications recorded
+    def n_sims(self):
+        if self.streaming:
+            return self.acc_rtt.n
+        return self.n_rtt
+
+    # add the turnaround time to the array
+    #   params:
+    #       t_time - runtime to add
+    def add_runtime(self, t_time):
+        if self.streaming:
+            super().add_runtime(t_time)
+            return
+        if self.n_rtt == len(self.rtt_buf):
+            self.rtt_buf = grow(self.rtt_buf, self.n_rtt + 1)
+        self.rtt_buf[self.n_rtt] = t_time
+        self.n_rtt += 1
+
+    # method to append the runtimes and the numbers of messages of whole
+    # replications
+    #   params:
+    #       runtimes - list (or array) of turnaround times
+    #       msgs - list (or array) of numbers of messages
+    def extend_replications(self, runtimes, msgs):
+        self.flush_count()
+        n = self.n_rtt + len(runtimes)
+        if n > len(self.rtt_buf):
+            self.rtt_buf = grow(self.rtt_buf, n)
+        self.rtt_buf[self.n_rtt:n] = runtimes
+        self.n_rtt = n
+
+        n = self.n_msg + len(msgs)
+        if n > len(self.msg_buf):
+            self.msg_buf = grow(self.msg_buf, n)
+        self.msg_buf[self.n_msg:n] = msgs
+        self.n_msg = n
+
+    # increase counter message and store delay message
+    #   params:
+    #       id - simulation index
+    #       delay - delay of the message
+    def add_msg(self, id, delay):
+        if id == self.cur_id:   # next message of the current execution
+            self.cur_msgs += 1
+            self.delays.append(delay)
+            return
+        if self.streaming:
+            super().add_msg(id, delay)
+            return
+        self.flush_count()
+        self.cur_id = id
+        self.cur_msgs = 1
+        self.delays.append(delay)
+
+    # method to end the delays of an execution (its messages are recorded)
+    #   params:
+    #       sim_id - id of the specific execution
+    def clear_delays(self, sim_id=-1):
+        if self.streaming:  # the delays are not stored
+            return
+        if sim_id == self.cur_id:
+            self.flush_count()
+        if sim_id < self.n_msg and sim_id >= 0:
+            self.end_delays(sim_id)
+
+    # method to record the messages counted for the execution cur_id
+    def flush_count(self):
+        cur_id = self.cur_id
+        if cur_id < 0:
+            return
+        if cur_id < self.n_msg:     # further messages of an execution
+            self.msg_buf[cur_id] += self.cur_msgs
+        else:
+            if cur_id >= len(self.msg_buf):
+                self.msg_buf = grow(self.msg_buf, cur_id + 1)
+            if cur_id > self.n_msg:     # executions without messages
+                self.msg_buf[self.n_msg:cur_id] = 0
+            self.msg_buf[cur_id] = self.cur_msgs
+            self.n_msg = cur_id + 1
+        self.cur_id = -1
+        self.cur_msgs = 0
+
+    # computes mean
+    #   params:
+    #       stat_arr - reference to array to compute the mean of
+    def compute_mean(self, stat_arr):
+        return float(np.mean(stat_arr))
+
+    # compute variance
+    #   params:
+    #       stat_arr  - reference to array to compute the variance of
+    #       stat_mean - mean of given array
+    def compute_var(self, stat_arr, stat_mean):
+        diff = np.asarray(stat_arr) - stat_mean
+        return float(np.dot(diff, diff)) / (len(diff) - 1)
+
+    # method to remove outliers data points from runtimes and msg
+    #   params:
+    #       whis - factor to compute range of whiskers
+    def remove_outliers(self, whis = 1.5):
+        if self.streaming:
+            return
+        if self.n_rtt == 0:
+            print("Warning: no runtimes available to remove outliers.")
+            return
+        if self.keep_raw:
+            self.raw_runtimes = self.runtimes.copy()
+            self.raw_msg_counter = self.msg_counter.copy()
+
+        for attr in ("runtimes", "msg_counter"):
+            stat_arr = getattr(self, attr)
+            bound_1, bound_2 = self.whisker_bounds(stat_arr, whis)
+            keep = (stat_arr >= bound_1) & (stat_arr <= bound_2)
+            setattr(self, attr, stat_arr[keep])
+        self.filtered = True
+
+# this class represents the differences between the replications of two
+# simulations performed with common random numbers (same seed): for the
+# runtimes the replication k of the first one is paired with the replication k
+# of the second one. The common random numbers pair only the runtimes: the two
+# algorithms send different messages, so the streams are not aligned on the
+# draws that decide the number of messages (on the default comparisons the
+# variance reduction is about 1.1-1.6 for the runtimes and 1.0-1.2 for the
+# messages), and the difference of the number of messages is estimated as
+# between independent simulations (a conservative CI, since the common random
+# numbers do not correlate them negatively). With antithetic variates, each
+# antithetic pair is averaged before computing the statistics. The statistics
+# are computed on all the replications, i.e. before the outliers removal
+#   attributes:
+#       stats_1 - first SimStats
+#       stats_2 - second SimStats
+#       n - number of (independent) paired samples
+#       mean_rtt - mean of the runtimes differences
+#       var_rtt - var of the runtimes differences
+#       err_rtt - err of the runtimes differences
+#       mean_msg - difference of the means of the number of messages
+#       var_msg - var of the difference of the number of messages of two
+#       independent samples
+#       err_msg - err of the difference of the number of messages
+#       gain_rtt - variance reduction factor of the runtimes differences with
+#       respect to independent simulations, i.e. how many times more
+#       replications independent simulations need for the same CI width
+class PairedStats:
+    def __init__(self, stats_1, stats_2):
+        if stats_1.seed is None or stats_1.seed != stats_2.seed:
+            print("Warning: the simulations do not share the random streams.")
+        self.stats_1 = stats_1
+        self.stats_2 = stats_2
+
+        rtt_1 = self.samples(stats_1, "runtimes")
+        rtt_2 = self.samples(stats_2, "runtimes")
+        msg_1 = self.samples(stats_1, "msg_counter")
+        msg_2 = self.samples(stats_2, "msg_counter")
+        n = min(len(rtt_1), len(rtt_2))
+        self.antithetic = stats_1.antithetic and stats_2.antithetic
+        
+        d_rtt = np.asarray(rtt_1[:n]) - np.asarray(rtt_2[:n])
+        m_1 = np.asarray(msg_1[:n], dtype=float)
+        m_2 = np.asarray(msg_2[:n], dtype=float)
+        ind_rtt = np.var(rtt_1[:n], ddof=1) + np.var(rtt_2[:n], ddof=1)
+        if self.antithetic:
+            n -= n % 2
+            d_rtt = d_rtt[:n].reshape(-1, 2).mean(axis=1)
+            m_1 = m_1[:n].reshape(-1, 2).mean(axis=1)
+            m_2 = m_2[:n].reshape(-1, 2).mean(axis=1)
+            # independent simulations with the same number of replications 
+            ind_rtt /= 2
+        self.n = len(d_rtt)
+
+        self.mean_rtt = d_rtt.mean()
+        self.var_rtt = d_rtt.var(ddof=1)
+        self.err_rtt = 1.96 * math.sqrt(self.var_rtt / self.n)
+        self.mean_msg = m_1.mean() - m_2.mean()
+        self.var_msg = m_1.var(ddof=1) + m_2.var(ddof=1)
+        self.err_msg = 1.96 * math.sqrt(self.var_msg / self.n)
+        self.gain_rtt = ind_rtt / self.var_rtt if self.var_rtt > 0 else math.inf
+
+    def __str__(self):
+        return (
+            f"{self.stats_1.name} - {self.stats_2.name} paired differences:\n"
+            f"- Paired samples: {self.n}" +
+            (" (antithetic pairs)\n" if self.antithetic else "\n") +
+            f"- Turnaround time difference: {self.mean_rtt:.2f} \u00B1 " +
+            f"{self.err_rtt:.2f} ms\n"
+            f"- Message number difference: {self.mean_msg:.2f} \u00B1 " +
+            f"{self.err_msg:.2f} (not paired)\n"
+            f"- Variance reduction: {self.gain_rtt:.2f} (turnaround time)\n"
+        )
+
+    # method to return the paired differences as a dictionary
+    def summary(self):
+        return {
+            "ids": [self.stats_1.id, self.stats_2.id],
+            "n": self.n,
+            "antithetic": self.antithetic,
+            "mean_rtt": float(self.mean_rtt),
+            "err_rtt": float(self.err_rtt),
+            "mean_msg": float(self.mean_msg),
+            "err_msg": float(self.err_msg),
+            "gain_rtt": float(self.gain_rtt)
+        }
+
+    # method to return the replications of a simulation before the outliers
+    # removal, if they were kept
+    #   params:
+    #       stats - SimStats
+    #       attr - "runtimes" or "msg_counter"
+    def samples(self, stats, attr):
+        raw = getattr(stats, "raw_" + attr)
+        if len(raw) > 0:
+            return raw
+        return getattr(stats, attr)
 
 # this class represents the statistics result of different simulation with 
 # different factors, it is used to create plots/further analysis and to 
@@ -327,15 +1029,26 @@ class StatsManager:
     def insert_stat(self, sim_stat):
         self.stats.append(sim_stat)
 
+    # method to compute the paired differences of two simulations performed
+    # with common random numbers
+    #   params:
+    #       id1 - index of the first simulation in the stats list
+    #       id2 - index of the second simulation in the stats list
+    def paired_cmp(self, id1, id2):
+        return PairedStats(self.stats[id1], self.stats[id2])
+
     # method to analyze two different simulations box plots
     #   params:
     #       id1 - index of the first simulation in the stats list
     #       id2 - index of the second simulation in the stats list
     def cmp_runtimes_box_plot(self, id1, id2):
+        import matplotlib.pyplot as plt
+
         plt.figure()
         labels=[self.stats[id1].name, self.stats[id2].name]
         plt.boxplot(
-            [self.stats[id1].runtimes, self.stats[id2].runtimes], labels=labels
+            [self.stats[id1].runtimes, self.stats[id2].runtimes],
+            tick_labels=labels
         )
         if self.stats[id1].unreliable:
             reliable = f"Unreliable Links with Loss Rate = "
@@ -352,10 +1065,12 @@ class StatsManager:
     #       bins - number of the bins for the histogram
     #       name - title of the simulation comparison
     def cmp_runtimes(self, ids, bins, name):
+        import matplotlib.pyplot as plt
 
         reliable = "Unreliable" if self.stats[ids[0]].unreliable else "Reliable"
         title = reliable + " " +self.stats[ids[0]].name+ " Analysis - "+name
-        fig, axs = plt.subplots(len(ids), sharex = True)
+        fig, axs = plt.subplots(len(ids), sharex = True, squeeze = False)
+        axs = axs[:, 0]
         fig.suptitle(title)
         
         for i, id in enumerate(ids):
@@ -385,6 +1100,7 @@ class StatsManager:
     #       ids - list of indexes of the simulation contained in the stats
     #       attribute 
     def n_nodes_cmp(self, ids):
+        import matplotlib.pyplot as plt
 
         res_rtt = {}   
         res_msg = {}
@@ -418,6 +1134,8 @@ class StatsManager:
     #       ids - list of indexes of the simulation contained in the stats
     #       attribute 
     def quantile_bully_cmp(self, ids):
+        import matplotlib.pyplot as plt
+
         res_rtt = {}   
 
         for id in ids:
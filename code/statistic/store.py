@@ -0,0 +1,202 @@
+import json
+import os
+import numpy as np
+
+from statistic.statistics import SimStats
+
+# version of the layout of the store
+STORE_VERSION = 1
+# columns of the replications: file name and (little endian) type
+COLUMNS = {
+    "runtimes": "<f8",
+    "msg_counter": "<i8",
+    "wrong_sims": "<i8"
+}
+# factors of a configuration saved in the metadata
+FACTORS = (
+    "name",
+    "n_nodes",
+    "initiators",
+    "delay",
+    "unreliable",
+    "timeout",
+    "loss_rate",
+    "seed",
+    "antithetic"
+)
+
+# this class represents an on-disk store of the replications of the
+# simulations: every configuration is a directory with a metadata file
+# (meta.json, the factors and the number of replications) and one raw binary
+# file per column (runtimes.f8, msg_counter.i8 and wrong_sims.i8). New
+# replications of a configuration are appended to the column files, which are
+# never rewritten, and the metadata is replaced last: the lengths it records
+# are the valid part of the columns, so an interrupted append is discarded.
+# The columns are loaded lazily as read-only memory maps
+#   attributes:
+#       root - directory of the store
+class ResultStore:
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    # method to return the key (directory name) of the configuration of a
+    # SimStats
+    #   params:
+    #       stats - SimStats
+    def key(self, stats):
+        rel = f"u{stats.loss_rate:g}" if stats.unreliable else "r"
+        anti = "a" if stats.antithetic else ""
+        return (
+            f"{stats.name.lower()}-n{stats.n_nodes}-i{stats.initiators}-" +
+            f"d{stats.delay:g}-{rel}-q{stats.timeout:g}-s{stats.seed}{anti}"
+        )
+
+    # method to return the directory of a configuration
+    #   params:
+    #       key - key of the configuration
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    # method to return the keys of the stored configurations
+    def keys(self):
+        return sorted(
+            key for key in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.path(key), "meta.json"))
+        )
+
+    # method to return the metadata of a configuration (None if it is not
+    # stored)
+    #   params:
+    #       key - key of the configuration
+    def meta(self, key):
+        try:
+            with open(os.path.join(self.path(key), "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # method to save the replications of a SimStats (before the outliers
+    # removal): if its configuration is already stored, only the replications
+    # after the stored ones are appended (all of them without a seed, since
+    # they are independent of the stored ones). Returns the key of the
+    # configuration
+    #   params:
+    #       stats - SimStats to save
+    #       key - key of the configuration (if None, derived from the factors)
+    #       info - dictionary of further metadata of a new configuration (the
+    #       factors it contains replace those of stats)
+    def save(self, stats, key = None, info = None):
+        if stats.streaming:
+            raise ValueError("streaming statistics have no replications")
+        runtimes, msg_counter = stats.replications()
+        if key is None:
+            key = self.key(stats)
+        factors = {factor: getattr(stats, factor) for factor in FACTORS}
+        if info is not None:
+            factors.update(
+                (factor, info[factor]) for factor in FACTORS if factor in info
+            )
+        path = self.path(key)
+        meta = self.meta(key)
+        if meta is None:
+            os.makedirs(path, exist_ok=True)
+            meta = {"version": STORE_VERSION}
+            if info is not None:
+                meta.update(info)
+            meta.update(factors)
+            meta["lengths"] = {column: 0 for column in COLUMNS}
+        elif any(meta[factor] != factors[factor] for factor in FACTORS):
+            raise ValueError(f"{key} stores a different configuration")
+
+        length = meta["lengths"]["runtimes"]
+        first = length if stats.seed is not None else 0
+        wrong = [
+            w_s - first + length for w_s in stats.wrong_sims if w_s >= first
+        ]
+        columns = {
+            "runtimes": runtimes[first:],
+            "msg_counter": msg_counter[first:],
+            "wrong_sims": wrong
+        }
+        for column, values in columns.items():
+            self.append(path, column, meta["lengths"][column], values)
+            meta["lengths"][column] += len(values)
+        meta["stop_reason"] = stats.stop_reason
+        self.write_meta(path, meta)
+
+        return key
+
+    # method to append values to a column file, after truncating it to its
+    # valid length
+    #   params:
+    #       path - directory of the configuration
+    #       column - name of the column
+    #       length - number of valid values of the column
+    #       values - values to append
+    def append(self, path, column, length, values):
+        dtype = np.dtype(COLUMNS[column])
+        with open(self.column_file(path, column), "ab") as f:
+            f.truncate(length * dtype.itemsize)
+            np.asarray(values, dtype=dtype).tofile(f)
+
+    # method to replace the metadata file of a configuration
+    #   params:
+    #       path - directory of the configuration
+    #       meta - metadata
+    def write_meta(self, path, meta):
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    # method to return the file of a column
+    #   params:
+    #       path - directory of the configuration
+    #       column - name of the column
+    def column_file(self, path, column):
+        return os.path.join(path, column + "." + COLUMNS[column][1:])
+
+    # method to load a column as a read-only memory map
+    #   params:
+    #       key - key of the configuration
+    #       column - name of the column
+    #       meta - metadata of the configuration
+    def column(self, key, column, meta):
+        length = meta["lengths"][column]
+        dtype = np.dtype(COLUMNS[column])
+        if length == 0:     # empty files cannot be mapped
+            return np.empty(0, dtype)
+        return np.memmap(
+            self.column_file(self.path(key), column),
+            dtype=dtype,
+            mode="r",
+            shape=(length,)
+        )
+
+    # method to load a configuration as a SimStats whose replications are
+    # memory maps of the columns (the statistics are not computed)
+    #   params:
+    #       key - key of the configuration
+    def load(self, key):
+        meta = self.meta(key)
+        if meta is None:
+            raise KeyError(key)
+        stats = SimStats(
+            meta["initiators"],
+            meta["delay"],
+            meta["n_nodes"],
+            meta["name"],
+            meta["unreliable"],
+            meta["timeout"],
+            meta["loss_rate"],
+            meta["seed"],
+            meta["antithetic"]
+        )
+        stats.runtimes = self.column(key, "runtimes", meta)
+        stats.msg_counter = self.column(key, "msg_counter", meta)
+        stats.wrong_sims = self.column(key, "wrong_sims", meta).tolist()
+        stats.set_stop_reason(meta["stop_reason"])
+
+        return stats
@@ -0,0 +1,223 @@
+import math
+import numpy as np
+
+# this class represents an online (Welford) accumulator of mean and variance;
+# accumulators of different workers can be merged (Chan et al. formula)
+#   attributes:
+#       n - number of samples
+#       mean - mean of the samples
+#       m2 - sum of the squared differences from the mean
+class Welford:
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    # method to add a sample
+    #   params:
+    #       x - sample
+    def add(self, x):
+        self.n += 1
+        diff = x - self.mean
+        self.mean += diff / self.n
+        self.m2 += diff * (x - self.mean)
+
+    # method to add an array of samples
+    #   params:
+    #       x - NumPy array of samples
+    def add_array(self, x):
+        if len(x) == 0:
+            return
+        other = Welford()
+        other.n = len(x)
+        other.mean = float(np.mean(x))
+        other.m2 = float(np.sum((x - other.mean) ** 2))
+        self.merge(other)
+
+    # method to merge another accumulator
+    #   params:
+    #       other - Welford accumulator to merge
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        diff = other.mean - self.mean
+        self.mean += diff * other.n / n
+        self.m2 += other.m2 + diff * diff * self.n * other.n / n
+        self.n = n
+
+    # method to return the (sample) variance
+    def var(self):
+        if self.n < 2:
+            return 0.0
+        return self.m2 / (self.n - 1)
+
+# this class represents a t-digest, a bounded-memory sketch of a distribution
+# used to estimate its quantiles: the samples are clustered in centroids whose
+# size is small near the tails (k1 scale function), so extreme quantiles are
+# accurate. Digests of different workers can be merged
+#   attributes:
+#       compression - compression factor (the number of centroids is O(it))
+#       means - means of the centroids (sorted)
+#       weights - weights of the centroids
+#       buffer - samples not yet merged in the centroids
+#       buffer_size - size of the buffer that triggers the compression
+#       n - number of samples
+#       min - minimum sample
+#       max - maximum sample
+class TDigest:
+
+    def __init__(self, compression = 200, buffer_size = 1000):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []
+        self.buffer_size = buffer_size
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # method to add a sample
+    #   params:
+    #       x - sample
+    def add(self, x):
+        self.buffer.append(x)
+        self.n += 1
+        if x < self.min: self.min = x
+        if x > self.max: self.max = x
+        if len(self.buffer) >= self.buffer_size:
+            self.compress()
+
+    # method to add an array of samples
+    #   params:
+    #       x - NumPy array of samples
+    def add_array(self, x):
+        if len(x) == 0:
+            return
+        self.buffer.extend(x.tolist())
+        self.n += len(x)
+        self.min = min(self.min, float(np.min(x)))
+        self.max = max(self.max, float(np.max(x)))
+        if len(self.buffer) >= self.buffer_size:
+            self.compress()
+
+    # method to merge another digest
+    #   params:
+    #       other - TDigest to merge
+    def merge(self, other):
+        other.compress()
+        self.means = np.concatenate((self.means, other.means))
+        self.weights = np.concatenate((self.weights, other.weights))
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress(force=True)
+
+    # method to merge the buffer in the centroids
+    #   params:
+    #       force - if true, the centroids are merged even with empty buffer
+    def compress(self, force = False):
+        if len(self.buffer) == 0 and not force:
+            return
+        means = np.concatenate((self.means, self.buffer))
+        weights = np.concatenate((self.weights, np.ones(len(self.buffer))))
+        self.buffer = []
+        if len(means) == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+
+        new_means = []
+        new_weights = []
+        cur_mean, cur_weight = means[0], weights[0]
+        w_left = 0.0    # weight of the centroids before the current one
+        k_left = self.scale(0.0)
+        for mean, weight in zip(means[1:], weights[1:]):
+            q = (w_left + cur_weight + weight) / total
+            if self.scale(q) - k_left <= 1.0:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                new_means.append(cur_mean)
+                new_weights.append(cur_weight)
+                w_left += cur_weight
+                k_left = self.scale(w_left / total)
+                cur_mean, cur_weight = mean, weight
+        new_means.append(cur_mean)
+        new_weights.append(cur_weight)
+
+        self.means = np.array(new_means)
+        self.weights = np.array(new_weights)
+
+    # k1 scale function of the t-digest
+    #   params:
+    #       q - quantile
+    def scale(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    # method to estimate a quantile
+    #   params:
+    #       q - quantile desired (or array of quantiles)
+    def quantile(self, q):
+        self.compress()
+        if self.n == 0:
+            return math.nan
+        cum = np.cumsum(self.weights)
+        centers = cum - self.weights / 2
+        xs = np.concatenate(([0.0], centers, [cum[-1]]))
+        ys = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(np.asarray(q) * cum[-1], xs, ys)
+
+# this class represents a histogram with fixed bins whose counts are
+# accumulated in place, so its memory does not grow with the samples;
+# histograms with the same bins can be merged
+#   attributes:
+#       edges - edges of the bins (NumPy array)
+#       counts - number of samples in each bin
+#       under - number of samples below the first edge
+#       over - number of samples above the last edge
+#       n - number of samples
+class DelayHistogram:
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+        self.n = 0
+
+    # method to add an array of samples
+    #   params:
+    #       x - NumPy array (or list) of samples
+    def add_array(self, x):
+        x = np.asarray(x, dtype=float)
+        if len(x) == 0:
+            return
+        counts, _ = np.histogram(x, self.edges)
+        self.counts += counts
+        self.under += int(np.count_nonzero(x < self.edges[0]))
+        self.over += int(np.count_nonzero(x > self.edges[-1]))
+        self.n += len(x)
+
+    # method to merge another histogram with the same bins
+    #   params:
+    #       other - DelayHistogram to merge
+    def merge(self, other):
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+        self.n += other.n
+
+    # method to create an empty histogram with the same bins
+    def empty_copy(self):
+        return DelayHistogram(self.edges)
+
+    # method to return the density of the samples in each bin (the samples
+    # outside the bins are included in the total)
+    def density(self):
+        if self.n == 0:
+            return np.zeros(len(self.counts))
+        return self.counts / (self.n * np.diff(self.edges))
@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import main
+from experiment.cache import ExperimentCache
+
+N_SIM = 60
+CONFIG = ["--n-sim", str(N_SIM), "--seed", "7", "--engine", "kernel",
+          "--workers", "1", "--no-plots"]
+
+# The Bully configuration with loss rate 0.2 performed by a comparison and
+# then by a sweep (after other configurations) is taken from the cache
+def test_config_shared_by_commands(tmp_path, monkeypatch):
+    cache = ["--cache", str(tmp_path)]
+    filled = []
+    fill = ExperimentCache.fill
+
+    def spy(self, stats, factors, n_sim):
+        n = fill(self, stats, factors, n_sim)
+        filled.append((stats.name, stats.loss_rate, n))
+        return n
+
+    monkeypatch.setattr(ExperimentCache, "fill", spy)
+    assert main.main(["compare", "--loss", "0.2"] + CONFIG + cache) == 0
+    keys = ExperimentCache(str(tmp_path)).store.keys()
+    assert len(keys) == 2
+
+    filled.clear()
+    assert main.main(
+        ["sweep", "--algorithms", "Bully", "--losses", "0.1", "0.2"] +
+        CONFIG + cache
+    ) == 0
+    assert ("Bully", 0.2, N_SIM) in filled     # cache hit
+    assert ("Bully", 0.1, 0) in filled          # new configuration
+    assert len(ExperimentCache(str(tmp_path)).store.keys()) == 3
+
+    simulations = main.results["simulations"]
+    bully = [s for s in simulations if s["name"] == "Bully"]
+    compared, swept = bully[0], bully[-1]   # loss rate 0.2
+    del compared["id"], swept["id"]
+    assert compared == swept
@@ -1,15 +1,96 @@
+import functools
+import hashlib
+import math
 import random
-from scipy.stats import expon
+import numpy as np
 
 # create an exponential delay
 #   params:
 #       mean - exponential mean
-#       rng - random number generator
+#       rng - random number generator (NumPy Generator)
 def delay(mean, rng = None):
     if rng==None:
         return random.expovariate(1/mean)
     else:
-        return rng.expovariate(1/mean)
+        return rng.exponential(mean)
+
+# create a batch of exponential delays (the same ones created one at a time)
+#   params:
+#       mean - exponential mean
+#       size - number of delays
+#       rng - random number generator (NumPy Generator)
+def delays(mean, size, rng = None):
+    if rng==None:
+        return [random.expovariate(1/mean) for i in range(size)]
+    else:
+        return rng.exponential(mean, size)
+
+# draw a uniform number in [0, 1)
+#   params:
+#       rng - random number generator (NumPy Generator), if None the NumPy
+#       global generator is used
+def uniform(rng = None):
+    if rng==None:
+        return np.random.uniform(0,1)
+    else:
+        return rng.random()
+
+# draw a batch of uniform numbers in [0, 1)
+#   params:
+#       size - number of uniforms
+#       rng - random number generator (NumPy Generator), if None the NumPy
+#       global generator is used
+def uniforms(size, rng = None):
+    if rng==None:
+        return np.random.uniform(0,1,size)
+    else:
+        return rng.random(size)
+
+# draw an integer in [0, high)
+#   params:
+#       high - upper bound (excluded)
+#       rng - random number generator (NumPy Generator), if None the NumPy
+#       global generator is used
+def randint(high, rng = None):
+    if rng==None:
+        return np.random.randint(high)
+    else:
+        return int(rng.integers(high))
+
+# derive the seed of a configuration from the root seed of an experiment
+#   params:
+#       root_seed - root seed of the experiment
+#       key - indexes identifying the configuration in the experiment
+def config_seed(root_seed, *key):
+    seq = np.random.SeedSequence(root_seed, spawn_key=key)
+    return int(seq.generate_state(1, np.uint64)[0])
+
+# return the key of a configuration for config_seed, derived from its factors
+# (a hash of them, as 32-bit words), so a configuration gets the same seed
+# whatever experiment performs it; the factors that do not affect the
+# replications are normalized (the loss rate with reliable links, the timeout
+# of the reliable Ring)
+#   params:
+#       name - algorithm name
+#       n_nodes - number of nodes
+#       initiators - number of initiators
+#       delay - exponential mean for delays
+#       unreliable - if true, the simulations assume unreliable links
+#       loss - loss rate
+#       timeout - quantile of exponential distribution for the timeouts
+def factors_key(name, n_nodes, initiators, delay, unreliable, loss, timeout):
+    if not unreliable:
+        loss = 0.0
+        if name == "Ring":
+            timeout = 0.0
+    factors = (
+        f"{name}|{int(n_nodes)}|{int(initiators)}|{float(delay)!r}|" +
+        f"{bool(unreliable)}|{float(loss)!r}|{float(timeout)!r}"
+    )
+    digest = hashlib.sha256(factors.encode()).digest()
+    return tuple(
+        int.from_bytes(digest[i:i + 4], "little") for i in range(0, 16, 4)
+    )
 
 # compares two integers
 #   params:
@@ -18,9 +99,13 @@ def delay(mean, rng = None):
 def cmp(a, b):
     return (a > b) - (a < b)
 
-# compute the quantile of an exponential function
+# compute the quantile of an exponential function: -mean * ln(1 - quantile)
+# (the results are cached, the same timeouts are used by all the nodes)
 #   params:
 #       quantile - quantile desired
 #       mean - exponential mean
+@functools.lru_cache(maxsize=None)
 def max_delay(quantile, mean):
-    return expon.ppf(quantile, loc = 0, scale = mean)
\ No newline at end of file
+    if quantile >= 1.0:
+        return math.inf
+    return mean * -math.log1p(-quantile)